@@ -0,0 +1,281 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#                               Import local code                              #
+#------------------------------------------------------------------------------#
+from .discover import find_index_files_async
+from .extract import read_html_file
+#------------------------------------------------------------------------------#
+#               Import packages from the python standard library               #
+#------------------------------------------------------------------------------#
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
+import queue
+import threading
+
+
+#------------------------------------------------------------------------------#
+#                           Global variables & methods                         #
+#------------------------------------------------------------------------------#
+# Marks the end of the results of the walk of the content directory
+_DONE = object()
+
+
+#------------------------------------------------------------------------------#
+class AsyncPipeline:
+    """
+    class: AsyncPipeline. This class overlaps the blocking filesystem calls
+    made while the "index.html" files are collected (see the "-async_io/
+    --async_io" commandline argument). On a network filesystem every listing
+    of a directory, "stat" call and read of a file is a round trip to the
+    server, which would otherwise be made one after the other.
+
+    An asyncio event loop runs in a background thread. The directories are
+    listed and the files are read by a pool of threads, with at most
+    "concurrency" listings and reads in flight at a time. The files that have
+    been read are handed to the pool of workers that parses them through a
+    bounded queue, such that reading does not run too far ahead of parsing.
+
+    The pipeline stands in for the pool of workers in the "iter_files" method
+    of the "StaticIndexPage" class: a batch of files is submitted and the
+    result is a future, i.e. the files are handed out in the same order (and
+    with the same metadata) as without the pipeline.
+    """
+
+    # The minimum number of files submitted at a time. Each batch is a round
+    # trip through the event loop, while the files of a batch are still read
+    # at the same time
+    BATCH_SIZE = 32
+
+
+    def __init__(self, concurrency = 16, executor = None, head_only = True,
+        queue_size = None):
+        """ Initialize class variables and start the event loop.
+
+        Args:
+            concurrency (int): The maximum number of directories listed and
+                files read at the same time.
+            executor (concurrent.futures.Executor): The pool of workers that
+                parses the files. If None, then the files are parsed by a
+                single thread.
+            head_only (bool): Whether only the head of the files is needed
+                (see the "-parser/--parser" commandline argument).
+            queue_size (int): The maximum number of batches of files that
+                have been read and are waiting to be parsed. Defaults to
+                "concurrency".
+
+        Returns:
+            None
+        """
+        self.concurrency = concurrency
+        self.head_only = head_only
+        self.queue_size = queue_size or concurrency
+        self.io_executor = ThreadPoolExecutor(max_workers = concurrency)
+        # A pool of workers that is given is shut down by its owner
+        self.own_executor = executor is None
+        self.executor = ThreadPoolExecutor(max_workers = 1) \
+            if executor is None else executor
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target = self.loop.run_forever,
+            daemon = True,
+        )
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.setup(), self.loop).result()
+
+
+    async def setup(self):
+        """ Create the objects that need to be created within the event loop
+        and start handing files to the workers.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        # The files that have been read and are waiting to be parsed, and the
+        # number of batches that may be parsed at the same time
+        self.queue = asyncio.Queue(maxsize = self.queue_size)
+        self.slots = asyncio.Semaphore(self.queue_size)
+        self.dispatcher = asyncio.create_task(self.dispatch())
+
+
+    def find_index_files(self, content_dir, **kwargs):
+        """ Walk the content directory within the event loop. See the
+        "find_index_files_async" function in the "discover" module.
+
+        Args:
+            content_dir (str): The absolute path to the content directory.
+            **kwargs: The other arguments of "find_index_files_async".
+
+        Returns:
+            (generator(tuple)): The (directory, path, status) tuples of the
+                "index.html" files in the same order as "find_index_files".
+        """
+        # The walk gets at most "4 * concurrency" results ahead of the
+        # caller. A result is only put on the queue once a slot is free, such
+        # that the event loop itself never waits on the queue. There is room
+        # for an error and the end of the results as well
+        size = 4 * self.concurrency
+        results = queue.Queue(maxsize = size + 2)
+        slots = None
+        async def walk():
+            nonlocal slots
+            slots = asyncio.Semaphore(size)
+            try:
+                async for result in find_index_files_async(content_dir,
+                    concurrency = self.concurrency,
+                    executor = self.io_executor,
+                    **kwargs,
+                ):
+                    await slots.acquire()
+                    results.put(result)
+            except Exception as e:
+                results.put(e)
+            finally:
+                results.put(_DONE)
+        future = asyncio.run_coroutine_threadsafe(walk(), self.loop)
+        try:
+            while True:
+                result = results.get()
+                if result is _DONE:
+                    break
+                if isinstance(result, Exception):
+                    raise result
+                self.loop.call_soon_threadsafe(slots.release)
+                yield result
+        finally:
+            future.cancel()
+
+
+    def submit(self, fn, index_paths):
+        """ Read a batch of files and then hand them to the pool of workers.
+
+        Args:
+            fn (function): The function that parses the files. It is called
+                with the list of (index_path, data, complete) tuples returned
+                by the "read_html_file" function in the "extract" module.
+            index_paths (list(str)): The absolute paths to the files.
+
+        Returns:
+            (concurrent.futures.Future): The result of "fn".
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self.collect(fn, index_paths), self.loop,
+        )
+
+
+    async def read(self, index_path):
+        """ Read (the start of) a file. See the "read_html_file" function in
+        the "extract" module.
+
+        Args:
+            index_path (str): The absolute path to the file.
+
+        Returns:
+            (tuple): The (index_path, data, complete) of the file.
+        """
+        async with self.semaphore:
+            return await self.loop.run_in_executor(self.io_executor,
+                read_html_file, index_path, self.head_only,
+            )
+
+
+    async def collect(self, fn, index_paths):
+        """ Read a batch of files (at the same time) and wait for them to be
+        parsed.
+
+        Args:
+            fn (function): The function that parses the files.
+            index_paths (list(str)): The absolute paths to the files.
+
+        Returns:
+            The result of "fn".
+        """
+        contents = await asyncio.gather(*[
+            self.read(index_path) for index_path in index_paths
+        ])
+        result = self.loop.create_future()
+        # Waits while the queue is full, i.e. while the workers are behind
+        await self.queue.put((fn, contents, result))
+        return await result
+
+
+    async def dispatch(self):
+        """ Hand the files that have been read to the pool of workers, at
+        most "queue_size" batches at a time.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        while True:
+            fn, contents, result = await self.queue.get()
+            await self.slots.acquire()
+            future = self.loop.run_in_executor(self.executor, fn, contents)
+            future.add_done_callback(partial(self.parsed, result))
+
+
+    def parsed(self, result, future):
+        """ Pass on the result of a batch of files that has been parsed.
+
+        Args:
+            result (asyncio.Future): The future to pass the result on to.
+            future (asyncio.Future): The finished future of the workers.
+
+        Returns:
+            None
+        """
+        self.slots.release()
+        if result.cancelled():
+            return
+        if future.cancelled():
+            result.cancel()
+        elif not future.exception() is None:
+            result.set_exception(future.exception())
+        else:
+            result.set_result(future.result())
+
+
+    async def cancel(self):
+        """ Cancel all tasks that are still running in the event loop.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        tasks = [
+            task for task in asyncio.all_tasks()
+            if not task is asyncio.current_task()
+        ]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions = True)
+
+
+    def close(self):
+        """ Stop the event loop and the pools of threads.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        asyncio.run_coroutine_threadsafe(self.cancel(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.io_executor.shutdown()
+        self.loop.close()
+        if self.own_executor:
+            self.executor.shutdown()
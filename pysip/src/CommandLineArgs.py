@@ -13,10 +13,20 @@ from .utils import (
     is_hex,
     print_verbose,
 )
+from .content_hash import (
+    CONTENT_HASH_MODES,
+)
+from .output import (
+    PRECOMPRESS_FORMATS,
+)
+from .RandomHTMLDocument import (
+    PROFILES,
+)
 #------------------------------------------------------------------------------#
 #               Import packages from the python standard library               #
 #------------------------------------------------------------------------------#
 import argparse
+import os
 import re
 
 
@@ -53,11 +63,12 @@ class CommandLineArgs:
         """
         """
         parser.add_argument("-d", "--content_dir",
-            required = True,
+            required = False,
             default = None,
             type = str,
             help = "Specify a path to a directory containing directories " + \
-                "that each contain an \"index.html\" file.",
+                "that each contain an \"index.html\" file. Required " + \
+                "unless \"-batch/--batch\" is given.",
         )
 
 
@@ -81,6 +92,33 @@ class CommandLineArgs:
             help = "Ex: -test_data 125. Specify whether some random " + \
                 "test data should be generated.",
         )
+        parser.add_argument("-seed", "--seed",
+            required = False,
+            default = None,
+            type = str,
+            help = "Ex: -seed 42. Specify a seed that makes the generated " + \
+                "test data reproducible. The test data is generated by the " + \
+                "number of workers given by \"-jobs/--jobs\".",
+        )
+        parser.add_argument("-test_profile", "--test_profile",
+            required = False,
+            default = "basic",
+            type = str,
+            choices = list(PROFILES),
+            help = "Ex: -test_profile jupyter. Specify what the generated " + \
+                "test data should look like: \"basic\", \"jupyter\" " + \
+                "(exported jupyter notebooks), \"images\" (large embedded " + \
+                "images), \"nested\" (deeply nested elements), " + \
+                "\"malformed\" (malformed HTML) or \"latin1\" (non-UTF8 " + \
+                "character encoding).",
+        )
+        parser.add_argument("-test_size", "--test_size",
+            required = False,
+            default = "0",
+            type = str,
+            help = "Ex: -test_size 5000000. Specify the (approximate) " + \
+                "number of bytes of the body of each generated test document.",
+        )
 
         #### Options: How the ordering of the files in the grid should be
         parser.add_argument("-order_by", "--order_by",
@@ -93,6 +131,382 @@ class CommandLineArgs:
                 "ordered.",
         )
 
+        ### Options: Which directories should be searched for HTML files
+        parser.add_argument("-max_depth", "--max_depth",
+            required = False,
+            default = "1",
+            type = str,
+            help = "Ex: -max_depth 3. Specify how many levels of " + \
+                "directories below the content directory should be " + \
+                "searched for \"index.html\" files. A value of 0 " + \
+                "searches all levels.",
+        )
+        parser.add_argument("-include", "--include",
+            required = False,
+            default = None,
+            type = str,
+            action = "append",
+            help = "Ex: -include \"2020/*\". Only include the " + \
+                "\"index.html\" files of directories that match this " + \
+                "glob pattern. The pattern is matched against the path " + \
+                "of a directory (relative to the content directory) and " + \
+                "the name of the directory. Can be given multiple times.",
+        )
+        parser.add_argument("-exclude", "--exclude",
+            required = False,
+            default = None,
+            type = str,
+            action = "append",
+            help = "Ex: -exclude assets. Skip directories (and all of " + \
+                "their subdirectories) that match this glob pattern. Can " + \
+                "be given multiple times.",
+        )
+        parser.add_argument("-follow_symlinks", "--follow_symlinks",
+            required = False,
+            default = True,
+            type = str_to_bool,
+            help = "Ex: -follow_symlinks False. Specify whether symbolic " + \
+                "links to directories should be followed.",
+        )
+
+        ### Options: Parallel extraction of metadata from the HTML files
+        parser.add_argument("-jobs", "--jobs",
+            required = False,
+            default = "1",
+            type = str,
+            help = "Ex: -jobs 4. Specify the number of workers used to " + \
+                "read and parse the \"index.html\" files. A value of 0 " + \
+                "uses one worker per CPU.",
+        )
+        parser.add_argument("-executor", "--executor",
+            required = False,
+            default = "process",
+            type = str,
+            choices = ["process", "thread"],
+            help = "Ex: -executor thread. Specify whether the workers " + \
+                "(see \"-jobs/--jobs\") should be processes or threads.",
+        )
+        parser.add_argument("-async_io", "--async_io",
+            required = False,
+            default = False,
+            nargs = "?",
+            const = True,
+            type = str_to_bool,
+            help = "Ex: -async_io. Specify whether the directories should " + \
+                "be listed and the \"index.html\" files read concurrently " + \
+                "(by an asyncio event loop), while the files are parsed by " + \
+                "the workers. Useful when the content directory is placed " + \
+                "on a network filesystem (for example NFS).",
+        )
+        parser.add_argument("-io_concurrency", "--io_concurrency",
+            required = False,
+            default = "16",
+            type = str,
+            help = "Ex: -io_concurrency 64. The maximum number of " + \
+                "directories listed and files read at the same time (see " + \
+                "\"-async_io/--async_io\").",
+        )
+
+        ### Options: How the HTML files should be parsed
+        parser.add_argument("-parser", "--parser",
+            required = False,
+            default = "head",
+            type = str,
+            choices = ["head", "full"],
+            help = "Ex: -parser full. Specify whether only the head of " + \
+                "each \"index.html\" file should be read and parsed " + \
+                "(default) or the whole file. If no title is found in " + \
+                "the head of a file, then the whole file is parsed.",
+        )
+
+        ### Options: Caching of the metadata extracted from the HTML files
+        parser.add_argument("-cache", "--cache",
+            required = False,
+            default = True,
+            type = str_to_bool,
+            help = "Ex: -cache False. Specify whether the metadata " + \
+                "extracted from the \"index.html\" files should be " + \
+                "cached, such that only new or changed files are parsed " + \
+                "on the next run.",
+        )
+        parser.add_argument("-cache_dir", "--cache_dir",
+            required = False,
+            default = None,
+            type = str,
+            help = "Ex: -cache_dir ../.pysip_cache. Specify the directory " + \
+                "(relative to the current working directory) where " + \
+                "cached data is stored. Defaults to a directory in the " + \
+                "cache directory of the user (\"~/.cache/pysip\"). The " + \
+                "directory should not be placed inside the directory " + \
+                "that is served.",
+        )
+        parser.add_argument("-content_hash", "--content_hash",
+            required = False,
+            default = "none",
+            type = str,
+            choices = ["none"] + CONTENT_HASH_MODES,
+            help = "Ex: -content_hash file. Specify whether the content " + \
+                "of the \"index.html\" files should be hashed: either " + \
+                "only the head section (faster, but files with the same " + \
+                "head section are then considered identical) or the whole " + \
+                "file. The hash is used to recognize unchanged files in " + \
+                "the cache and copies of the same file. Uses the " + \
+                "\"xxhash\" package if it is installed.",
+        )
+        parser.add_argument("-dedup", "--dedup",
+            required = False,
+            default = True,
+            type = str_to_bool,
+            help = "Ex: -dedup False. Specify whether copies of the same " + \
+                "file (with the same hash, see \"-content_hash/" + \
+                "--content_hash\") should be shown as a single item that " + \
+                "lists the locations of the copies.",
+        )
+        parser.add_argument("-rebuild", "--rebuild",
+            required = False,
+            default = False,
+            nargs = "?",
+            const = True,
+            type = str_to_bool,
+            help = "Ex: -rebuild. Specify whether the cache should be " + \
+                "ignored, i.e. all \"index.html\" files are parsed again " + \
+                "and the cache is rebuilt from scratch.",
+        )
+
+        ### Options: How the collected data should be written
+        parser.add_argument("-shard_size", "--shard_size",
+            required = False,
+            default = "0",
+            type = str,
+            help = "Ex: -shard_size 1000. Split the list of files into " + \
+                "shards with this number of entries. The shards are only " + \
+                "loaded by the static index page when the entries they " + \
+                "contain are about to be shown. A value of 0 writes all " + \
+                "entries to a single file.",
+        )
+
+        parser.add_argument("-compact", "--compact",
+            required = False,
+            default = False,
+            nargs = "?",
+            const = True,
+            type = str_to_bool,
+            help = "Ex: -compact. Specify whether the list of files " + \
+                "should be written in a compact format, i.e. without " + \
+                "indentation, without repeating the names of the fields " + \
+                "for each file and with a shared table of authors and " + \
+                "keywords.",
+        )
+        parser.add_argument("-stream", "--stream",
+            required = False,
+            default = False,
+            nargs = "?",
+            const = True,
+            type = str_to_bool,
+            help = "Ex: -stream. Specify whether the list of files should " + \
+                "be written while the files are collected, instead of " + \
+                "keeping all the collected data in memory. The files are " + \
+                "then ordered by an external merge sort, i.e. in runs " + \
+                "that are spilled to temporary files.",
+        )
+        parser.add_argument("-stream_buffer", "--stream_buffer",
+            required = False,
+            default = "10000",
+            type = str,
+            help = "Ex: -stream_buffer 50000. The number of files that are " + \
+                "kept in memory (and sorted) at a time when the list of " + \
+                "files is streamed.",
+        )
+        parser.add_argument("-precompress", "--precompress",
+            required = False,
+            default = "",
+            type = str,
+            help = "Ex: -precompress gz,br. Specify a comma-separated list " + \
+                "of formats (gz and/or br) the list of files should be " + \
+                "pre-compressed with. The compressed files are placed " + \
+                "next to the original files, such that a static file " + \
+                "server can serve them directly. Brotli (br) requires " + \
+                "the \"brotli\" package.",
+        )
+
+        parser.add_argument("-search_index", "--search_index",
+            required = False,
+            default = True,
+            type = str_to_bool,
+            help = "Ex: -search_index False. Specify whether a search " + \
+                "index of the titles, authors and keywords of the files " + \
+                "should be built, such that the files can be searched in " + \
+                "the static index page.",
+        )
+
+        parser.add_argument("-sort_orders", "--sort_orders",
+            required = False,
+            default = True,
+            type = str_to_bool,
+            help = "Ex: -sort_orders False. Specify whether all the orders " + \
+                "the files can be shown in (see \"-order_by/--order_by\") " + \
+                "should be precomputed, such that the order can be " + \
+                "changed in the static index page.",
+        )
+
+        parser.add_argument("-facets", "--facets",
+            required = False,
+            default = True,
+            type = str_to_bool,
+            help = "Ex: -facets False. Specify whether an index of the " + \
+                "keywords and authors of the files should be built, such " + \
+                "that the static index page can show only the files with " + \
+                "a certain keyword or author when it is clicked.",
+        )
+        parser.add_argument("-facet_shards", "--facet_shards",
+            required = False,
+            default = False,
+            nargs = "?",
+            const = True,
+            type = str_to_bool,
+            help = "Ex: -facet_shards. Specify whether the files of each " + \
+                "keyword and author should be written to a separate file " + \
+                "that is only loaded when the keyword or author is clicked.",
+        )
+
+        ### Options: How an existing static index page should be updated
+        parser.add_argument("-sync", "--sync",
+            required = False,
+            default = False,
+            nargs = "?",
+            const = True,
+            type = str_to_bool,
+            help = "Ex: -sync. Specify whether an existing \"staticfiles\" " + \
+                "directory should be updated in place (without asking): " + \
+                "only the static files that have changed are copied and " + \
+                "all files are replaced atomically, such that the static " + \
+                "index page can be served while it is being rebuilt.",
+        )
+
+        parser.add_argument("-force", "--force",
+            required = False,
+            default = False,
+            nargs = "?",
+            const = True,
+            type = str_to_bool,
+            help = "Ex: -force. Specify whether existing output should be " + \
+                "overwritten without asking.",
+        )
+        parser.add_argument("-output_dir", "--output_dir",
+            required = False,
+            default = None,
+            type = str,
+            help = "Ex: -output_dir site. Specify a directory to publish " + \
+                "the static index page to (instead of the current working " + \
+                "directory). The static index page is built in a staging " + \
+                "directory next to it and is then published in a single " + \
+                "atomic step: the output directory is a symbolic link " + \
+                "that is switched over to the new build.",
+        )
+
+        ### Options: Generating several static index pages at once
+        parser.add_argument("-batch", "--batch",
+            required = False,
+            default = None,
+            type = str,
+            help = "Ex: -batch sites.json. Specify a .json file that lists " + \
+                "a number of static index pages to generate, each with its " + \
+                "own options (e.g. \"content_dir\", \"output_dir\", " + \
+                "\"color_palette\" and \"order_by\"). The options given " + \
+                "on the commandline apply to all of them.",
+        )
+        parser.add_argument("-batch_jobs", "--batch_jobs",
+            required = False,
+            default = "4",
+            type = str,
+            help = "Ex: -batch_jobs 8. Specify the number of static index " + \
+                "pages that are generated concurrently in batch mode.",
+        )
+
+        ### Options: Instrumentation of the generation of the static index page
+        parser.add_argument("-stats", "--stats",
+            required = False,
+            default = None,
+            type = str,
+            help = "Ex: -stats stats.json. Specify a file to write the " + \
+                "timings of the stages, the number of files and bytes read " + \
+                "and written, the metadata cache hits/misses and the " + \
+                "slowest files of each build to.",
+        )
+        parser.add_argument("-stats_format", "--stats_format",
+            required = False,
+            default = None,
+            type = str,
+            choices = ["json", "prometheus"],
+            help = "Ex: -stats_format prometheus. Specify the format of " + \
+                "the \"-stats/--stats\" file: .json data or a Prometheus " + \
+                "textfile. By default a Prometheus textfile is written if " + \
+                "the file name ends with \".prom\".",
+        )
+        parser.add_argument("-stats_slowest", "--stats_slowest",
+            required = False,
+            default = "10",
+            type = str,
+            help = "Ex: -stats_slowest 25. Specify the number of slowest " + \
+                "files to include in the \"-stats/--stats\" file.",
+        )
+
+        parser.add_argument("-profile", "--profile",
+            required = False,
+            default = None,
+            type = str,
+            choices = ["cprofile", "tracemalloc"],
+            help = "Ex: -profile cprofile. Specify whether the build " + \
+                "should be run under a profiler: \"cprofile\" (time) or " + \
+                "\"tracemalloc\" (memory allocations). The results are " + \
+                "attributed to the stages of the build.",
+        )
+        parser.add_argument("-profile_output", "--profile_output",
+            required = False,
+            default = "pysip-profile",
+            type = str,
+            help = "Ex: -profile_output profiles/build. Specify the path " + \
+                "(without extension) of the files the profile and the " + \
+                "report are written to.",
+        )
+        parser.add_argument("-profile_top", "--profile_top",
+            required = False,
+            default = "25",
+            type = str,
+            help = "Ex: -profile_top 50. Specify the number of functions " + \
+                "(or lines allocating memory) to include in the report of " + \
+                "each stage.",
+        )
+
+        ### Options: Keeping the static index page up-to-date
+        parser.add_argument("-watch", "--watch",
+            required = False,
+            default = False,
+            nargs = "?",
+            const = True,
+            type = str_to_bool,
+            help = "Ex: -watch. Specify whether the content directory " + \
+                "should be watched for changes after the static index " + \
+                "page has been generated. The list of files in the static " + \
+                "index page is then updated whenever an \"index.html\" " + \
+                "file is added, changed or deleted.",
+        )
+        parser.add_argument("-watch_interval", "--watch_interval",
+            required = False,
+            default = 1.0,
+            type = float,
+            help = "Ex: -watch_interval 2.5. Specify the time (in seconds) " + \
+                "between two checks of the content directory for changes.",
+        )
+        parser.add_argument("-watch_debounce", "--watch_debounce",
+            required = False,
+            default = 0.5,
+            type = float,
+            help = "Ex: -watch_debounce 1.0. Specify the time (in seconds) " + \
+                "the content directory needs to be left unchanged before " + \
+                "the list of files is updated.",
+        )
+
         ### Options: Pre-defined styling/color palette
         parser.add_argument("-color_palette", "--color_palette",
             required = False,
@@ -168,7 +582,11 @@ class CommandLineArgs:
         """
         """
         # if not os.path.exists(cwd):
-        pass
+        # The content directories are given by the batch file in batch mode
+        if args.content_dir is None and args.batch is None:
+            raise ValueError("-d/--content_dir. A content directory is " + \
+                "required (unless \"-batch/--batch\" is given)!",
+            )
 
 
     def check_optional_arguments(self, args):
@@ -182,6 +600,105 @@ class CommandLineArgs:
                 )
         else:
             args.test_data = int(args.test_data)
+        if not args.seed is None:
+            if not is_integer(args.seed):
+                raise ValueError(f"--seed {args.seed}. The provided " + \
+                    "value is not integer-valued!",
+                )
+            args.seed = int(args.seed)
+        if not is_integer(args.test_size) or int(args.test_size) < 0:
+            raise ValueError(f"--test_size {args.test_size}. The provided " + \
+                "value is not a non-negative integer!",
+            )
+        else:
+            args.test_size = int(args.test_size)
+        # Options: Which directories should be searched for HTML files
+        # - Check whether the input is actually a non-negative integer
+        if not is_integer(args.max_depth) or int(args.max_depth) < 0:
+            raise ValueError(f"--max_depth {args.max_depth}. The provided " + \
+                "value is not a non-negative integer!",
+            )
+        else:
+            args.max_depth = int(args.max_depth)
+        # Options: Parallel extraction of metadata from the HTML files
+        # - Check whether the input is actually a non-negative integer
+        if not is_integer(args.jobs) or int(args.jobs) < 0:
+            raise ValueError(f"--jobs {args.jobs}. The provided " + \
+                "value is not a non-negative integer!",
+            )
+        else:
+            args.jobs = int(args.jobs)
+            if args.jobs == 0:
+                args.jobs = os.cpu_count() or 1
+        # - Check whether the input is actually a positive integer
+        if not is_integer(args.io_concurrency) or int(args.io_concurrency) <= 0:
+            raise ValueError(f"--io_concurrency {args.io_concurrency}. The " + \
+                "provided value is not a positive integer!",
+            )
+        else:
+            args.io_concurrency = int(args.io_concurrency)
+        # Options: Caching of the extracted metadata
+        if args.content_hash == "none":
+            args.content_hash = None
+        # Options: How the collected data should be written
+        # - Check whether the input is actually a non-negative integer
+        if not is_integer(args.shard_size) or int(args.shard_size) < 0:
+            raise ValueError(f"--shard_size {args.shard_size}. The provided " + \
+                "value is not a non-negative integer!",
+            )
+        else:
+            args.shard_size = int(args.shard_size)
+        # - Check whether the input is actually a positive integer
+        if not is_integer(args.stream_buffer) or int(args.stream_buffer) <= 0:
+            raise ValueError(f"--stream_buffer {args.stream_buffer}. The " + \
+                "provided value is not a positive integer!",
+            )
+        else:
+            args.stream_buffer = int(args.stream_buffer)
+        # - Check whether the given pre-compression formats are supported
+        args.precompress = [
+            f.strip() for f in args.precompress.split(",") if f.strip()
+        ]
+        for f in args.precompress:
+            if not f in PRECOMPRESS_FORMATS:
+                raise ValueError(f"--precompress {f}. The provided " + \
+                    "format is not supported! Supported formats: " + \
+                    ", ".join(PRECOMPRESS_FORMATS),
+                )
+        # Options: Generating several static index pages at once
+        if not is_integer(args.batch_jobs) or int(args.batch_jobs) <= 0:
+            raise ValueError(f"--batch_jobs {args.batch_jobs}. The " + \
+                "provided value is not a positive integer!",
+            )
+        else:
+            args.batch_jobs = int(args.batch_jobs)
+        # Options: Instrumentation of the generation of the static index page
+        if args.stats_format is None:
+            args.stats_format = "prometheus" \
+                if not args.stats is None and args.stats.endswith(".prom") \
+                else "json"
+        if not is_integer(args.stats_slowest) or int(args.stats_slowest) < 0:
+            raise ValueError(f"--stats_slowest {args.stats_slowest}. The " + \
+                "provided value is not a non-negative integer!",
+            )
+        else:
+            args.stats_slowest = int(args.stats_slowest)
+        if not is_integer(args.profile_top) or int(args.profile_top) <= 0:
+            raise ValueError(f"--profile_top {args.profile_top}. The " + \
+                "provided value is not a positive integer!",
+            )
+        else:
+            args.profile_top = int(args.profile_top)
+        # Options: Keeping the static index page up-to-date
+        # - Check whether the given times are positive
+        if args.watch_interval <= 0:
+            raise ValueError(f"--watch_interval {args.watch_interval}. " + \
+                "The provided value is not positive!",
+            )
+        if args.watch_debounce < 0:
+            raise ValueError(f"--watch_debounce {args.watch_debounce}. " + \
+                "The provided value is negative!",
+            )
         # Options: Custom styling
         # - Check if the custom color options are valid.
         if not args.color1 is None:
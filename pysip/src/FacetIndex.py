@@ -0,0 +1,95 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+
+
+#------------------------------------------------------------------------------#
+class FacetIndex:
+    """
+    class: FacetIndex. This class aggregates the keywords and authors of the
+    files while the content directory is traversed. Each keyword and author
+    (a "facet value") is mapped to the files it occurs in, such that the
+    static index page can show only the files with a certain keyword or
+    author without going through all the files.
+    """
+
+    # The facets and the field of a file that each facet is taken from
+    FACETS = {
+        "keywords": "keywords",
+        "authors": "author",
+    }
+
+
+    def __init__(self):
+        """ Initialize class variables.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        # For each facet, the files (in the order they were added) that each
+        # facet value occurs in
+        self.values = {facet: {} for facet in self.FACETS}
+
+
+    def add(self, file, file_id = None):
+        """ Add a file to the index. Should be called once for every file as
+        soon as its metadata is available.
+
+        Args:
+            file (dict): The metadata of an "index.html" file.
+            file_id (int): The id of the file, if it is already known (i.e.
+                the files are added in their final order). The file itself is
+                then not kept in memory. Either all or none of the files
+                should be added with an id.
+
+        Returns:
+            None
+        """
+        entry = file if file_id is None else file_id
+        for facet, field in self.FACETS.items():
+            values = file[field]
+            if isinstance(values, str):
+                values = [values] if values else []
+            # Each file is only counted once per value
+            for value in set(values):
+                if value:
+                    self.values[facet].setdefault(value, []).append(entry)
+
+
+    def finalize(self, files = None):
+        """ Replace the files that each facet value occurs in by their ids,
+        i.e. their position in the final (ordered) list of files.
+
+        Args:
+            files (list(dict)): A list of dictionaries. The list has been
+                ordered, i.e. the position of a file in the list is its id.
+                None if the files were added with their ids.
+
+        Returns:
+            facets (dict): For each facet, a dictionary that maps each facet
+                value to the "count" and the sorted "ids" of the files it
+                occurs in. The facet values are sorted by the number of files
+                they occur in (most frequent first) and then by name.
+        """
+        ids = None if files is None else \
+            {id(file): i for i, file in enumerate(files)}
+        facets = {}
+        for facet, values in self.values.items():
+            facets[facet] = {}
+            for value in sorted(values,
+                key = lambda value: (-len(values[value]), value)):
+                facets[facet][value] = {
+                    "count": len(values[value]),
+                    "ids": sorted(
+                        entry if ids is None else ids[id(entry)]
+                        for entry in values[value]
+                    ),
+                }
+        return facets
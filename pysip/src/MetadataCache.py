@@ -0,0 +1,234 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#                               Import local code                              #
+#------------------------------------------------------------------------------#
+from .output import open_atomic
+from .utils import (
+    print_verbose,
+)
+#------------------------------------------------------------------------------#
+#               Import packages from the python standard library               #
+#------------------------------------------------------------------------------#
+import json
+import os
+
+
+#------------------------------------------------------------------------------#
+class MetadataCache:
+    """
+    class: MetadataCache. A simple on-disk cache of the metadata extracted
+    from "index.html" files. An entry is only reused if the path, the time of
+    the last modification (in nanoseconds), the size and the inode of the file
+    are unchanged. If the content of the files is hashed, then an entry is
+    also reused if the hash of the content is unchanged (for example when a
+    file has been touched or exported again), and entries of other files with
+    the same content are reused as well (for example when a directory has
+    been renamed). Entries of files that were not seen during the latest run
+    (for example because the directory was deleted) are dropped when the cache
+    is saved.
+    """
+
+    # Bump this number whenever the layout of the cached data changes. Caches
+    # written with a different version are simply ignored
+    VERSION = 1
+
+
+    def __init__(self, path, verbose = False, rebuild = False):
+        """ Initialize class variables and load the cache from disk.
+
+        Args:
+            path (str): The path to the file the cache is stored in. If None,
+                then the cache is only kept in memory.
+            verbose (bool): Whether information about the cache should be
+                shown.
+            rebuild (bool): If True, the existing cache is ignored, i.e. all
+                files are parsed again and the cache is rebuilt from scratch.
+
+        Returns:
+            None
+        """
+        self.path = path
+        self.verbose = verbose
+        self.hits = 0
+        self.misses = 0
+        # The entries read from disk and the entries that were used or
+        # added during the current run
+        self.entries = {} if rebuild else self.load()
+        self.seen = {}
+        # The cached metadata keyed by the hash of the content of the files
+        # (built when it is first needed)
+        self.hashes = None
+
+
+    def load(self):
+        """ Load the cache from disk.
+
+        Args:
+            None
+
+        Returns:
+            entries (dict): The cached entries keyed by absolute file path.
+        """
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path) as file:
+                cache = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"ERROR: Could not read the cache file {self.path}!")
+            print("ERROR: ", e)
+            return {}
+        if not isinstance(cache, dict) or \
+            cache.get("version") != self.VERSION:
+            print_verbose(
+                f"INFO : Ignoring outdated cache file {self.path}...",
+                self.verbose,
+            )
+            return {}
+        return cache.get("entries", {})
+
+
+    @staticmethod
+    def key(st):
+        """ Construct the part of a cache entry that is used to decide
+        whether the entry is still valid.
+
+        Args:
+            st (os.stat_result): The result of calling "os.stat" on a file.
+
+        Returns:
+            (list): The time of the last modification (in nanoseconds), the
+                size and the inode of the file.
+        """
+        return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+    def get(self, path, st, content_hash = None):
+        """ Look up the cached metadata of a file.
+
+        Args:
+            path (str): The absolute path to a file.
+            st (os.stat_result): The result of calling "os.stat" on the file.
+            content_hash (str): The hash of the content of the file (see the
+                "hash_file" function in the "content_hash" module) or None.
+
+        Returns:
+            data (dict): The cached metadata or None if the file is not in
+                the cache or has changed.
+        """
+        entry = self.entries.get(path)
+        # Entries of copies of other files only hold a hash (see "put_hash")
+        if entry is not None and "data" in entry and \
+            (entry["key"] == self.key(st) or \
+            (not content_hash is None and \
+                entry.get("hash") == content_hash)):
+            self.hits += 1
+            self.seen[path] = entry
+            return entry["data"]
+        if not content_hash is None:
+            if self.hashes is None:
+                self.hashes = {
+                    e["hash"]: e["data"] for e in self.entries.values()
+                    if "hash" in e and "data" in e
+                }
+            if content_hash in self.hashes:
+                self.hits += 1
+                return self.hashes[content_hash]
+        self.misses += 1
+        return None
+
+
+    def get_hash(self, path, st):
+        """ Look up the cached hash of the content of a file, such that an
+        unchanged file does not need to be hashed again.
+
+        Args:
+            path (str): The absolute path to a file.
+            st (os.stat_result): The result of calling "os.stat" on the file.
+
+        Returns:
+            (str): The cached hash or None if the file is not in the cache,
+                has changed or has not been hashed.
+        """
+        entry = self.entries.get(path)
+        if entry is not None and entry["key"] == self.key(st):
+            return entry.get("hash")
+        return None
+
+
+    def put(self, path, st, data, content_hash = None):
+        """ Add the metadata of a file to the cache.
+
+        Args:
+            path (str): The absolute path to a file.
+            st (os.stat_result): The result of calling "os.stat" on the file.
+            data (dict): The metadata extracted from the file.
+            content_hash (str): The hash of the content of the file or None.
+
+        Returns:
+            None
+        """
+        self.seen[path] = {"key": self.key(st), "data": data}
+        if not content_hash is None:
+            self.seen[path]["hash"] = content_hash
+
+
+    def put_hash(self, path, st, content_hash):
+        """ Add only the hash of the content of a file to the cache, for
+        example for a copy of another file that is not parsed.
+
+        Args:
+            path (str): The absolute path to a file.
+            st (os.stat_result): The result of calling "os.stat" on the file.
+            content_hash (str): The hash of the content of the file.
+
+        Returns:
+            None
+        """
+        self.seen[path] = {"key": self.key(st), "hash": content_hash}
+
+
+    def save(self):
+        """ Write all entries that were used or added during the current run
+        to disk. The file is replaced atomically such that a concurrent run
+        never reads a partially written cache. Afterwards the cache is ready
+        to be used for another run in the same process.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if not self.path is None:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok = True)
+                with open_atomic(self.path) as file:
+                    json.dump(
+                        {"version": self.VERSION, "entries": self.seen},
+                        file,
+                        separators = (",", ":"),
+                    )
+            except OSError as e:
+                print(f"ERROR: Could not write the cache file {self.path}!")
+                print("ERROR: ", e)
+        # The entries of files that were not seen during the current run
+        dropped = sum(1 for path in self.entries if not path in self.seen)
+        print_verbose(
+            f"INFO : Metadata cache: {self.hits} hit(s), " + \
+            f"{self.misses} miss(es), " + \
+            f"{dropped} stale entry(ies) dropped...",
+            self.verbose,
+        )
+        self.entries = self.seen
+        self.seen = {}
+        self.hashes = None
+        self.hits = 0
+        self.misses = 0
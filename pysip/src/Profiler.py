@@ -0,0 +1,194 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#                               Import local code                              #
+#------------------------------------------------------------------------------#
+from .output import write_atomic
+from .utils import (
+    print_verbose,
+)
+#------------------------------------------------------------------------------#
+#               Import packages from the python standard library               #
+#------------------------------------------------------------------------------#
+from io import StringIO
+import cProfile
+import pstats
+import tracemalloc
+
+
+#------------------------------------------------------------------------------#
+class Profiler:
+    """
+    class: Profiler. This class runs the generation of a static index page
+    under a profiler, either "cprofile" (where is the time spent) or
+    "tracemalloc" (where is the memory allocated). The results are attributed
+    to the stages of the build (see the "stage" method of the "Stats" class):
+    the profiler is told whenever a stage is entered or exited.
+
+    Only the main process is profiled, i.e. the work done by worker processes
+    (see the "-jobs/--jobs" commandline argument) is not included.
+    """
+
+    # The name used for everything that happens outside of the stages
+    OTHER = "(other)"
+
+
+    def __init__(self, mode, output, top = 25, verbose = False):
+        """ Initialize class variables.
+
+        Args:
+            mode (str): Either "cprofile" or "tracemalloc".
+            output (str): The path (without extension) of the files to write
+                the results to.
+            top (int): The number of functions (or lines allocating memory)
+                to include in the report of each stage.
+            verbose (bool): Whether information should be shown.
+
+        Returns:
+            None
+        """
+        self.mode = mode
+        self.output = output
+        self.top = top
+        self.verbose = verbose
+        # The stages that are currently entered (innermost last)
+        self.stack = [self.OTHER]
+        # cprofile: a profile for each stage
+        self.profiles = {}
+        # tracemalloc: the snapshot taken when each stage was entered and the
+        # results of each stage (the peak memory usage and the differences
+        # between the snapshots taken when the stage was entered and exited)
+        self.snapshots = {}
+        self.allocations = {}
+
+
+    def start(self):
+        """ Start profiling.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if self.mode == "cprofile":
+            self.profiles[self.OTHER] = cProfile.Profile()
+            self.profiles[self.OTHER].enable()
+        else:
+            tracemalloc.start()
+
+
+    def take_snapshot(self):
+        """ Take a snapshot of the memory allocated so far, leaving out the
+        memory allocated by tracemalloc itself.
+
+        Args:
+            None
+
+        Returns:
+            (tracemalloc.Snapshot): The snapshot.
+        """
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+
+
+    def enter(self, stage):
+        """ Attribute everything from now on to a certain stage.
+
+        Args:
+            stage (str): The name of the stage.
+
+        Returns:
+            None
+        """
+        if self.mode == "cprofile":
+            self.profiles[self.stack[-1]].disable()
+            self.profiles.setdefault(stage, cProfile.Profile()).enable()
+        else:
+            self.snapshots[stage] = self.take_snapshot()
+            tracemalloc.reset_peak()
+        self.stack.append(stage)
+
+
+    def exit(self, stage):
+        """ Stop attributing everything to a certain stage.
+
+        Args:
+            stage (str): The name of the stage.
+
+        Returns:
+            None
+        """
+        self.stack.pop()
+        if self.mode == "cprofile":
+            self.profiles[stage].disable()
+            self.profiles[self.stack[-1]].enable()
+        else:
+            peak = tracemalloc.get_traced_memory()[1]
+            differences = self.take_snapshot().compare_to(
+                self.snapshots.pop(stage), "lineno",
+            )
+            # A stage may be entered more than once (for example in watch
+            # mode). Only the last time is kept
+            self.allocations[stage] = (peak, differences[:self.top])
+
+
+    def stop(self):
+        """ Stop profiling and write the results to files.
+
+        Args:
+            None
+
+        Returns:
+            written (list(str)): The paths of the files that were written.
+        """
+        report = StringIO()
+        report.write("# Profile of the main process. The work done by " + \
+            "worker processes (-jobs/--jobs) is not included.\n")
+        if self.mode == "cprofile":
+            self.profiles[self.stack[-1]].disable()
+            # All stages together...
+            path = self.output + ".prof"
+            stats = None
+            for profile in self.profiles.values():
+                if stats is None:
+                    stats = pstats.Stats(profile, stream = report)
+                else:
+                    stats.add(profile)
+            stats.dump_stats(path)
+            # ... and each stage on its own
+            for stage, profile in self.profiles.items():
+                report.write(f"\n## Stage: {stage}\n")
+                pstats.Stats(profile, stream = report) \
+                    .sort_stats("cumulative").print_stats(self.top)
+        else:
+            path = self.output + ".tracemalloc"
+            snapshot = self.take_snapshot()
+            snapshot.dump(path)
+            tracemalloc.stop()
+            for stage, (peak, differences) in self.allocations.items():
+                report.write(f"\n## Stage: {stage} " + \
+                    f"(peak: {peak / 1024:.1f} KiB, " + \
+                    "net: " + \
+                    f"{sum(d.size_diff for d in differences) / 1024:+.1f} " + \
+                    f"KiB in the top {self.top} lines)\n",
+                )
+                for difference in differences:
+                    report.write(str(difference) + "\n")
+            report.write("\n## Memory allocated at the end of the build\n")
+            for statistic in snapshot.statistics("lineno")[:self.top]:
+                report.write(str(statistic) + "\n")
+        report_path = self.output + ".txt"
+        write_atomic(report_path, report.getvalue())
+        print_verbose(
+            f"INFO : Wrote the {self.mode} profile to {path} and a " + \
+            f"report to {report_path}",
+            self.verbose,
+        )
+        return [path, report_path]
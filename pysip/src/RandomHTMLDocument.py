@@ -13,13 +13,393 @@ from .utils import (
 #------------------------------------------------------------------------------#
 #               Import packages from the python standard library               #
 #------------------------------------------------------------------------------#
+from html import escape
+import base64
 import random
 import os
+
+
 #------------------------------------------------------------------------------#
-#                           Import third party packages                        #
+#                           Global variables & methods                         #
 #------------------------------------------------------------------------------#
-from lxml import etree  # pip install lxml
-from faker import Faker # pip install faker
+# The third party packages (faker and lxml) are only imported when documents
+# are actually generated, as importing them (faker in particular) is slow and
+# this module is imported on every run of pysip
+
+# The number of documents that are handed to a worker at a time
+CHUNK_SIZE = 256
+
+# Creating a Faker instance is slow, so each process creates it only once
+# (per locale)
+_FAKERS = {}
+
+# The depth of each block of nested elements generated by the "nested"
+# profile. The HTML parser of libxml2 (used by lxml) refuses to go deeper than
+# 256 levels by default
+NESTING_DEPTH = 200
+
+# The (maximum) size of the stylesheet embedded in the head of documents
+# generated by the "jupyter" profile. The documents exported by jupyter embed
+# a stylesheet of roughly this size
+JUPYTER_STYLE_SIZE = 250000
+
+# The header of a PNG image (the rest of the embedded images is random data)
+PNG_HEADER = b"\x89PNG\r\n\x1a\n"
+
+
+#------------------------------------------------------------------------------#
+def get_faker(locale = None):
+    """ Get the Faker instance of the current process.
+
+    Args:
+        locale (str): The locale of the Faker instance. If None, then the
+            default locale is used.
+
+    Returns:
+        (Faker): The Faker instance.
+    """
+    if not locale in _FAKERS:
+        from faker import Faker # pip install faker
+        _FAKERS[locale] = Faker(locale)
+    return _FAKERS[locale]
+
+
+def generate_head(faker, rng, n_keywords = None, charset = None):
+    """ Generate the head of a random HTML document.
+
+    Args:
+        faker (Faker): The Faker instance used to generate text.
+        rng (random.Random): The random number generator used to pick the
+            number of keywords and the length of the description.
+        n_keywords (int): The number of keywords of the document. If None,
+            then a random number of keywords (0-6) is used.
+        charset (str): If not None, then the head declares that the document
+            is encoded with this character encoding.
+
+    Returns:
+        head (lxml.etree._Element): The head of the document.
+    """
+    from lxml import etree  # pip install lxml
+    head = etree.Element("head")
+    # Declare the character encoding of the document
+    if not charset is None:
+        head.append(etree.Element("meta", charset = charset))
+    # Set the document title
+    title = etree.Element("title")
+    title.text = faker.sentence()
+    head.append(title) # Add the title to the head of the document
+    # Set document keywords
+    if n_keywords is None:
+        n_keywords = rng.randint(0, 6)
+    keywords = ", ".join([word for word in faker.words(n_keywords)])
+    keywords = etree.Element(
+        "meta",
+        name = "keywords",
+        content = keywords,
+    )
+    head.append(keywords) # Add the keywords to the head of the document
+    # Set document description
+    description = faker.paragraph(rng.randint(0, 10))
+    description = etree.Element(
+        "meta",
+        name = "description",
+        content = description,
+    )
+    head.append(description) # Add the description to the head of the document
+    # Set document author
+    author = faker.name()
+    author = etree.Element(
+        "meta",
+        name = "author",
+        content = author,
+    )
+    head.append(author) # Add the author to the head of the document
+    return head
+
+
+def generate_base64_image(rng, size):
+    """ Generate a (random) PNG image as a base64 encoded data URI.
+
+    Args:
+        rng (random.Random): The random number generator.
+        size (int): The (approximate) size of the data URI in bytes.
+
+    Returns:
+        (str): The data URI.
+    """
+    data = PNG_HEADER + rng.randbytes(max(0, size * 3 // 4 - len(PNG_HEADER)))
+    return "data:image/png;base64," + base64.b64encode(data).decode("ascii")
+
+
+def generate_body_basic(faker, rng, title, body_size):
+    """ Generate the body of a document that contains a heading and a number
+    of paragraphs of text.
+
+    Args:
+        faker (Faker): The Faker instance used to generate text.
+        rng (random.Random): The random number generator.
+        title (str): The title of the document.
+        body_size (int): The (approximate) number of bytes of the body.
+
+    Returns:
+        (list(str)): The parts of the body.
+    """
+    parts = ["<center><h1>" + escape(title) + "</h1></center>\n"]
+    # Pad the body of the document with text
+    if body_size > 0:
+        paragraph = "<p>" + escape(faker.paragraph(10)) + "</p>\n"
+        parts += [paragraph] * -(-body_size // len(paragraph))
+    return parts
+
+
+def generate_body_jupyter(faker, rng, title, body_size):
+    """ Generate the body of a document that looks like a jupyter notebook
+    exported to HTML, i.e. a sequence of code cells with highlighted source
+    code and outputs. Some of the outputs are (large) embedded images.
+
+    Args:
+        faker (Faker): The Faker instance used to generate text.
+        rng (random.Random): The random number generator.
+        title (str): The title of the document.
+        body_size (int): The (approximate) number of bytes of the body.
+
+    Returns:
+        (list(str)): The parts of the body.
+    """
+    parts = [
+        "<div tabindex=\"-1\" id=\"notebook\" class=\"border-box-sizing\">\n" + \
+        "<div class=\"container\" id=\"notebook-container\">\n" + \
+        "<div class=\"cell border-box-sizing text_cell rendered\">" + \
+        "<div class=\"inner_cell\"><div class=\"text_cell_render " + \
+        "border-box-sizing rendered_html\">\n<h1>" + escape(title) + \
+        "</h1>\n</div></div></div>\n"
+    ]
+    size = len(parts[0]); cell = 1
+    while size < body_size:
+        words = faker.words(rng.randint(2, 8))
+        source = "\n".join(
+            "<span class=\"n\">" + escape(word) + "</span> " + \
+            "<span class=\"o\">=</span> " + \
+            "<span class=\"mi\">" + str(rng.randint(0, 1000)) + "</span>"
+            for word in words
+        )
+        # The size of an embedded image is limited to what is left of the
+        # size of the body (like the "images" profile does)
+        if rng.random() < 0.2:
+            output = "<div class=\"output_png output_subarea\"><img src=\"" + \
+                generate_base64_image(rng,
+                    min(rng.randint(20000, 200000), body_size - size),
+                ) + "\"></div>"
+        else:
+            output = "<div class=\"output_text output_subarea\"><pre>" + \
+                escape(faker.paragraph(rng.randint(1, 5))) + "</pre></div>"
+        part = \
+            "<div class=\"cell border-box-sizing code_cell rendered\">\n" + \
+            "<div class=\"input\">\n" + \
+            f"<div class=\"prompt input_prompt\">In&nbsp;[{cell}]:</div>\n" + \
+            "<div class=\"inner_cell\"><div class=\"input_area\">" + \
+            "<div class=\" highlight hl-ipython3\"><pre>" + source + \
+            "</pre></div></div></div>\n</div>\n" + \
+            "<div class=\"output_wrapper\"><div class=\"output\">" + \
+            "<div class=\"output_area\">" + \
+            f"<div class=\"prompt output_prompt\">Out[{cell}]:</div>" + \
+            output + "</div></div></div>\n</div>\n"
+        parts.append(part)
+        size += len(part); cell += 1
+    parts.append("</div>\n</div>\n")
+    return parts
+
+
+def generate_body_images(faker, rng, title, body_size):
+    """ Generate the body of a document that mostly consists of large
+    embedded (base64 encoded) images.
+
+    Args:
+        faker (Faker): The Faker instance used to generate text.
+        rng (random.Random): The random number generator.
+        title (str): The title of the document.
+        body_size (int): The (approximate) number of bytes of the body.
+
+    Returns:
+        (list(str)): The parts of the body.
+    """
+    parts = ["<center><h1>" + escape(title) + "</h1></center>\n"]
+    size = len(parts[0])
+    while size < body_size:
+        image = generate_base64_image(rng,
+            min(rng.randint(50000, 500000), body_size - size),
+        )
+        part = "<figure><img src=\"" + image + "\"><figcaption>" + \
+            escape(faker.sentence()) + "</figcaption></figure>\n"
+        parts.append(part)
+        size += len(part)
+    return parts
+
+
+def generate_body_nested(faker, rng, title, body_size):
+    """ Generate the body of a document that consists of deeply nested
+    elements.
+
+    Args:
+        faker (Faker): The Faker instance used to generate text.
+        rng (random.Random): The random number generator.
+        title (str): The title of the document.
+        body_size (int): The (approximate) number of bytes of the body.
+
+    Returns:
+        (list(str)): The parts of the body.
+    """
+    parts = ["<center><h1>" + escape(title) + "</h1></center>\n"]
+    size = len(parts[0])
+    sentence = escape(faker.sentence())
+    while size < body_size:
+        tags = [rng.choice(["div", "section", "span", "ul", "li"])
+            for _ in range(NESTING_DEPTH)]
+        part = "".join(f"<{tag} class=\"level{level}\">"
+                for level, tag in enumerate(tags)) + \
+            sentence + \
+            "".join(f"</{tag}>" for tag in reversed(tags)) + "\n"
+        parts.append(part)
+        size += len(part)
+    return parts
+
+
+def generate_body_malformed(faker, rng, title, body_size):
+    """ Generate the body of a document with malformed HTML, such as missing
+    and misplaced end tags, unquoted attributes and unescaped characters.
+
+    Args:
+        faker (Faker): The Faker instance used to generate text.
+        rng (random.Random): The random number generator.
+        title (str): The title of the document.
+        body_size (int): The (approximate) number of bytes of the body.
+
+    Returns:
+        (list(str)): The parts of the body.
+    """
+    parts = ["<center><h1>" + escape(title) + "</center>\n"]
+    size = len(parts[0])
+    # Generating text is slow compared to putting the parts together, so the
+    # parts are made from a small number of sentences
+    sentences = [faker.sentence() for _ in range(16)]
+    while size < max(body_size, 1):
+        text = rng.choice(sentences)
+        part = rng.choice([
+            # Missing end tags
+            "<p>" + text + "\n",
+            "<div class=unquoted id=" + str(rng.randint(0, 1000)) + ">" + \
+                text + "\n",
+            # Misplaced end tags
+            "<b><i>" + text + "</b></i>\n",
+            "</span>" + text + "</p></div>\n",
+            # Unescaped characters
+            "<p>" + text + " & 1 < 2 > 0</p>\n",
+            # Unterminated attribute values and stray quotes
+            "<a href=\"#" + text.split(" ")[0] + ">" + text + "</a>\"\n",
+        ])
+        parts.append(part)
+        size += len(part)
+    return parts
+
+
+# The profiles that the random HTML documents can be generated with. Each
+# profile is given by a function that generates the body of a document, the
+# locale of the Faker instance and the character encoding of the document
+PROFILES = {
+    "basic": (generate_body_basic, None, "utf-8"),
+    "jupyter": (generate_body_jupyter, None, "utf-8"),
+    "images": (generate_body_images, None, "utf-8"),
+    "nested": (generate_body_nested, None, "utf-8"),
+    "malformed": (generate_body_malformed, None, "utf-8"),
+    "latin1": (generate_body_basic, "de_DE", "iso-8859-1"),
+}
+
+
+def generate_document(faker, rng, n_keywords = None, body_size = 0,
+    profile = "basic"):
+    """ Generate a random HTML document.
+
+    Args:
+        faker (Faker): The Faker instance used to generate text.
+        rng (random.Random): The random number generator used to pick the
+            number of keywords and the length of the description.
+        n_keywords (int): The number of keywords of the document. If None,
+            then a random number of keywords (0-6) is used.
+        body_size (int): The (approximate) number of bytes of the body of the
+            document.
+        profile (str): The profile that the document is generated with (see
+            the "PROFILES" variable).
+
+    Returns:
+        (bytes): The HTML document.
+    """
+    from lxml import etree  # pip install lxml
+    generate_body, _, encoding = PROFILES[profile]
+    head = generate_head(faker, rng, n_keywords,
+        charset = None if encoding == "utf-8" else encoding,
+    )
+    title = head.find("title").text
+    # Embed a large stylesheet in the head, like jupyter does
+    if profile == "jupyter":
+        rule = ".jp-Cell-{} {{ margin: 0; padding: 4px; color: #{:06x}; }}\n"
+        rules = []; size = 0
+        while size < min(JUPYTER_STYLE_SIZE, body_size // 4):
+            rules.append(rule.format(len(rules), rng.randint(0, 0xffffff)))
+            size += len(rules[-1])
+        style = etree.Element("style", type = "text/css")
+        style.text = "".join(rules)
+        head.insert(2, style)
+    head = etree.tostring(head, encoding = "unicode", method = "html")
+    body = generate_body(faker, rng, title, body_size)
+    # Malformed documents also lack the end tags of the head, body and
+    # document itself
+    if profile == "malformed":
+        document = ["<html>\n", head.replace("</head>", ""), "\n<body>\n"] + \
+            body
+    else:
+        document = ["<html>\n", head, "\n<body>\n"] + body + \
+            ["</body>\n</html>\n"]
+    # Characters that can not be represented in the character encoding of the
+    # document are replaced by character references
+    return "".join(document).encode(encoding, "xmlcharrefreplace")
+
+
+def write_documents(content_dir, indices, seed = None, n_keywords = None,
+    body_size = 0, profile = "basic"):
+    """ Generate a number of random HTML documents and write each of them to
+    a file as soon as it has been generated. The function is defined at the
+    module level, such that it can be run by a pool of worker processes.
+
+    Args:
+        content_dir (str): The directory to place the documents in.
+        indices (range): The indices of the documents. The document with
+            index "i" is written to "content_dir/staticpage{i}/index.html".
+        seed (int): If not None, then the random number generators are seeded
+            with "seed + i" before document "i" is generated. A document thus
+            only depends on the seed and its index, and not on how the
+            documents are split across the workers.
+        n_keywords (int): The number of keywords of each document.
+        body_size (int): The (approximate) number of bytes of the body of
+            each document.
+        profile (str): The profile that the documents are generated with.
+
+    Returns:
+        (int): The number of documents that were written.
+    """
+    faker = get_faker(PROFILES[profile][1])
+    rng = random.Random()
+    for i in indices:
+        if not seed is None:
+            faker.seed_instance(seed + i)
+            rng.seed(seed + i)
+        doc_string = generate_document(faker, rng, n_keywords, body_size,
+            profile,
+        )
+        dir_path = os.path.join(content_dir, "staticpage" + str(i))
+        os.makedirs(dir_path, exist_ok = True)
+        with open(os.path.join(dir_path, "index.html"), "wb") as file:
+            file.write(doc_string)
+    return len(indices)
 
 
 #------------------------------------------------------------------------------#
@@ -32,83 +412,53 @@ class RandomHTMLDocument:
     """
 
 
-    def __init__(self, args, n = 1):
-        """ Initialize class variables and call the main function 
-        "generate_document" to generate "n" random HTML documents.
+    def __init__(self, args, n = 1, n_keywords = None, body_size = 0,
+        seed = None, jobs = 1, profile = "basic"):
+        """ Initialize class variables. The documents are not generated
+        until the "save" method is called, such that each document can be
+        written to a file as soon as it has been generated (instead of
+        keeping all of them in memory).
 
         Args:
             n (int): The number of random HTML documents to generate.
+            n_keywords (int): The number of keywords of each document. If
+                None, then a random number of keywords (0-6) is used.
+            body_size (int): The (approximate) number of bytes of the body
+                of each document.
+            seed (int): The seed used to make the generated documents
+                reproducible. If None, then the documents are random.
+            jobs (int): The number of worker processes used to generate the
+                documents.
+            profile (str): The profile that the documents are generated with.
+                Either "basic", "jupyter" (exported jupyter notebooks),
+                "images" (large embedded images), "nested" (deeply nested
+                elements), "malformed" (malformed HTML) or "latin1" (non-UTF8
+                character encoding).
         
         Returns:
             None
         """
         self.args = args
         self.n = n
-        # The variable that holds a list of string representations of
-        # randomly generated HTML documents
-        self.doc_strings = []
-        print_verbose(
-            "INFO : Generating random HTML documents...",
-            self.args.verbose,
-        )
-        # Generate a number of random HTML documents
-        for i in range(self.n):
-            self.doc_strings.append(self.generate_document())
+        self.n_keywords = n_keywords
+        self.body_size = body_size
+        self.seed = seed
+        self.jobs = jobs
+        self.profile = profile
 
 
     def generate_document(self):
         """ Generate a random HTML document.
         """
-        faker = Faker()
-        # Start creating a HTML document...
-        html = etree.Element("html")
-        head = etree.Element("head")
-        # Set the document title
-        title = etree.Element("title")
-        title.text = faker.sentence()
-        head.append(title) # Add the title to the head of the document
-        # Set document keywords
-        keywords = ", ".join([word for word in faker.words(random.randint(0, 6))])
-        keywords = etree.Element(
-            "meta",
-            name = "keywords",
-            content = keywords,
-        )
-        head.append(keywords) # Add the keywords to the head of the document
-        # Set document description
-        description = faker.paragraph(random.randint(0, 10))
-        description = etree.Element(
-            "meta",
-            name = "description",
-            content = description,
-        )
-        head.append(description) # Add the description to the head of the document
-        # Set document author
-        author = faker.name()
-        author = etree.Element(
-            "meta",
-            name = "author",
-            content = author,
+        return generate_document(
+            get_faker(PROFILES[self.profile][1]), random, self.n_keywords,
+            self.body_size, self.profile,
         )
-        head.append(author) # Add the author to the head of the document
-        # Append the head to the html document
-        html.append(head)
-        # Add some content to the body of the document
-        body = etree.Element("body")
-        center = etree.Element("center")
-        h1 = etree.Element("h1")
-        h1.text = title.text
-        center.append(h1)
-        body.append(center)
-        # Append the body of the document to the HTML document
-        html.append(body)
-        # return a string representation of the HTML document
-        return etree.tostring(html, pretty_print = True)
 
 
     def save(self, content_dir):
-        """ Save the HTML documents py place them in the given "content_dir"
-        directory.
+        """ Generate the HTML documents and place them in the given
+        "content_dir" directory.
 
         Args:
             content_dir (str) : The relative path to a directory that contains
@@ -118,13 +468,26 @@ class RandomHTMLDocument:
             None
         """
         print_verbose(
-            "INFO : Writing random HTML documents to files...",
-            self.args.verbose,
+            "INFO : Generating random HTML documents and writing them to " + \
+            "files...", self.args.verbose,
         )
-        for i in range(self.n):
-            dir_path = content_dir + "/" + "staticpage" + str(i)
-            if not os.path.exists(dir_path):
-                os.makedirs(dir_path)
-            index_file = os.path.join(dir_path, "index.html") 
-            with open(index_file, "w") as file:
-                file.write(self.doc_strings[i].decode("utf-8"))
+        chunks = [
+            range(start, min(start + CHUNK_SIZE, self.n))
+            for start in range(0, self.n, CHUNK_SIZE)
+        ]
+        if self.jobs <= 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                write_documents(content_dir, chunk,
+                    self.seed, self.n_keywords, self.body_size, self.profile,
+                )
+            return
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers = self.jobs) as executor:
+            futures = [
+                executor.submit(write_documents, content_dir, chunk,
+                    self.seed, self.n_keywords, self.body_size, self.profile,
+                )
+                for chunk in chunks
+            ]
+            for future in futures:
+                future.result()
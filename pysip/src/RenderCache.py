@@ -0,0 +1,173 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#                               Import local code                              #
+#------------------------------------------------------------------------------#
+from .output import write_atomic
+#------------------------------------------------------------------------------#
+#               Import packages from the python standard library               #
+#------------------------------------------------------------------------------#
+import hashlib
+import json
+import os
+
+
+#------------------------------------------------------------------------------#
+class RenderCache:
+    """
+    class: RenderCache. A simple on-disk cache that remembers which inputs
+    (the templates and the values they were rendered with, e.g. the colors of
+    a color palette) each rendered file was produced from. A template does not
+    need to be rendered again if the inputs are unchanged and the rendered
+    file has not been modified since.
+
+    The rendered files are identified by their paths relative to the output
+    directory, as the static index page may be built in a new (staging)
+    directory every time (see the "-output_dir/--output_dir" argument).
+    Entries of files that were not rendered during the latest run are dropped
+    when the cache is saved.
+    """
+
+    # Bump this number whenever the layout of the cached data changes. Caches
+    # written with a different version are simply ignored
+    VERSION = 2
+
+
+    def __init__(self, path, rebuild = False):
+        """ Initialize class variables and load the cache from disk.
+
+        Args:
+            path (str): The path to the file the cache is stored in.
+            rebuild (bool): If True, the existing cache is ignored.
+
+        Returns:
+            None
+        """
+        self.path = path
+        # The entries read from disk and the entries that were used or
+        # added during the current run
+        self.entries = {} if rebuild else self.load()
+        self.seen = {}
+
+
+    def load(self):
+        """ Load the cache from disk.
+
+        Args:
+            None
+
+        Returns:
+            entries (dict): The cached entries keyed by the path of the
+                rendered file relative to the output directory.
+        """
+        try:
+            with open(self.path) as file:
+                cache = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(cache, dict) or \
+            cache.get("version") != self.VERSION:
+            return {}
+        return cache.get("entries", {})
+
+
+    @staticmethod
+    def key(source_hash, template_name, template_vars):
+        """ Construct the key that identifies the inputs of a rendered file.
+
+        Args:
+            source_hash (str): The hash of the templates.
+            template_name (str): The name of the template.
+            template_vars (dict): The values the template is rendered with.
+
+        Returns:
+            (str): The key.
+        """
+        h = hashlib.blake2b(digest_size = 16)
+        h.update(source_hash.encode("utf-8"))
+        h.update(template_name.encode("utf-8"))
+        h.update(json.dumps(template_vars, sort_keys = True).encode("utf-8"))
+        return h.hexdigest()
+
+
+    @staticmethod
+    def stat(path):
+        """ Get the time of the last modification (in nanoseconds) and the
+        size of a rendered file.
+
+        Args:
+            path (str): The path to the rendered file.
+
+        Returns:
+            (list): The time and the size or None if the file does not exist.
+        """
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return [st.st_mtime_ns, st.st_size]
+
+
+    def is_fresh(self, path, key, output_dir):
+        """ Check whether a rendered file is up-to-date.
+
+        Args:
+            path (str): The absolute path to the rendered file.
+            key (str): The key of the inputs the file would be rendered from.
+            output_dir (str): The absolute path to the output directory.
+
+        Returns:
+            (bool): True if the file was rendered from the same inputs and has
+                not been modified since.
+        """
+        name = os.path.relpath(path, output_dir)
+        entry = self.entries.get(name)
+        if not entry is None and entry["key"] == key and \
+            entry["output"] == self.stat(path):
+            self.seen[name] = entry
+            return True
+        return False
+
+
+    def put(self, path, key, output_dir):
+        """ Remember the inputs a file was rendered from. Should be called
+        after the file has been written.
+
+        Args:
+            path (str): The absolute path to the rendered file.
+            key (str): The key of the inputs the file was rendered from.
+            output_dir (str): The absolute path to the output directory.
+
+        Returns:
+            None
+        """
+        self.seen[os.path.relpath(path, output_dir)] = \
+            {"key": key, "output": self.stat(path)}
+
+
+    def save(self):
+        """ Write all entries that were used or added during the current run
+        to disk. Afterwards the cache is ready to be used for another run in
+        the same process.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok = True)
+            write_atomic(self.path, json.dumps(
+                {"version": self.VERSION, "entries": self.seen},
+                separators = (",", ":"),
+            ))
+        except OSError as e:
+            print(f"ERROR: Could not write the cache file {self.path}!")
+            print("ERROR: ", e)
+        self.entries = self.seen
+        self.seen = {}
@@ -0,0 +1,228 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#                               Import local code                              #
+#------------------------------------------------------------------------------#
+from .output import write_atomic
+#------------------------------------------------------------------------------#
+#               Import packages from the python standard library               #
+#------------------------------------------------------------------------------#
+from contextlib import contextmanager
+import heapq
+import json
+import time
+
+
+#------------------------------------------------------------------------------#
+class Stats:
+    """
+    class: Stats. This class collects structured information about a build of
+    the static index page: the wall time of each stage, a number of counters
+    (files found, files parsed, cache hits and misses, bytes read and
+    written, ...) and the files that took the longest to parse. The
+    information can be written out as .json data or as a Prometheus textfile
+    (to be picked up by the textfile collector of the Prometheus node
+    exporter).
+    """
+
+    # The descriptions of the counters (used in the Prometheus textfile)
+    COUNTERS = {
+        "files_found": "The number of \"index.html\" files found.",
+        "files_parsed": "The number of \"index.html\" files read and parsed.",
+        "cache_hits": "The number of files taken from the metadata cache.",
+        "cache_misses": "The number of files not found in the metadata cache.",
+        "files_hashed": "The number of \"index.html\" files hashed.",
+        "duplicates": \
+            "The number of files left out as copies of another file.",
+        "bytes_content": "The total size of the \"index.html\" files found.",
+        "assets_copied": "The number of static files copied (sync mode).",
+        "assets_unchanged": \
+            "The number of unchanged static files skipped (sync mode).",
+        "templates_rendered": "The number of templates rendered.",
+        "templates_cached": \
+            "The number of templates skipped as their output was up-to-date.",
+        "files_written": "The number of output files written.",
+        "bytes_written": "The total size of the output files written.",
+    }
+
+
+    def __init__(self, slowest = 10, profiler = None):
+        """ Initialize class variables.
+
+        Args:
+            slowest (int): The number of files to keep track of that took the
+                longest to parse.
+            profiler (Profiler): If not None, then the profiler is told when
+                a stage is entered and exited.
+
+        Returns:
+            None
+        """
+        self.slowest_n = slowest
+        self.profiler = profiler
+        # The wall time (in seconds) spent in each stage
+        self.stages = {}
+        self.counters = {name: 0 for name in self.COUNTERS}
+        # The time spent parsing the files added together (across workers)
+        self.parse_seconds = 0.0
+        # A heap of the (seconds, path) pairs of the slowest files
+        self.slowest = []
+
+
+    @contextmanager
+    def stage(self, name):
+        """ Measure the wall time of a stage. The time is added to the time
+        already spent in the stage (if any). Used as:
+
+            with stats.stage("render"):
+                ...
+
+        Args:
+            name (str): The name of the stage.
+
+        Returns:
+            None
+        """
+        if not self.profiler is None:
+            self.profiler.enter(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = \
+                self.stages.get(name, 0.0) + time.perf_counter() - start
+            if not self.profiler is None:
+                self.profiler.exit(name)
+
+
+    def count(self, name, value = 1):
+        """ Increase a counter.
+
+        Args:
+            name (str): The name of the counter.
+            value (int): The value to increase the counter by.
+
+        Returns:
+            None
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+
+    def add_file(self, path, seconds):
+        """ Record the time it took to parse a file.
+
+        Args:
+            path (str): The path to the file.
+            seconds (float): The time (in seconds) it took to read, parse and
+                extract the metadata of the file.
+
+        Returns:
+            None
+        """
+        self.count("files_parsed")
+        self.parse_seconds += seconds
+        if self.slowest_n <= 0:
+            return
+        if len(self.slowest) < self.slowest_n:
+            heapq.heappush(self.slowest, (seconds, path))
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (seconds, path))
+
+
+    def to_dict(self):
+        """ Get the collected information.
+
+        Args:
+            None
+
+        Returns:
+            (dict): The collected information.
+        """
+        return {
+            "timestamp": time.time(),
+            "stages": {
+                name: round(seconds, 6)
+                for name, seconds in self.stages.items()
+            },
+            "total": round(sum(self.stages.values()), 6),
+            "counters": dict(self.counters),
+            "parse_seconds": round(self.parse_seconds, 6),
+            "slowest_files": [
+                {"path": path, "seconds": round(seconds, 6)}
+                for seconds, path in sorted(self.slowest, reverse = True)
+            ],
+        }
+
+
+    def to_prometheus(self, prefix = "pysip"):
+        """ Format the collected information in the Prometheus text
+        exposition format.
+
+        Args:
+            prefix (str): The prefix of the names of the metrics.
+
+        Returns:
+            (str): The metrics.
+        """
+        def label(value):
+            return value.replace("\\", "\\\\").replace("\"", "\\\"") \
+                .replace("\n", "\\n")
+        def metric(name, help, samples):
+            lines.append(f"# HELP {prefix}_{name} {help}")
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            for labels, value in samples:
+                lines.append(f"{prefix}_{name}{labels} {value}")
+        lines = []
+        stats = self.to_dict()
+        metric("last_build_timestamp_seconds",
+            "The time the last build finished.",
+            [("", stats["timestamp"])],
+        )
+        metric("stage_duration_seconds",
+            "The wall time spent in each stage of the last build.",
+            [(f"{{stage=\"{label(name)}\"}}", seconds)
+                for name, seconds in stats["stages"].items()],
+        )
+        metric("build_duration_seconds",
+            "The wall time spent in all stages of the last build.",
+            [("", stats["total"])],
+        )
+        for name, value in stats["counters"].items():
+            metric(name, self.COUNTERS.get(name, name), [("", value)])
+        metric("parse_seconds",
+            "The time spent parsing the files added together (across workers).",
+            [("", stats["parse_seconds"])],
+        )
+        metric("file_parse_seconds",
+            "The time it took to parse each of the slowest files.",
+            [(f"{{path=\"{label(file['path'])}\"}}", file["seconds"])
+                for file in stats["slowest_files"]],
+        )
+        return "\n".join(lines) + "\n"
+
+
+    def write(self, path, format = "json"):
+        """ Write the collected information to a file. The file is replaced
+        atomically, such that a reader (for example the Prometheus node
+        exporter) never reads a partially written file.
+
+        Args:
+            path (str): The path to the file.
+            format (str): Either "json" or "prometheus".
+
+        Returns:
+            None
+        """
+        if format == "prometheus":
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.to_dict(), indent = 4)
+        try:
+            write_atomic(path, content)
+        except OSError as e:
+            print(f"ERROR: Could not write the stats file {path}!")
+            print("ERROR: ", e)
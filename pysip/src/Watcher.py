@@ -0,0 +1,158 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#                               Import local code                              #
+#------------------------------------------------------------------------------#
+from .utils import (
+    print_verbose,
+)
+#------------------------------------------------------------------------------#
+#               Import packages from the python standard library               #
+#------------------------------------------------------------------------------#
+import time
+
+
+#------------------------------------------------------------------------------#
+class Watcher:
+    """
+    class: Watcher. This class keeps the "filelist.js" file of a static index
+    page up-to-date. The content directory is polled for new, changed and
+    deleted "index.html" files. Polling only requires a "stat" call per file,
+    i.e. no files are read unless they have changed. Only the changed files
+    are parsed again (the data of all other files is taken from the metadata
+    cache) and the "filelist.js" file is then replaced atomically.
+    """
+
+
+    def __init__(self, page, interval = 1.0, debounce = 0.5):
+        """ Initialize class variables.
+
+        Args:
+            page (StaticIndexPage): The static index page to keep up-to-date.
+            interval (float): The time (in seconds) between two polls of the
+                content directory.
+            debounce (float): The time (in seconds) the content directory
+                needs to be left unchanged before the "filelist.js" file is
+                updated. This way a burst of changes (for example when a
+                directory is copied) only causes a single update.
+
+        Returns:
+            None
+        """
+        self.page = page
+        self.interval = interval
+        self.debounce = debounce
+        self.verbose = page.args.verbose
+
+
+    def snapshot(self):
+        """ Take a snapshot of the "index.html" files in the content
+        directory.
+
+        Args:
+            None
+
+        Returns:
+            index_files (list(tuple)): The (directory, path, status) tuples
+                of the "index.html" files, in the order they were found in.
+            state (dict): The time of the last modification, size and inode
+                of each file keyed by path.
+        """
+        index_files = list(self.page.find_index_files())
+        state = {
+            index_path: None if st is None else \
+                (st.st_mtime_ns, st.st_size, st.st_ino)
+            for _, index_path, st in index_files
+        }
+        return index_files, state
+
+
+    def changes(self, old_state, new_state):
+        """ Compare two snapshots.
+
+        Args:
+            old_state (dict): The state of an earlier snapshot.
+            new_state (dict): The state of a later snapshot.
+
+        Returns:
+            (tuple(list)): The paths of the files that were added, changed
+                and deleted.
+        """
+        added = [path for path in new_state if not path in old_state]
+        deleted = [path for path in old_state if not path in new_state]
+        changed = [
+            path for path in new_state
+            if path in old_state and new_state[path] != old_state[path]
+        ]
+        return added, changed, deleted
+
+
+    def wait_for_changes(self, state):
+        """ Poll the content directory until something has changed and
+        nothing has changed for at least "debounce" seconds.
+
+        Args:
+            state (dict): The state of the latest snapshot.
+
+        Returns:
+            index_files (list(tuple)): The (directory, path, status) tuples
+                of the "index.html" files in the new snapshot.
+            new_state (dict): The state of the new snapshot.
+        """
+        while True:
+            time.sleep(self.interval)
+            index_files, new_state = self.snapshot()
+            if new_state != state:
+                break
+        # Wait for the burst of changes to end
+        while True:
+            time.sleep(self.debounce)
+            latest_files, latest_state = self.snapshot()
+            if latest_state == new_state:
+                return index_files, new_state
+            index_files, new_state = latest_files, latest_state
+
+
+    def run(self, state = None):
+        """ Watch the content directory until the process is interrupted
+        (for example by pressing Ctrl+C).
+
+        Args:
+            state (dict): The state of a snapshot taken before the static
+                index page was built. Files that were changed after this
+                snapshot was taken are updated right away. If not given, then
+                a new snapshot is taken.
+
+        Returns:
+            None
+        """
+        print_verbose(
+            f"INFO : Watching {self.page.content_dir} for changes " + \
+            "(press Ctrl+C to stop)...",
+            self.verbose,
+        )
+        if state is None:
+            _, state = self.snapshot()
+        try:
+            while True:
+                index_files, new_state = self.wait_for_changes(state)
+                added, changed, deleted = self.changes(state, new_state)
+                print_verbose(
+                    f"INFO : Detected {len(added)} new, {len(changed)} " + \
+                    f"changed and {len(deleted)} deleted file(s)...",
+                    self.verbose,
+                )
+                start = time.perf_counter()
+                self.page.update_file_list(index_files)
+                state = new_state
+                print_verbose(
+                    "INFO : Updated the list of files in " + \
+                    f"{time.perf_counter() - start:.3f}s...",
+                    self.verbose,
+                )
+        except KeyboardInterrupt:
+            print_verbose("INFO : Terminating...", self.verbose)
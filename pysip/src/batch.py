@@ -0,0 +1,203 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#                               Import local code                              #
+#------------------------------------------------------------------------------#
+from .CommandLineArgs import CommandLineArgs
+from .collect import StaticIndexPage
+from .utils import (
+    get_site_cache_dir,
+    print_verbose,
+)
+#------------------------------------------------------------------------------#
+#               Import packages from the python standard library               #
+#------------------------------------------------------------------------------#
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import time
+
+
+#------------------------------------------------------------------------------#
+#                           Global variables & methods                         #
+#------------------------------------------------------------------------------#
+# The options of a site that are paths. Relative paths are taken relative to
+# the directory of the batch file
+PATH_OPTIONS = ["content_dir", "output_dir", "cache_dir", "stats"]
+
+# The commandline arguments that only apply to the batch itself
+BATCH_OPTIONS = ["batch", "batch_jobs"]
+
+
+#------------------------------------------------------------------------------#
+def load_batch_file(path):
+    """ Load the sites listed in a batch file. A batch file contains .json
+    data: either a list of sites or a dictionary with a list of "sites" and
+    (optionally) a dictionary of "defaults" that apply to all sites. Each site
+    is a dictionary of commandline arguments (without the leading dashes), for
+    example:
+
+        {
+            "defaults": {"order_by": "title"},
+            "sites": [
+                {"content_dir": "docs", "output_dir": "www/docs"},
+                {"content_dir": "notes", "output_dir": "www/notes",
+                 "color_palette": "color_palette_1"}
+            ]
+        }
+
+    Args:
+        path (str): The path to the batch file.
+
+    Returns:
+        sites (list(dict)): The options of each site.
+    """
+    try:
+        with open(path) as file:
+            config = json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: Could not read the batch file {path}!")
+        print("ERROR: ", e)
+        raise SystemExit
+    if isinstance(config, list):
+        config = {"sites": config}
+    if not isinstance(config, dict) or \
+        not isinstance(config.get("sites"), list) or \
+        not all(isinstance(site, dict) for site in config["sites"]) or \
+        not isinstance(config.get("defaults", {}), dict):
+        print(f"ERROR: The batch file {path} should contain a list of " + \
+            "sites (dictionaries of options)!")
+        raise SystemExit
+    base_dir = os.path.dirname(os.path.abspath(path))
+    sites = []
+    for site in config["sites"]:
+        options = dict(config.get("defaults", {}))
+        options.update(site)
+        for name in PATH_OPTIONS:
+            if name in options:
+                options[name] = os.path.normpath(
+                    os.path.join(base_dir, options[name]),
+                )
+        sites.append(options)
+    return sites
+
+
+def strip_batch_options(argv):
+    """ Remove the commandline arguments that only apply to the batch itself.
+
+    Args:
+        argv (list(str)): The commandline arguments.
+
+    Returns:
+        (list(str)): The remaining commandline arguments.
+    """
+    flags = [dashes + name for name in BATCH_OPTIONS for dashes in ["-", "--"]]
+    remaining = []; skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg in flags:
+            skip = True
+        elif not arg.split("=", 1)[0] in flags:
+            remaining.append(arg)
+    return remaining
+
+
+def to_args_list(options):
+    """ Turn the options of a site into commandline arguments.
+
+    Args:
+        options (dict): The options of a site.
+
+    Returns:
+        args_list (list(str)): The commandline arguments.
+    """
+    args_list = []
+    for name, value in options.items():
+        for v in value if isinstance(value, list) else [value]:
+            args_list += ["--" + name, str(v)]
+    return args_list
+
+
+def run_batch(args, argv):
+    """ Generate all static index pages listed in a batch file. The sites
+    are generated concurrently by a pool of threads and share the template
+    environment and the pools of workers that parse the "index.html" files,
+    such that the templates are only compiled once and the workers are only
+    started once. The sites with the same "jobs" and "executor" options
+    share a pool of workers.
+
+    Args:
+        args (argparse.Namespace): The given commandline arguments.
+        argv (list(str)): The given commandline arguments (unparsed). These
+            apply to all sites, but can be overridden by each site.
+
+    Returns:
+        None
+    """
+    sites = load_batch_file(args.batch)
+    base_argv = strip_batch_options(argv)
+    pages = []
+    for options in sites:
+        # The sites would otherwise all be written to the current working
+        # directory
+        if not "content_dir" in options or not "output_dir" in options:
+            print("ERROR: Each site in the batch file needs a " + \
+                "\"content_dir\" and an \"output_dir\"!")
+            raise SystemExit
+        site_args = CommandLineArgs(base_argv + to_args_list(options)).args
+        if site_args.watch or not site_args.profile is None:
+            print("ERROR: The \"-watch/--watch\" and \"-profile/--profile\" " + \
+                "commandline arguments can not be used in batch mode!")
+            raise SystemExit
+        # Without a cache directory each site already gets its own directory
+        # in the cache directory of the user
+        if not "cache_dir" in options and not site_args.cache_dir is None:
+            site_args.cache_dir = get_site_cache_dir(
+                site_args.cache_dir, site_args.output_dir,
+            )
+        pages.append(StaticIndexPage(site_args, run = False))
+    if not pages:
+        return
+    print_verbose(f"INFO : Generating {len(pages)} static index page(s)...",
+        args.verbose,
+    )
+    start = time.perf_counter()
+    # Share the template environment and the pools of workers
+    jinja_templates = pages[0].load_jinja_templates()
+    executors = {}
+    for page in pages:
+        page.jinja_templates = jinja_templates
+        page.templates_hash = pages[0].templates_hash
+        key = (page.args.executor, page.args.jobs)
+        if not key in executors:
+            executors[key], _ = page.create_executor()
+        page.executor = executors[key]
+    failed = 0
+    try:
+        with ThreadPoolExecutor(max_workers = args.batch_jobs) as pool:
+            futures = [pool.submit(page.run) for page in pages]
+            for page, future in zip(pages, futures):
+                try:
+                    future.result()
+                except (Exception, SystemExit) as e:
+                    failed += 1
+                    print("ERROR: Could not generate the static index page " + \
+                        f"for {page.content_dir}!")
+                    if str(e):
+                        print("ERROR: ", e)
+    finally:
+        for executor in executors.values():
+            if not executor is None:
+                executor.shutdown()
+    print_verbose(
+        f"INFO : Generated {len(pages) - failed} of {len(pages)} static " + \
+        f"index page(s) in {time.perf_counter() - start:.3f}s...",
+        args.verbose,
+    )
+    if failed > 0:
+        raise SystemExit(1)
@@ -0,0 +1,500 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#                               Import local code                              #
+#------------------------------------------------------------------------------#
+from .CommandLineArgs import CommandLineArgs
+from .RandomHTMLDocument import (
+    PROFILES,
+    RandomHTMLDocument,
+)
+from .collect import StaticIndexPage
+from .extract import (
+    extract_html_file_data,
+    parse_html_file,
+    parse_html_head,
+)
+from .utils import (
+    is_integer,
+    print_verbose,
+    str_to_bool,
+)
+#------------------------------------------------------------------------------#
+#               Import packages from the python standard library               #
+#------------------------------------------------------------------------------#
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+#------------------------------------------------------------------------------#
+#                           Global variables & methods                         #
+#------------------------------------------------------------------------------#
+# The number of documents in the corpus used to measure the startup time
+STARTUP_CORPUS_SIZE = 100
+
+# The commands used to measure the startup time: the interpreter alone, the
+# imports of pysip and a rebuild of a static index page that is up-to-date
+# (the common case, where all data is taken from the caches). The caches are
+# kept in the temporary directory, such that they are removed along with it
+STARTUP_COMMANDS = {
+    "interpreter": ["-c", "pass"],
+    "import": ["-c", "import pysip.src.collect"],
+    "rebuild": [
+        "-c", "from pysip.src.collect import main; main()",
+        "-d", "content", "--sync", "--cache_dir", ".pysip_cache",
+    ],
+}
+
+
+#------------------------------------------------------------------------------#
+def peak_rss_kb():
+    """ Get the peak resident set size (RSS) of this process and of its
+    (finished) child processes. The peak is taken over the whole lifetime of
+    the processes, i.e. each corpus size is run in a new process (see the
+    "run_stages_in_process" method of the "Benchmark" class).
+
+    Args:
+        None
+
+    Returns:
+        (dict): The peak RSS (in kilobytes) of this process ("self") and the
+            largest peak RSS of its child processes ("children"). A value is
+            None if it can not be measured on this platform.
+    """
+    try:
+        # The "resource" module is only available on Unix
+        import resource
+    except ImportError:
+        # Elsewhere (Windows) the peak working set of this process is taken
+        # from psutil, if it is installed. The peak RSS of child processes
+        # is not known
+        try:
+            import psutil # pip install psutil
+        except ImportError:
+            return {"self": None, "children": None}
+        memory = psutil.Process().memory_info()
+        return {
+            "self": getattr(memory, "peak_wset", memory.rss) // 1024,
+            "children": None,
+        }
+    # On macOS the peak RSS is given in bytes, on Linux in kilobytes
+    scale = 1024 if sys.platform == "darwin" else 1
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale,
+        "children": \
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale,
+    }
+
+
+def get_version():
+    """ Get the installed version of pysip.
+
+    Args:
+        None
+
+    Returns:
+        (str): The version or None if pysip is not installed.
+    """
+    try:
+        from importlib.metadata import version
+        return version("pysip")
+    except Exception:
+        return None
+
+
+#------------------------------------------------------------------------------#
+class Timer:
+    """
+    class: Timer. A small helper class that measures the wall time of a
+    number of named stages.
+    """
+
+
+    def __init__(self):
+        """
+        """
+        self.stages = {}
+
+
+    def __call__(self, name, f, *args, **kwargs):
+        """ Call a function and add the time it took to the given stage.
+
+        Args:
+            name (str): The name of the stage.
+            f (callable): The function to call.
+
+        Returns:
+            The return value of the function.
+        """
+        start = time.perf_counter()
+        result = f(*args, **kwargs)
+        self.stages[name] = \
+            self.stages.get(name, 0.0) + time.perf_counter() - start
+        return result
+
+
+#------------------------------------------------------------------------------#
+class Benchmark:
+    """
+    class: Benchmark. Build a synthetic corpus of random HTML documents and
+    measure how long each stage of generating a static index page takes.
+    """
+
+
+    def __init__(self, args):
+        """
+        """
+        self.args = args
+
+
+    def generate_corpus(self, root_dir, size):
+        """ Generate a corpus of random HTML documents.
+
+        Args:
+            root_dir (str): The directory to place the "content" directory in.
+            size (int): The number of documents to generate.
+
+        Returns:
+            None
+        """
+        RandomHTMLDocument(
+            args = self.args,
+            n = size,
+            n_keywords = self.args.keywords,
+            body_size = self.args.body_size,
+            seed = self.args.seed,
+            jobs = self.args.jobs,
+            profile = self.args.corpus_profile,
+        ).save(
+            content_dir = os.path.join(root_dir, "content"),
+        )
+
+
+    def run_stages(self, root_dir, size):
+        """ Run (and time) each stage of generating a static index page.
+
+        Args:
+            root_dir (str): The directory that contains the "content"
+                directory. The static index page is generated in this
+                directory.
+            size (int): The number of documents in the corpus.
+
+        Returns:
+            (dict): The results of the benchmark.
+        """
+        pysip_args = CommandLineArgs([
+            "-d", "content",
+            "--jobs", str(self.args.jobs),
+            "--parser", self.args.parser,
+            "--cache", "False",
+            "--max_depth", "0",
+        ]).args
+        timer = Timer()
+        cwd = os.getcwd()
+        os.chdir(root_dir)
+        try:
+            page = StaticIndexPage(pysip_args, run = False)
+            # Copy the static files and render the templates
+            timer("static_copy", page.copy_static_files)
+            jinja_templates = timer("template_render",
+                page.load_jinja_templates,
+            )
+            timer("template_render", page.render_templates,
+                jinja_templates, page.get_template_vars(),
+            )
+            # Find the files
+            index_files = timer("discovery",
+                lambda: list(page.find_index_files())
+            )
+            # Parse the files and extract the metadata one file at a time.
+            # This is done separately from the actual traversal below, such
+            # that the time spent on parsing and on extracting can be told
+            # apart
+            parse = parse_html_head if self.args.parser == "head" \
+                else parse_html_file
+            for _, index_path, _ in index_files:
+                tree = timer("parse", parse, index_path)
+                if tree is None:
+                    tree = timer("parse", parse_html_file, index_path)
+                timer("extract", extract_html_file_data, tree)
+            # The traversal as it is done by pysip (taking the number of
+            # workers into account)
+            files = timer("traverse", page.traverse_dirs, index_files)
+            files = timer("order", page.order_files, files)
+            timer("serialize", page.write_file_list, files)
+            timer("serialize", page.write_search_index, files)
+            timer("serialize", page.write_sort_orders, files)
+            timer("serialize", page.write_facets, files)
+        finally:
+            os.chdir(cwd)
+        total = sum(
+            seconds for name, seconds in timer.stages.items()
+            if not name in ["parse", "extract"]
+        )
+        return {
+            "size": size,
+            "body_size": self.args.body_size,
+            "corpus_profile": self.args.corpus_profile,
+            "keywords": self.args.keywords,
+            "jobs": self.args.jobs,
+            "seed": self.args.seed,
+            "parser": self.args.parser,
+            "stages": {
+                name: round(seconds, 6)
+                for name, seconds in timer.stages.items()
+            },
+            "total": round(total, 6),
+            "pages_per_second": {
+                "traverse": round(size / timer.stages["traverse"], 1) \
+                    if timer.stages["traverse"] > 0 else None,
+                "total": round(size / total, 1) if total > 0 else None,
+            },
+            "peak_rss_kb": peak_rss_kb(),
+        }
+
+
+    def run_stages_in_process(self, root_dir, size):
+        """ Run the "run_stages" method in a new python process, such that the
+        peak RSS that is measured is that of this corpus size alone and not of
+        any of the corpora that were processed before it.
+
+        Args:
+            root_dir (str): See "run_stages".
+            size (int): See "run_stages".
+
+        Returns:
+            (dict): The results of the benchmark.
+        """
+        # A new (spawned) process starts out without any of the memory of
+        # this process
+        with ProcessPoolExecutor(max_workers = 1,
+            mp_context = multiprocessing.get_context("spawn"),
+        ) as executor:
+            return executor.submit(self.run_stages, root_dir, size).result()
+
+
+    def run_startup(self):
+        """ Measure the startup time (cold-start latency) of pysip. Each
+        command is run in a new python process a number of times.
+
+        Args:
+            None
+
+        Returns:
+            (dict): The median and the minimum wall time (in seconds) of each
+                command.
+        """
+        root_dir = tempfile.mkdtemp(prefix = "pysip-bench-")
+        # Make sure the pysip package being benchmarked is the one imported
+        # by the new processes
+        package_dir = os.path.dirname(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            [package_dir] + ([env["PYTHONPATH"]] if "PYTHONPATH" in env else [])
+        )
+        def run_command(args):
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + args,
+                cwd = root_dir,
+                env = env,
+                stdin = subprocess.DEVNULL,
+                stdout = subprocess.DEVNULL,
+                check = True,
+            )
+            return time.perf_counter() - start
+        try:
+            print_verbose("INFO : Measuring the startup time...",
+                self.args.verbose,
+            )
+            self.generate_corpus(root_dir, STARTUP_CORPUS_SIZE)
+            # The first build fills the caches
+            run_command(STARTUP_COMMANDS["rebuild"])
+            results = {}
+            for name, args in STARTUP_COMMANDS.items():
+                times = [
+                    run_command(args) for _ in range(self.args.startup_runs)
+                ]
+                results[name] = {
+                    "median": round(statistics.median(times), 6),
+                    "min": round(min(times), 6),
+                }
+        finally:
+            shutil.rmtree(root_dir, ignore_errors = True)
+        return results
+
+
+    def run(self):
+        """ Run the benchmark for each of the corpus sizes.
+
+        Args:
+            None
+
+        Returns:
+            (dict): The results of the benchmark.
+        """
+        results = []
+        for size in self.args.sizes:
+            root_dir = tempfile.mkdtemp(prefix = "pysip-bench-")
+            try:
+                print_verbose(
+                    f"INFO : Generating a corpus of {size} documents...",
+                    self.args.verbose,
+                )
+                start = time.perf_counter()
+                self.generate_corpus(root_dir, size)
+                generate = time.perf_counter() - start
+                print_verbose(
+                    f"INFO : Running the stages on {size} documents...",
+                    self.args.verbose,
+                )
+                result = self.run_stages_in_process(root_dir, size)
+                result["generate"] = round(generate, 6)
+                results.append(result)
+            finally:
+                shutil.rmtree(root_dir, ignore_errors = True)
+        return {
+            "pysip_version": get_version(),
+            "python_version": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "startup": self.run_startup() \
+                if self.args.startup_runs > 0 else None,
+            "results": results,
+        }
+
+
+#------------------------------------------------------------------------------#
+def get_commandline_args(args_list = None):
+    """ Setup, parse and validate the commandline arguments of the benchmark.
+    """
+    parser = argparse.ArgumentParser(description = "Benchmark pysip on " + \
+        "synthetic corpora of random HTML documents.")
+    parser.add_argument("-sizes", "--sizes",
+        required = False,
+        default = "1000,10000",
+        type = str,
+        help = "Ex: -sizes 1000,10000,100000. A comma-separated list of " + \
+            "the number of documents in each corpus.",
+    )
+    parser.add_argument("-body_size", "--body_size",
+        required = False,
+        default = "0",
+        type = str,
+        help = "Ex: -body_size 100000. The (approximate) number of bytes " + \
+            "of the body of each document.",
+    )
+    parser.add_argument("-corpus_profile", "--corpus_profile",
+        required = False,
+        default = "basic",
+        type = str,
+        choices = list(PROFILES),
+        help = "Ex: -corpus_profile jupyter. What the documents of the " + \
+            "corpora should look like (see \"pysip --help\").",
+    )
+    parser.add_argument("-keywords", "--keywords",
+        required = False,
+        default = None,
+        type = str,
+        help = "Ex: -keywords 5. The number of keywords of each document. " + \
+            "By default a random number of keywords (0-6) is used.",
+    )
+    parser.add_argument("-jobs", "--jobs",
+        required = False,
+        default = "1",
+        type = str,
+        help = "Ex: -jobs 4. The number of workers used to generate the " + \
+            "corpora and used by pysip to parse the documents.",
+    )
+    parser.add_argument("-seed", "--seed",
+        required = False,
+        default = "0",
+        type = str,
+        help = "Ex: -seed 42. The seed used to generate the corpora, such " + \
+            "that the same corpora are used across runs.",
+    )
+    parser.add_argument("-parser", "--parser",
+        required = False,
+        default = "head",
+        type = str,
+        choices = ["head", "full"],
+        help = "Ex: -parser full. The parser used by pysip.",
+    )
+    parser.add_argument("-startup_runs", "--startup_runs",
+        required = False,
+        default = "5",
+        type = str,
+        help = "Ex: -startup_runs 10. The number of times the startup " + \
+            "time of pysip is measured (0 to skip the measurement).",
+    )
+    parser.add_argument("-o", "--output",
+        required = False,
+        default = None,
+        type = str,
+        help = "Ex: -o results.json. The file to write the results to. " + \
+            "By default the results are written to the standard output.",
+    )
+    parser.add_argument("-v", "--verbose",
+        required = False,
+        default = False,
+        type = str_to_bool,
+        help = "Ex: -v True. Specify whether progress should be shown.",
+    )
+    args = parser.parse_args(args_list)
+    for name in ["body_size", "jobs", "seed", "startup_runs"]:
+        value = getattr(args, name)
+        if not is_integer(value) or int(value) < 0:
+            raise ValueError(f"--{name} {value}. The provided value is " + \
+                "not a non-negative integer!",
+            )
+        setattr(args, name, int(value))
+    if not args.keywords is None:
+        if not is_integer(args.keywords) or int(args.keywords) < 0:
+            raise ValueError(f"--keywords {args.keywords}. The provided " + \
+                "value is not a non-negative integer!",
+            )
+        args.keywords = int(args.keywords)
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    for size in sizes:
+        if not is_integer(size) or int(size) <= 0:
+            raise ValueError(f"--sizes {size}. The provided value is not " + \
+                "a positive integer!",
+            )
+    args.sizes = [int(size) for size in sizes]
+    return args
+
+
+def main():
+    """ Main function call. Run the benchmark and write out the results as
+    .json data.
+    """
+    args = get_commandline_args()
+    results = json.dumps(Benchmark(args).run(), indent = 4)
+    if args.output is None:
+        print(results)
+    else:
+        with open(args.output, "w") as file:
+            file.write(results)
+
+
+#------------------------------------------------------------------------------#
+if __name__ == "__main__":
+    """
+    Script entry point...
+    """
+    main()
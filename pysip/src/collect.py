@@ -10,6 +10,8 @@
 from .CommandLineArgs import CommandLineArgs
 from .RandomHTMLDocument import RandomHTMLDocument
 from .utils import (
+    get_site_cache_dir,
+    get_user_cache_dir,
     str_to_bool,
     print_verbose,
 )
@@ -17,21 +19,59 @@ from .color_palettes import (
     COLOR_PALETTES,
     update_color_palettes,
 )
+from .content_hash import (
+    get_hash_function,
+)
+from .FacetIndex import FacetIndex
+from .MetadataCache import MetadataCache
+from .RenderCache import RenderCache
+from .Stats import Stats
+from .Watcher import Watcher
+from .discover import find_index_files
+from .external_sort import external_sort
+from .output import (
+    precompress,
+    write_atomic,
+    write_facets,
+    write_file_list,
+    write_search_index,
+    write_sharded_file_list,
+    write_sort_orders,
+)
+from .publish import (
+    can_publish,
+    create_staging_dir,
+    publish,
+)
+from .search import (
+    add_to_search_index,
+    build_search_index,
+    finalize_search_index,
+)
+from .sort_orders import (
+    ORDER_FIELDS,
+    add_to_sort_orders,
+    build_sort_orders,
+    finalize_sort_orders,
+)
+from .sync import sync_files
+from .extract import (
+    extract_html_file_data,
+    get_collect_function,
+    read_and_hash_html_file,
+)
 #------------------------------------------------------------------------------#
 #               Import packages from the python standard library               #
 #------------------------------------------------------------------------------#
+import hashlib
 import shutil
-import json 
 import os
 import stat
+import sys
 import time
-from io import StringIO
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-#------------------------------------------------------------------------------#
-#                           Import third party packages                        #
-#------------------------------------------------------------------------------#
-from lxml import etree  # pip install lxml
-import jinja2           # pip install jinja2
 
 
 #------------------------------------------------------------------------------#
@@ -42,8 +82,17 @@ class StaticIndexPage:
     """
 
 
-    def __init__(self, args):
-        """ 
+    def __init__(self, args, run = True):
+        """ Initialize class variables and generate the static index page.
+
+        Args:
+            args (argparse.Namespace): The given commandline arguments.
+            run (bool): Whether the static index page should be generated
+                right away. If False, then the individual steps need to be
+                called by hand (for example when benchmarking the steps).
+
+        Returns:
+            None
         """
         # Store the given commandline arguments
         self.args = args
@@ -63,18 +112,145 @@ class StaticIndexPage:
         self.assets_dir = os.path.join(origin_dir, "staticfiles")
         # - The directory where all static index page templates are located:
         self.template_dir = os.path.join(origin_dir, "base")
+        # - The directory the static index page is published to if the user
+        #   specified one via the "-output_dir/--output_dir" argument:
+        self.publish_dir = None
+        if not self.args.output_dir is None:
+            self.publish_dir = os.path.abspath(
+                os.path.join(self.cwd, self.args.output_dir),
+            )
+        # - The directory where data is cached between runs. By default it
+        #   is placed in the cache directory of the user (and not in the
+        #   directory that is served), with a directory for each site:
+        if self.args.cache_dir is None:
+            self.cache_dir = get_site_cache_dir(get_user_cache_dir(),
+                self.publish_dir or self.cwd,
+            )
+        else:
+            self.cache_dir = os.path.join(self.cwd, self.args.cache_dir)
+        # - The directory the static index page is written to. This is a
+        #   staging directory while the static index page is being built
+        #   for the "-output_dir/--output_dir" argument:
+        self.output_dir = self.cwd
+        # The index of keywords and authors (see the "update_file_list"
+        # method)
+        self.facets = None
+        # The locations of the copies of each file (see the "iter_files"
+        # method)
+        self.alternate_urls = {}
+        # The metadata extracted from the "index.html" files is cached unless
+        # the user specified otherwise via the "-cache/--cache" argument
+        self.cache = None
+        if self.args.cache:
+            self.cache = MetadataCache(
+                os.path.join(self.cache_dir, "metadata.json"),
+                verbose = self.args.verbose,
+                rebuild = self.args.rebuild,
+            )
+        # In watch mode the data extracted from unchanged files is always
+        # reused, at least in memory
+        elif self.args.watch:
+            self.cache = MetadataCache(None, verbose = self.args.verbose)
+        # The inputs each template was rendered from are cached as well (see
+        # the "render_template" method)
+        self.render_cache = None
+        if self.args.cache:
+            self.render_cache = RenderCache(
+                os.path.join(self.cache_dir, "render.json"),
+                rebuild = self.args.rebuild,
+            )
+        # The hash of the templates (see the "load_jinja_templates" method)
+        self.templates_hash = None
+        # The profiler the build is run under if the user specified so via
+        # the "-profile/--profile" commandline argument
+        self.profiler = None
+        if not self.args.profile is None:
+            # Only imported when used, as the profilers are slow to import
+            from .Profiler import Profiler
+            self.profiler = Profiler(
+                self.args.profile,
+                os.path.join(self.cwd, self.args.profile_output),
+                top = self.args.profile_top,
+                verbose = self.args.verbose,
+            )
+        # Timings and counters of the stages of a build
+        self.stats = Stats(
+            slowest = self.args.stats_slowest, profiler = self.profiler,
+        )
+        # The template environment and the pool of workers. These are created
+        # when needed, unless they are shared between several static index
+        # pages (see the "batch" module)
+        self.jinja_templates = None
+        self.executor = None
+        if run:
+            self.run()
+
+
+    def run(self):
+        """ Generate the static index page.
+
+        Args:
+            None
 
+        Returns:
+            None
+        """
         # Check all directories, i.e. either validate, create or delete
         # directories
         self.check_directories()
+        # Build the static index page in a staging directory that is
+        # published once the static index page is complete
+        if not self.publish_dir is None:
+            self.output_dir = create_staging_dir(self.publish_dir)
+            print_verbose(
+                f"INFO : Building in staging directory {self.output_dir}",
+                self.args.verbose,
+            )
+        if not self.profiler is None:
+            self.profiler.start()
         # Generate random test data to test the layout of the static index page
         # if the user specified so via the "-test_data/--test_data" commandline
         # argument
-        self.generate_test_data()
+        with self.stats.stage("test_data"):
+            self.generate_test_data()
+        # In watch mode the content directory is snapshotted before the first
+        # build starts, such that changes made while it runs are picked up by
+        # the first poll of the content directory
+        watcher = None
+        if self.args.watch:
+            watcher = Watcher(
+                self,
+                interval = self.args.watch_interval,
+                debounce = self.args.watch_debounce,
+            )
+            _, state = watcher.snapshot()
         # Finally, render templates and collect all necessary data. Copy the 
         # files to the destination directory (the directory where the "pysip"
         # command was run)
-        self.generate_static_index_page()
+        try:
+            self.generate_static_index_page()
+        except BaseException:
+            # Do not leave a half-built staging directory behind
+            if not self.publish_dir is None:
+                shutil.rmtree(self.output_dir, ignore_errors = True)
+            raise
+        if not self.publish_dir is None:
+            print_verbose(
+                f"INFO : Publishing the static index page to {self.publish_dir}",
+                self.args.verbose,
+            )
+            publish(self.output_dir, self.publish_dir)
+            # Any later updates (in watch mode) go to the published files
+            self.output_dir = self.publish_dir
+        # Only the first build is profiled in watch mode
+        if not self.profiler is None:
+            self.profiler.stop()
+            self.profiler = None
+            self.stats.profiler = None
+        # Keep the "filelist.js" file up-to-date if the user specified so via
+        # the "-watch/--watch" commandline argument
+        if not watcher is None:
+            watcher.run(state)
 
 
     def generate_test_data(self):
@@ -86,7 +262,11 @@ class StaticIndexPage:
             # commandline argument
             RandomHTMLDocument(
                 args = self.args,
-                n = self.args.test_data
+                n = self.args.test_data,
+                body_size = self.args.test_size,
+                seed = self.args.seed,
+                jobs = self.args.jobs,
+                profile = self.args.test_profile,
             ).save(
                 content_dir = self.content_dir,
             )
@@ -100,32 +280,335 @@ class StaticIndexPage:
         print_verbose("INFO : Copying assets and other static files to the " + \
             "destination directory...", self.args.verbose,
         )
-        self.copy_static_files()
-        # Load all templates located in the "base" template directory
-        jinja_templates = self.load_jinja_templates()
-        # Render the templates using the user-specified color palette
-        self.render_templates(
-            jinja_templates,
-            COLOR_PALETTES[self.args.color_palette],
-        )
+        with self.stats.stage("copy"):
+            self.copy_static_files()
+        with self.stats.stage("render"):
+            # Load all templates located in the "base" template directory
+            jinja_templates = self.load_jinja_templates()
+            # Render the templates using the user-specified color palette
+            self.render_templates(
+                jinja_templates,
+                self.get_template_vars(),
+            )
+        # Collect data from all "index.html" files and write it to a file
+        self.update_file_list()
+
+
+    def update_file_list(self, index_files = None):
+        """ Collect data from the "index.html" files, order the files and
+        write the data to the "filelist.js" file.
+
+        Args:
+            index_files (iterable(tuple)): The (directory, path, status)
+                tuples of the "index.html" files to include. If not given,
+                then the content directory is traversed to find the files.
+
+        Returns:
+            None
+        """
         # Go through the directories in the directory given via the commandline
         # argument "-d/--content_dir". Collect data from the "index.html" 
         # file which may be contained in a subdirectory
         print_verbose("INFO : Traversing directories containing HTML files...", 
             self.args.verbose,
         )
-        files = self.traverse_dirs()
+        # The keywords and authors of the files are aggregated while the
+        # directories are traversed
+        self.facets = FacetIndex() if self.args.facets else None
+        if self.args.stream:
+            self.stream_file_list(index_files)
+            self.write_stats()
+            return
+        with self.stats.stage("traverse"):
+            files = self.traverse_dirs(index_files)
         print_verbose("INFO : Ordering the files...", self.args.verbose)
-        files = self.order_files(files)
-        destination_dir = os.path.join(self.cwd, "staticfiles")
+        with self.stats.stage("order"):
+            files = self.order_files(files)
+        with self.stats.stage("write_file_list"):
+            self.write_file_list(files)
+        with self.stats.stage("write_search_index"):
+            self.write_search_index(files)
+        with self.stats.stage("write_sort_orders"):
+            self.write_sort_orders(files)
+        with self.stats.stage("write_facets"):
+            self.write_facets(files)
+        self.write_stats()
+
+
+    def stream_file_list(self, index_files = None):
+        """ Collect data from the "index.html" files and write it to the
+        "filelist.js" file (or its shards) while the files are collected, such
+        that the collected data is never kept in memory all at once. If the
+        files need to be ordered, then they are sorted by an external merge
+        sort that keeps at most "-stream_buffer/--stream_buffer" files in
+        memory at a time. The search index and the facet index are built
+        while the ordered files are written. These (and the metadata cache)
+        are still kept in memory, but are much smaller than the collected
+        data.
+
+        Args:
+            index_files (iterable(tuple)): The (directory, path, status)
+                tuples of the "index.html" files to include. If not given,
+                then the content directory is traversed to find the files.
+
+        Returns:
+            None
+        """
+        postings = {} if self.args.search_index else None
+        sort_keys = {} if self.args.sort_orders else None
+        def sort_keywords(files):
+            for file in files:
+                if not file["keywords"] == "":
+                    file["keywords"].sort()
+                yield file
+        def index(files):
+            # The position of a file in the stream is its id. The files are
+            # always sorted, i.e. all files (and all copies) have been found
+            # by the time the first file is handed out
+            for file_id, file in enumerate(files):
+                file = self.add_alternate_urls(file)
+                if not postings is None:
+                    add_to_search_index(postings, file_id, file)
+                if not sort_keys is None:
+                    add_to_sort_orders(sort_keys, file)
+                if not self.facets is None:
+                    self.facets.add(file, file_id)
+                yield file
+        # Traversing, ordering and writing all happen at the same time
+        with self.stats.stage("stream"):
+            files = sort_keywords(self.iter_files(index_files))
+            key = self.get_order_key()
+            if not key is None:
+                files = external_sort(files, key, self.args.stream_buffer)
+            self.write_file_list(index(files))
+        with self.stats.stage("write_search_index"):
+            self.save_search_index(
+                None if postings is None else finalize_search_index(postings)
+            )
+        with self.stats.stage("write_sort_orders"):
+            self.save_sort_orders(
+                None if sort_keys is None else \
+                    finalize_sort_orders(sort_keys, self.args.order_by)
+            )
+        with self.stats.stage("write_facets"):
+            self.save_facets(
+                None if self.facets is None else self.facets.finalize()
+            )
+
+
+    def get_staticfiles_dir(self):
+        """ Get the "staticfiles" directory the static index page is written
+        to.
+
+        Args:
+            None
+
+        Returns:
+            (str): The path to the "staticfiles" directory.
+        """
+        return os.path.join(self.output_dir, "staticfiles")
+
+
+    def write_stats(self):
+        """ Write the timings and counters of the current build to the file
+        given via the "-stats/--stats" commandline argument (if any). The
+        counters are then reset for the next build (in watch mode).
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        if not self.args.stats is None:
+            path = os.path.join(self.cwd, self.args.stats)
+            print_verbose(f"INFO : Writing stats to file {path}",
+                self.args.verbose,
+            )
+            self.stats.write(path, format = self.args.stats_format)
+        self.stats = Stats(
+            slowest = self.args.stats_slowest, profiler = self.profiler,
+        )
+
+
+    def count_written(self, written):
+        """ Add a number of output files (and their pre-compressed copies, if
+        any) to the "files_written" and "bytes_written" counters.
+
+        Args:
+            written (list(str)): The paths of the files that were written.
+
+        Returns:
+            None
+        """
+        for path in written:
+            for extension in [""] + ["." + f for f in self.args.precompress]:
+                if os.path.exists(path + extension):
+                    self.stats.count("files_written")
+                    self.stats.count("bytes_written",
+                        os.path.getsize(path + extension),
+                    )
+
+
+    def write_file_list(self, files):
+        """ Create a Javascript file with .json data that contains all the
+        collected data. Save the Javascript file in the destination directory
+        (the directory where the "pysip" command was run). If the user
+        specified so via the "-shard_size/--shard_size" commandline argument,
+        then the data is split into a number of smaller files instead. All
+        files are replaced atomically, such that a browser never loads a
+        partially written file.
+
+        Args:
+            files (iterable(dict)): The dictionaries that contain information
+                about each "index.html" file. May be a generator.
+
+        Returns:
+            None
+        """
+        destination_dir = self.get_staticfiles_dir()
         file = os.path.join(destination_dir, "filelist.js")
         print_verbose(f"INFO : Writing data to file {file}", self.args.verbose)
-        # Create a Javascript file with .json data that contains all the 
-        # collected data. Save the Javascript file in the destination 
-        # directory (the directory where the "pysip" command was run)
-        with open(file, "w") as file:
-            file.write("var FILE_LIST = ")
-            file.write(json.dumps(files, indent = 4))
+        if self.args.shard_size > 0:
+            written = write_sharded_file_list(
+                destination_dir, files, self.args.shard_size,
+                compact = self.args.compact,
+            )
+            print_verbose(
+                f"INFO : Split the data into {len(written) - 1} shard(s)...",
+                self.args.verbose,
+            )
+        else:
+            written = write_file_list(
+                destination_dir, files, compact = self.args.compact,
+            )
+        # Write pre-compressed copies of the files (or remove outdated ones)
+        precompress(written, self.args.precompress)
+        self.count_written(written)
+
+
+    def write_search_index(self, files):
+        """ Build a search index of the titles, authors and keywords of the
+        files and write it to the destination directory, unless the user
+        specified otherwise via the "-search_index/--search_index" commandline
+        argument.
+
+        Args:
+            files (list(dict)): A list of dictionaries. The list has been
+                ordered, i.e. the position of a file in the list is the id
+                used in the search index.
+
+        Returns:
+            None
+        """
+        search_index = None
+        if self.args.search_index:
+            print_verbose("INFO : Building the search index...",
+                self.args.verbose,
+            )
+            search_index = build_search_index(files)
+        self.save_search_index(search_index)
+
+
+    def save_search_index(self, search_index):
+        """ Write a search index to the destination directory.
+
+        Args:
+            search_index (dict): A search index (see the "build_search_index"
+                function in the "search" module) or None. If None, then a
+                search index written by an earlier build is removed.
+
+        Returns:
+            None
+        """
+        written = write_search_index(self.get_staticfiles_dir(), search_index)
+        precompress(written, self.args.precompress)
+        self.count_written(written)
+
+
+    def write_sort_orders(self, files):
+        """ Precompute all the orders the files can be shown in and write
+        them to the destination directory, unless the user specified
+        otherwise via the "-sort_orders/--sort_orders" commandline argument.
+        The static index page can then switch between the orders without
+        sorting the files itself.
+
+        Args:
+            files (list(dict)): A list of dictionaries. The list has been
+                ordered, i.e. the position of a file in the list is the id
+                used in the orders.
+
+        Returns:
+            None
+        """
+        sort_orders = None
+        if self.args.sort_orders:
+            print_verbose("INFO : Computing the orders of the files...",
+                self.args.verbose,
+            )
+            sort_orders = build_sort_orders(files, self.args.order_by)
+        self.save_sort_orders(sort_orders)
+
+
+    def save_sort_orders(self, sort_orders):
+        """ Write the precomputed orders of the files to the destination
+        directory.
+
+        Args:
+            sort_orders (dict): The orders of the files (see the
+                "build_sort_orders" function in the "sort_orders" module) or
+                None. If None, then the orders written by an earlier build are
+                removed.
+
+        Returns:
+            None
+        """
+        written = write_sort_orders(self.get_staticfiles_dir(), sort_orders)
+        precompress(written, self.args.precompress)
+        self.count_written(written)
+
+
+    def write_facets(self, files):
+        """ Write the facet index (the keywords and authors of the files and
+        the files they occur in) to the destination directory, unless the user
+        specified otherwise via the "-facets/--facets" commandline argument.
+
+        Args:
+            files (list(dict)): A list of dictionaries. The list has been
+                ordered, i.e. the position of a file in the list is the id
+                used in the facet index.
+
+        Returns:
+            None
+        """
+        self.save_facets(
+            None if self.facets is None else self.facets.finalize(files)
+        )
+
+
+    def save_facets(self, facets):
+        """ Write a facet index to the destination directory.
+
+        Args:
+            facets (dict): A facet index (see the "finalize" method of the
+                "FacetIndex" class) or None. If None, then a facet index
+                written by an earlier build is removed.
+
+        Returns:
+            None
+        """
+        if not facets is None:
+            print_verbose(
+                f"INFO : Found {len(facets['keywords'])} keyword(s) and " + \
+                f"{len(facets['authors'])} author(s)...",
+                self.args.verbose,
+            )
+        written = write_facets(
+            self.get_staticfiles_dir(), facets,
+            shard = self.args.facet_shards,
+        )
+        precompress(written, self.args.precompress)
+        self.count_written(written)
 
 
     def check_directories(self):
@@ -141,6 +624,31 @@ class StaticIndexPage:
             print_verbose("INFO : Terminating...", self.args.verbose)
             raise SystemExit
 
+        # The static index page is published to a separate output directory.
+        # The output directory is replaced by every build, so it can not
+        # contain the content directory, and it should not be inside the
+        # content directory either (it would then be indexed itself)
+        if not self.publish_dir is None:
+            publish_dir = Path(self.publish_dir)
+            content_dir = Path(os.path.abspath(self.content_dir))
+            if publish_dir == content_dir or \
+                publish_dir in content_dir.parents or \
+                content_dir in publish_dir.parents:
+                print("ERROR: The output directory supplied via the " + \
+                    "commandline argument \"-output_dir/--output_dir\" can " + \
+                    "not contain or be contained in the content directory!")
+                print_verbose("INFO : Terminating...", self.args.verbose)
+                raise SystemExit
+            if not can_publish(self.publish_dir) and not self.args.force:
+                print(f"ERROR: The output directory {self.publish_dir} " + \
+                    "already exists and is not a symbolic link created by " + \
+                    "pysip! Remove it or include \"-force/--force\" to " + \
+                    "replace it.")
+                print_verbose("INFO : Terminating...", self.args.verbose)
+                raise SystemExit
+            # A new staging directory is used for every build
+            return
+
         # Check whether the content directory is actually a parent directory.
         # If the content directory is a parent directory and not a subdirectory,
         # then the relative paths added, in the static index page, will not be 
@@ -155,13 +663,18 @@ class StaticIndexPage:
 
         # Create/re-create the required "staticfiles" output directory if it
         # is missing/already exists
-        destination_dir = os.path.join(self.cwd, "staticfiles")
-        if os.path.exists(destination_dir):
-            print("ERROR: A directory with the name \"staticfiles\" " + \
-                "already exists in the current working directory!")
-            answer = str_to_bool(input("\n    → Do you want to " + \
-                "overwrite the files in the current \"staticfiles\" " + \
-                "directory? (yes/no):\n    → "))
+        destination_dir = self.get_staticfiles_dir()
+        # In sync mode the files in the "staticfiles" directory are updated
+        # in place (see the "copy_static_files" method)
+        if os.path.exists(destination_dir) and not self.args.sync:
+            if self.args.force:
+                answer = True
+            else:
+                print("ERROR: A directory with the name \"staticfiles\" " + \
+                    "already exists in the current working directory!")
+                answer = str_to_bool(input("\n    → Do you want to " + \
+                    "overwrite the files in the current \"staticfiles\" " + \
+                    "directory? (yes/no):\n    → "))
             if answer == True:
                 # Remove files
                 shutil.rmtree(destination_dir)
@@ -176,19 +689,27 @@ class StaticIndexPage:
 
     def set_color_palette(self):
         """ Using a certain color palette, update one or more of the colors.
+        The colors are returned and the pre-defined color palettes are left
+        unchanged, as several static index pages (each with their own colors)
+        may be generated by the same process.
         """
-        global COLOR_PALETTES
+        name = self.args.color_palette
+        original = dict(COLOR_PALETTES[name]) if name in COLOR_PALETTES \
+            else None
         update_color_palettes(
-            name = self.args.color_palette,
+            name = name,
             color1 = self.args.color1, # Page head color
             color2 = self.args.color2, # Page body color
             color3 = self.args.color3, # Page text color 1
             color4 = self.args.color4, # Page text color 2
         )
-        return COLOR_PALETTES
+        colors = COLOR_PALETTES.pop(name)
+        if not original is None:
+            COLOR_PALETTES[name] = original
+        return colors
 
 
-    def traverse_dirs(self):
+    def traverse_dirs(self, index_files = None):
         """ Go through each directory in the given directory and look
         for HTML files with the name "index.html". Extract and save 
         metadata and the relative filepath to each of these files, 
@@ -196,7 +717,9 @@ class StaticIndexPage:
         index page.
 
         Args:
-            None
+            index_files (iterable(tuple)): The (directory, path, status)
+                tuples of the "index.html" files to include. If not given,
+                then the content directory is traversed to find the files.
 
         Returns:
             files (list(dict)): A list of dictionaries. Each dictionary
@@ -204,55 +727,391 @@ class StaticIndexPage:
                 found in a directory, in the directory given via the 
                 commandline argument "-d/--content_dir"
         """
-        files = []; content_dirs = os.listdir(self.content_dir)
-        # Go through all directories
-        for item in content_dirs:
-            # Look in each directory for an "index.html" file
-            file_dir = os.path.join(self.content_dir, item)
-            content_files = os.listdir(file_dir)
-            # If an "index.html" file is found, then extract the
-            # appropriate data
-            if "index.html" in content_files:
-                file_metadata = {}
-                index_path = os.path.join(
-                    self.content_dir,
-                    item,
-                    "index.html"
-                )
-                # Use the lxml python library to parse the title and
-                # data contained in the HTML metadata tags 
-                with open(index_path) as f:
-                    parser = etree.HTMLParser()
-                    tree = etree.parse(StringIO(f.read()), parser)
-                file_metadata = self.extract_html_file_data(tree)
-                # Save the relative path to the "index.html" file
-                file_metadata["url"] = os.path.join(
-                    self.args.content_dir,
-                    item,
-                    "index.html",
+        files = []
+        for file_metadata in self.iter_files(index_files):
+            if not self.facets is None:
+                self.facets.add(file_metadata)
+            files.append(file_metadata)
+        # The copies of a file are only known once all files have been found
+        return [self.add_alternate_urls(file) for file in files]
+
+
+    def iter_files(self, index_files = None):
+        """ Same as "traverse_dirs", but the metadata of the files is handed
+        out one file at a time (in the order the files were found) as soon as
+        it is available. Only a bounded number of files are waiting to be
+        parsed by the workers (if any) at any time, i.e. the memory usage does
+        not grow with the number of files, as long as the caller does not keep
+        the files around.
+
+        Args:
+            index_files (iterable(tuple)): The (directory, path, status)
+                tuples of the "index.html" files to include. If not given,
+                then the content directory is traversed to find the files.
+
+        Returns:
+            (generator(dict)): The relative path and metadata of each file.
+        """
+        # The files found so far that have not been handed out yet as
+        # [directory, path, status, data, done, hash] lists. The data is
+        # filled in once it has been extracted
+        pending = deque(); futures = deque(); batch = []
+        # If the content of the files is hashed (see the "-content_hash/
+        # --content_hash" commandline argument), then the files that are not
+        # in the cache are read and hashed first, such that copies of other
+        # files and files that are in the cache under another name do not
+        # need to be parsed. The files are kept as (entry, future) pairs in
+        # the order they were found until that has been decided (the future
+        # is None if the hash is known from the cache). The files that have
+        # been read are then parsed from their content
+        hashing = deque(); contents = []
+        # The hashes of the files that are not left out as copies
+        hashes = set()
+        # The locations of the copies of each file, keyed by the hash of the
+        # content of the file (see the "-dedup/--dedup" commandline argument)
+        self.alternate_urls = {}
+        # The number of files found, the number of files parsed, the number
+        # of files waiting to be read or parsed and the time spent on the
+        # parsed files added together
+        found = 0; parsed = 0; waiting = 0; busy = 0.0
+        start = time.perf_counter()
+        executor, batch_size = self.create_executor()
+        pipeline = None
+        if self.args.async_io:
+            # The asyncio package is only imported when it is actually used
+            from .AsyncPipeline import AsyncPipeline
+            pipeline = AsyncPipeline(self.args.io_concurrency, executor,
+                head_only = self.args.parser == "head",
+            )
+        # The files are either handed to the workers (if any) directly or to
+        # the pipeline, which reads them before handing them to the workers
+        workers = executor if pipeline is None else pipeline
+        # The files are read and hashed by a pool of threads
+        readers = None
+        if not self.args.content_hash is None:
+            readers = ThreadPoolExecutor(max_workers = \
+                self.args.io_concurrency) if pipeline is None \
+                else pipeline.io_executor
+        # Keep enough files waiting to keep all workers busy (and all reads
+        # in flight)
+        max_waiting = batch_size * self.args.jobs * 4
+        if not pipeline is None:
+            batch_size = max(batch_size, AsyncPipeline.BATCH_SIZE)
+            max_waiting = max(max_waiting, batch_size * self.args.io_concurrency)
+        if not readers is None:
+            max_waiting = max(max_waiting, 2 * self.args.io_concurrency)
+        collect_file_metadata = get_collect_function(
+            self.args.parser, batch = not workers is None,
+            contents = not pipeline is None,
+        )
+        collect_content_metadata = get_collect_function(
+            self.args.parser, batch = not executor is None, contents = True,
+        )
+        def collect(entry, result):
+            nonlocal parsed, busy
+            entry[3] = result[0]; entry[4] = True
+            parsed += 1; busy += result[1]
+            self.stats.add_file(entry[1], result[1])
+        def submit():
+            if batch:
+                futures.append((
+                    list(batch),
+                    workers.submit(
+                        collect_file_metadata, [entry[1] for entry in batch],
+                    ),
+                ))
+                batch.clear()
+            if contents:
+                futures.append((
+                    [entry for entry, _ in contents],
+                    executor.submit(
+                        collect_content_metadata,
+                        [content for _, content in contents],
+                    ),
+                ))
+                contents.clear()
+        def decide(entry, content):
+            nonlocal waiting
+            _, index_path, st, _, _, content_hash = entry
+            # Copies of a file found earlier are not parsed. They are left
+            # out once they are handed out
+            if self.args.dedup and not content_hash is None:
+                if content_hash in hashes:
+                    entry[4] = True
+                    return
+                hashes.add(content_hash)
+            data = None
+            if not self.cache is None and not st is None:
+                data = self.cache.get(index_path, st, content_hash)
+                self.stats.count(
+                    "cache_misses" if data is None else "cache_hits",
                 )
-                # Save the name of the directory where the "index.html"
-                # file was found
-                file_metadata["dir"] = item
-                # Try to extract some additional metadata saved by the
-                # filesystem 
-                try:
-                    st = os.stat(index_path)
-                except IOError:
-                    print(
-                        "ERROR: failed to read information " + \
-                        f"about the file {index_path}!"
-                    )
+            # Only parse the files that are not in the cache
+            if not data is None:
+                entry[3] = data; entry[4] = True
+            elif not content is None and executor is None:
+                collect(entry, collect_content_metadata(content))
+            elif not content is None:
+                contents.append((entry, content)); waiting += 1
+            elif workers is None:
+                collect(entry, collect_file_metadata(index_path))
+            else:
+                batch.append(entry); waiting += 1
+            if len(batch) >= batch_size or len(contents) >= batch_size:
+                submit()
+        def decide_next():
+            nonlocal waiting
+            # The files are decided on in the order they were found, such
+            # that the first of a number of copies is the one that is kept
+            entry, future = hashing.popleft()
+            content = None
+            if not future is None:
+                content, entry[5] = future.result()
+                waiting -= 1
+                self.stats.count("files_hashed")
+            decide(entry, content)
+        def wait():
+            nonlocal waiting
+            # The oldest file that is not done yet is either still being read
+            # or in the oldest batch
+            if hashing and hashing[0][0] is pending[0] and \
+                not (futures and futures[0][1].done()):
+                decide_next()
+                return
+            if not futures:
+                submit()
+            entries, future = futures.popleft()
+            for entry, result in zip(entries, future.result()):
+                collect(entry, result)
+            waiting -= len(entries)
+        def ready(block = False):
+            # Hand out the files at the front that are done. If "block" is
+            # True, then all files are handed out
+            while pending:
+                while hashing and \
+                    (hashing[0][1] is None or hashing[0][1].done()):
+                    decide_next()
+                if not pending[0][4]:
+                    if block or waiting > max_waiting or \
+                        (futures and futures[0][1].done()):
+                        wait()
+                        continue
+                    return
+                item, index_path, st, data, _, content_hash = pending.popleft()
+                # Copies of a file handed out earlier are left out. Only the
+                # locations of the copies are kept
+                if self.args.dedup and not content_hash is None:
+                    if content_hash in self.alternate_urls:
+                        self.alternate_urls[content_hash].append(
+                            self.get_url(item),
+                        )
+                        self.stats.count("duplicates")
+                        if not self.cache is None and not st is None:
+                            self.cache.put_hash(index_path, st, content_hash)
+                        continue
+                    self.alternate_urls[content_hash] = []
+                if not self.cache is None and not st is None:
+                    self.cache.put(index_path, st, data, content_hash)
+                file_metadata = self.build_file_metadata(item, data, st)
+                # Used to add the locations of the copies of the file later on
+                if self.args.dedup and not content_hash is None:
+                    file_metadata["content_hash"] = content_hash
+                yield file_metadata
+        # The directories are walked while the files found so far are
+        # processed by the workers (if any)
+        if index_files is None:
+            index_files = self.find_index_files(pipeline)
+        try:
+            for item, index_path, st in index_files:
+                found += 1
+                self.stats.count("files_found")
+                if not st is None:
+                    self.stats.count("bytes_content", st.st_size)
+                entry = [item, index_path, st, None, False, None]
+                pending.append(entry)
+                if readers is None:
+                    decide(entry, None)
                 else:
-                    file_metadata["last_modified_formatted"] = \
-                        time.asctime(time.localtime(st[stat.ST_MTIME]))
-                    file_metadata["last_modified_raw"] = \
-                        st[stat.ST_MTIME]
-                files.append(file_metadata)
+                    future = None
+                    if not st is None:
+                        entry[5] = self.get_content_hash(index_path, st)
+                        if entry[5] is None:
+                            future = readers.submit(read_and_hash_html_file,
+                                index_path, self.args.parser == "head",
+                                self.args.content_hash,
+                            )
+                            waiting += 1
+                    hashing.append((entry, future))
+                yield from ready()
+            yield from ready(block = True)
+        finally:
+            if not pipeline is None:
+                pipeline.close()
+            elif not readers is None:
+                readers.shutdown()
+            # A shared pool of workers is shut down by its owner
+            if not executor is None and not executor is self.executor:
+                executor.shutdown()
+        elapsed = time.perf_counter() - start
+        if not self.cache is None:
+            self.cache.save()
+        # The time spent on the individual files added together is roughly
+        # the time it would have taken to process the files one at a time
         print_verbose("INFO : All necessary data has been extracted from the " + \
-            "files...", self.args.verbose,
+            f"files ({found} files found, {parsed} files parsed " + \
+            f"in {elapsed:.3f}s using {self.args.jobs} " + \
+            f"{self.args.executor} worker(s), " + \
+            f"speedup: {busy / elapsed if elapsed > 0 else 1.0:.2f}x)...",
+            self.args.verbose,
         )
-        return files
+
+
+    def get_content_hash(self, index_path, st):
+        """ Look up the hash of the content of an unchanged "index.html" file
+        in the cache, based on the "-content_hash/--content_hash" commandline
+        argument. The files whose hash is not in the cache are read and
+        hashed by the "iter_files" method.
+
+        Args:
+            index_path (str): The absolute path to the "index.html" file.
+            st (os.stat_result): The status of the "index.html" file.
+
+        Returns:
+            content_hash (str): The hash of the content of the file or None
+                if it is not in the cache.
+        """
+        if self.cache is None:
+            return None
+        prefix = f"{get_hash_function()[0]}-{self.args.content_hash}:"
+        content_hash = self.cache.get_hash(index_path, st)
+        if content_hash is None or not content_hash.startswith(prefix):
+            return None
+        return content_hash
+
+
+    def add_alternate_urls(self, file_metadata):
+        """ Add the locations of the copies of a file that were left out
+        while the files were collected (if any) to the metadata of the file.
+        Should only be called once all files have been found.
+
+        Args:
+            file_metadata (dict): The metadata of a file.
+
+        Returns:
+            file_metadata (dict): The metadata of the file.
+        """
+        content_hash = file_metadata.pop("content_hash", None)
+        if self.alternate_urls.get(content_hash):
+            file_metadata["alternate_urls"] = self.alternate_urls[content_hash]
+        return file_metadata
+
+
+    def find_index_files(self, pipeline = None):
+        """ Find all "index.html" files in the content directory, taking the
+        "-max_depth/--max_depth", "-include/--include" and "-exclude/--exclude"
+        commandline arguments into account. See the "find_index_files"
+        function in the "discover" module.
+
+        Args:
+            pipeline (AsyncPipeline): If given, then the directories are
+                listed concurrently within the event loop of the pipeline.
+
+        Returns:
+            (generator(tuple)): The (directory, path, status) tuples of the
+                "index.html" files.
+        """
+        walk = find_index_files if pipeline is None else \
+            pipeline.find_index_files
+        return walk(
+            self.content_dir,
+            max_depth = self.args.max_depth,
+            include = self.args.include,
+            exclude = self.args.exclude,
+            follow_symlinks = self.args.follow_symlinks,
+        )
+
+
+    def create_executor(self):
+        """ Create a pool of workers based on the "-jobs/--jobs" and
+        "-executor/--executor" commandline arguments.
+
+        Args:
+            None
+
+        Returns:
+            executor (concurrent.futures.Executor): A pool of workers or None
+                if the files should be processed one at a time.
+            batch_size (int): The number of files to hand to a worker at a
+                time.
+        """
+        if self.args.jobs <= 1:
+            return None, 1
+        # Hand out the files in batches to reduce the inter-process
+        # communication overhead
+        batch_size = 1 if self.args.executor == "thread" else 32
+        if not self.executor is None:
+            return self.executor, batch_size
+        if self.args.executor == "thread":
+            return ThreadPoolExecutor(max_workers = self.args.jobs), batch_size
+        # Importing the process pool (and the multiprocessing package) is
+        # slow, so it is only imported when it is used
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(max_workers = self.args.jobs), batch_size
+
+
+    def build_file_metadata(self, item, data, st):
+        """ Combine the data extracted from an "index.html" file with its
+        relative path and the metadata saved by the filesystem.
+
+        Args:
+            item (str): The name of the directory the "index.html" file was
+                found in.
+            data (dict): The data extracted from the "index.html" file.
+            st (os.stat_result): The status of the "index.html" file or None.
+
+        Returns:
+            file_metadata (dict): The complete metadata of the file.
+        """
+        file_metadata = dict(data)
+        # Copy the list of keywords as they are sorted in-place later on
+        if isinstance(file_metadata["keywords"], list):
+            file_metadata["keywords"] = list(file_metadata["keywords"])
+        # Save the relative path to the "index.html" file
+        file_metadata["url"] = self.get_url(item)
+        # Save the name of the directory where the "index.html"
+        # file was found
+        file_metadata["dir"] = item
+        if not st is None:
+            file_metadata["last_modified_formatted"] = \
+                time.asctime(time.localtime(st[stat.ST_MTIME]))
+            file_metadata["last_modified_raw"] = \
+                st[stat.ST_MTIME]
+        return file_metadata
+
+
+    def get_url(self, item):
+        """ Get the relative path to an "index.html" file, as it is linked to
+        from the static index page.
+
+        Args:
+            item (str): The name of the directory the "index.html" file was
+                found in.
+
+        Returns:
+            (str): The relative path to the "index.html" file.
+        """
+        if self.publish_dir is None:
+            return os.path.join(
+                self.args.content_dir,
+                item,
+                "index.html",
+            )
+        # The path is relative to the output directory, if one was given
+        return os.path.relpath(
+            os.path.join(self.content_dir, item, "index.html"),
+            self.publish_dir,
+        )
+
 
     def order_files(self, files):
         """ Order a set of files according to a certain user-specified
@@ -273,67 +1132,38 @@ class StaticIndexPage:
         for file in files:
             if not file["keywords"] == "":
                 file["keywords"].sort(key = lambda x: x)
-        # Order the files by date and time of when it was last
-        # modified
-        if self.args.order_by == "last_modified":
-            files.sort(key = lambda x: x["last_modified_raw"])
-        # Order the files lexicographically by author
-        elif self.args.order_by == "author":
-            files.sort(key = lambda x: x["author"])
-        # Order the files lexicographically by title
-        elif self.args.order_by == "title":
-            files.sort(key = lambda x: x["name"])
-        # Order the files lexicographically by the name of the
-        # directories they are placed in
-        elif self.args.order_by == "directory_name":
-            files.sort(key = lambda x: x["dir"])
+        key = self.get_order_key()
+        if not key is None:
+            files.sort(key = key)
         return files
 
 
-    def extract_html_file_data(self, tree):
-        """ Extract metadata from a certain HTML file represented by an 
-        object "tree".
+    def get_order_key(self):
+        """ Get the criteria the files should be ordered by, based on the
+        "-order_by/--order_by" commandline argument.
 
         Args:
-            tree (lxml.etree._ElementTree): An object representation of 
-                a certain HTML file.
-
-        Returns: A dictionary that contains the relative path and metadata
-            of an "index.html" file which was found within one of the 
-            directories in the directory which was specified via the 
-            "-d/--content_dir" commandline argument.
-        """
-        file = {}
-        # Get the title of the "index.html" document
-        title = tree.find(".//title")
-        file["name"] = title.text.strip()
-        # Get all elements of the DOM that has the meta tag
-        dom_elements = tree.findall(".//meta")
-        for element in dom_elements:
-            if "name" in element.attrib:
-                # Get all the keywords listed in the "index.html" document
-                if element.attrib["name"] == "keywords":
-                    file["keywords"] = [
-                        keyword.strip() for keyword in \
-                        element.attrib["content"].split(",")
-                    ]
-                # Get the description of "index.html" document
-                if element.attrib["name"] == "description":
-                    file["description"] = element.attrib["content"].strip()
-                # Get the author of "index.html" document
-                if element.attrib["name"] == "author":
-                    file["author"] = element.attrib["content"].strip()
-        # In case no data was read, then set a default value (empty string)
-        if not "keywords" in file:
-            file["keywords"] = ""
-        if len(file["keywords"]) == 1:
-            if file["keywords"][0] == "":
-                file["keywords"] = ""
-        if not "description" in file:
-            file["description"] = ""
-        if not "author" in file:
-            file["author"] = ""
-        return file
+            None
+
+        Returns:
+            (function): A function that returns the value a file is ordered
+                by or None if the files should not be ordered.
+        """
+        # Order the files by date and time of when they were last modified
+        # or lexicographically by title, author or the name of the
+        # directories they are placed in
+        field = ORDER_FIELDS.get(self.args.order_by)
+        if field is None:
+            return None
+        return lambda x: x[field]
+
+
+    def extract_html_file_data(self, tree):
+        """ Extract metadata from a certain HTML file represented by an
+        object "tree". See the "extract_html_file_data" function in the
+        "extract" module.
+        """
+        return extract_html_file_data(tree)
 
 
     def copy_static_files(self):
@@ -347,13 +1177,27 @@ class StaticIndexPage:
         )
         print_verbose(
             "INFO : Copying files to directory: " + \
-            str(os.path.join(self.cwd, "staticfiles")),
+            str(self.get_staticfiles_dir()),
             self.args.verbose,
         )
+        if self.args.sync:
+            # Only copy the files that have changed
+            copied, unchanged = sync_files(
+                staticfiles_dir,
+                self.get_staticfiles_dir(),
+            )
+            self.stats.count("assets_copied", copied)
+            self.stats.count("assets_unchanged", unchanged)
+            print_verbose(
+                f"INFO : Files synced successfully ({copied} copied, " + \
+                f"{unchanged} unchanged)!",
+                self.args.verbose,
+            )
+            return
         try:
             shutil.copytree(
                 staticfiles_dir,
-                os.path.join(self.cwd, "staticfiles"),
+                self.get_staticfiles_dir(),
             ) 
             print_verbose(
                 "INFO : Files copied successfully!",
@@ -382,19 +1226,58 @@ class StaticIndexPage:
                 object which contains the paths to all the necessary
                 templates that will need to be rendered.
         """
+        if not self.jinja_templates is None:
+            return self.jinja_templates
+        # The jinja2 package is only imported when the templates are needed
+        import jinja2           # pip install jinja2
+        # Cache the compiled templates between runs
+        bytecode_cache = None
+        if self.args.cache:
+            bytecode_dir = os.path.join(self.cache_dir, "jinja")
+            os.makedirs(bytecode_dir, exist_ok = True)
+            bytecode_cache = jinja2.FileSystemBytecodeCache(bytecode_dir)
         try:
             jinja_templates = jinja2.Environment(
                 autoescape = True,
                 loader = jinja2.FileSystemLoader(
                     searchpath = self.template_dir,
                 ),
+                bytecode_cache = bytecode_cache,
             )
         except KeyError as e:
             print("ERROR: Template directory not defined!")
             print("ERROR: ", e)
+        # Hash all templates (and not only the ones that are rendered) as
+        # templates may include or extend each other
+        h = hashlib.blake2b(digest_size = 16)
+        for name in jinja_templates.list_templates():
+            h.update(name.encode("utf-8"))
+            h.update(jinja_templates.loader.get_source(
+                jinja_templates, name,
+            )[0].encode("utf-8"))
+        self.templates_hash = h.hexdigest()
+        self.jinja_templates = jinja_templates
         return jinja_templates
 
 
+    def get_template_vars(self):
+        """ Get the values to use when rendering the templates.
+
+        Args:
+            None
+
+        Returns:
+            template_vars (dict): The colors of the user-specified color
+                palette and the features that are enabled in the static
+                index page.
+        """
+        template_vars = dict(self.color_palette)
+        template_vars["search_index"] = self.args.search_index
+        template_vars["sort_orders"] = self.args.sort_orders
+        template_vars["facets"] = self.args.facets
+        return template_vars
+
+
     def render_template(self, jinja_templates, template_vars, 
         template_name, outfile):
         """ Given a template name and a dictionary "template_vars" of
@@ -412,9 +1295,35 @@ class StaticIndexPage:
         Returns:
             None
         """
+        # Skip the template if the output file was rendered from the same
+        # templates and values before and has not been modified since
+        key = None
+        if not self.render_cache is None and \
+            not self.templates_hash is None:
+            key = RenderCache.key(
+                self.templates_hash, template_name, template_vars,
+            )
+            if self.render_cache.is_fresh(outfile, key,
+                self.output_dir,
+            ):
+                self.stats.count("templates_cached")
+                return
         template = jinja_templates.select_template([template_name])
-        with open(outfile, "w") as file:
-            print(template.render(**template_vars), file = file)
+        content = template.render(**template_vars) + "\n"
+        self.stats.count("templates_rendered")
+        # Leave the output file alone if its content has not changed
+        try:
+            with open(outfile) as file:
+                unchanged = file.read() == content
+        except (FileNotFoundError, UnicodeDecodeError):
+            unchanged = False
+        # Render into a temporary file that then replaces the output file,
+        # such that a web server never serves a partially written file
+        if not unchanged:
+            write_atomic(outfile, content)
+            self.count_written([outfile])
+        if not key is None:
+            self.render_cache.put(outfile, key, self.output_dir)
 
 
     def render_templates(self, jinja_templates, template_vars):
@@ -431,7 +1340,7 @@ class StaticIndexPage:
         Returns:
             None
         """
-        destination_dir = os.path.join(self.cwd, "staticfiles")
+        destination_dir = self.get_staticfiles_dir()
         # - Render the index.css file
         self.render_template(
             jinja_templates,
@@ -439,7 +1348,7 @@ class StaticIndexPage:
             # The template file to use. Should not be changed:
             "index.html.jinja",
             # Specify the correct directory to place the file in
-            os.path.join(self.cwd, "index.html"), 
+            os.path.join(self.output_dir, "index.html"),
         )
         # - Render the index.css file
         self.render_template(
@@ -461,6 +1370,8 @@ class StaticIndexPage:
             # the file in
             os.path.join(destination_dir, "main_image.svg"), 
         )
+        if not self.render_cache is None:
+            self.render_cache.save()
 
 
 # Main function call...
@@ -473,6 +1384,13 @@ def main():
 
     # Get the given commandline arguments
     args = CommandLineArgs().args
+    # Generate a number of static index pages if the user specified so via
+    # the "-batch/--batch" commandline argument. The "batch" module is
+    # imported here, as it depends on this module
+    if not args.batch is None:
+        from .batch import run_batch
+        run_batch(args, sys.argv[1:])
+        return
     # Generate a static index page 
     StaticIndexPage(args)
 
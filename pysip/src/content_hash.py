@@ -0,0 +1,115 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#               Import packages from the python standard library               #
+#------------------------------------------------------------------------------#
+import hashlib
+import re
+
+
+#------------------------------------------------------------------------------#
+#                           Global variables & methods                         #
+#------------------------------------------------------------------------------#
+# The parts of a file that can be hashed: only the head section (up to and
+# including the closing "</head>" tag, or the whole file if there is none) or
+# the whole file
+CONTENT_HASH_MODES = ["head", "file"]
+
+# The number of bytes read at a time when hashing a file
+CHUNK_SIZE = 1 << 16
+
+# The end of the head section of an HTML document
+HEAD_END = b"</head>"
+HEAD_END_PATTERN = re.compile(re.escape(HEAD_END), re.IGNORECASE)
+
+# The hash function (once it has been looked up)
+_HASH_FUNCTION = None
+
+
+#------------------------------------------------------------------------------#
+def get_hash_function():
+    """ Get the function used to hash the content of the files. The fast
+    (non-cryptographic) xxHash algorithm is used if the optional "xxhash"
+    package is installed, otherwise BLAKE2 is used.
+
+    Args:
+        None
+
+    Returns:
+        name (str): The name of the hash algorithm.
+        new (function): A function that creates a new hash object.
+    """
+    global _HASH_FUNCTION
+    if _HASH_FUNCTION is None:
+        try:
+            import xxhash # pip install xxhash
+            _HASH_FUNCTION = ("xxh3_128", xxhash.xxh3_128)
+        except ImportError:
+            _HASH_FUNCTION = \
+                ("blake2b", lambda: hashlib.blake2b(digest_size = 16))
+    return _HASH_FUNCTION
+
+
+def hash_file(path, mode = "file"):
+    """ Compute the hash of the content of a file. The file is read a chunk at
+    a time. The hash is prefixed with the name of the hash algorithm and the
+    part of the file that was hashed, such that hashes computed in different
+    ways never match.
+
+    Args:
+        path (str): The path to the file.
+        mode (str): Either "head" (only the head section of the HTML document
+            is hashed) or "file" (the whole file is hashed).
+
+    Returns:
+        (str): The hash of the content of the file.
+    """
+    name, new = get_hash_function()
+    h = new()
+    # The last bytes of the previous chunk, in case "</head>" is split across
+    # two chunks
+    tail = b""
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            if mode == "head":
+                window = (tail + chunk).lower()
+                end = window.find(HEAD_END)
+                if end >= 0:
+                    h.update(chunk[:end + len(HEAD_END) - len(tail)])
+                    break
+                tail = window[-(len(HEAD_END) - 1):]
+            h.update(chunk)
+    return f"{name}-{mode}:{h.hexdigest()}"
+
+
+def hash_data(data, mode = "file", complete = True):
+    """ Compute the same hash as "hash_file" from the content of a file that
+    has already been read, e.g. by the workers that parse the file, such
+    that the file does not have to be read twice.
+
+    Args:
+        data (bytes): The (start of the) content of the file (or any object
+            that supports the buffer protocol, for example a memory-map).
+        mode (str): Either "head" or "file" (see "hash_file").
+        complete (bool): Whether "data" is the whole content of the file.
+
+    Returns:
+        (str): The hash of the content of the file or None if more of the
+            file is needed than was given.
+    """
+    if mode == "head":
+        match = HEAD_END_PATTERN.search(data)
+        if not match is None:
+            data = data[:match.end()]
+        elif not complete:
+            return None
+    elif not complete:
+        return None
+    name, new = get_hash_function()
+    h = new()
+    h.update(data)
+    return f"{name}-{mode}:{h.hexdigest()}"
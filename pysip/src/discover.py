@@ -0,0 +1,272 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#               Import packages from the python standard library               #
+#------------------------------------------------------------------------------#
+import fnmatch
+import os
+
+
+#------------------------------------------------------------------------------#
+def matches(rel_dir, patterns):
+    """ Check whether a directory matches any of a number of glob patterns.
+    A pattern is matched against both the path of the directory (relative to
+    the content directory) and the name of the directory.
+
+    Args:
+        rel_dir (str): The path to a directory relative to the content
+            directory.
+        patterns (list(str)): A list of glob patterns, e.g. "2020/*".
+
+    Returns:
+        (bool): True if the directory matches at least one of the patterns.
+    """
+    rel_dir = rel_dir.replace(os.sep, "/")
+    name = rel_dir.rsplit("/", 1)[-1]
+    for pattern in patterns:
+        if fnmatch.fnmatchcase(rel_dir, pattern) or \
+            fnmatch.fnmatchcase(name, pattern):
+            return True
+    return False
+
+
+def find_index_files(content_dir, max_depth = 1, include = None,
+    exclude = None, follow_symlinks = True, filename = "index.html"):
+    """ Walk the content directory and find all directories that contain an
+    "index.html" file. The directories are visited depth-first (in the order
+    of their names, such that the order does not depend on the filesystem)
+    and the results are yielded as soon as they are found, such that they
+    can be processed while the walk is still going on.
+
+    Args:
+        content_dir (str): The absolute path to the content directory.
+        max_depth (int): How many levels below the content directory that
+            are searched. A value of 1 only searches the directories placed
+            directly in the content directory. A value of 0 means no limit.
+        include (list(str)): If given, only directories that match at least
+            one of these glob patterns are included in the results. Their
+            subdirectories are still searched.
+        exclude (list(str)): Directories that match one of these glob
+            patterns are skipped together with all of their subdirectories.
+        follow_symlinks (bool): Whether symbolic links to directories should
+            be followed. Each directory is visited at most once, i.e. links
+            that point back to a parent directory do not cause an endless
+            loop.
+        filename (str): The name of the files to look for.
+
+    Yields:
+        rel_dir (str): The path to the directory relative to the content
+            directory.
+        index_path (str): The absolute path to the "index.html" file.
+        st (os.stat_result): The status of the "index.html" file or None if
+            the status could not be read.
+    """
+    include = include or []
+    exclude = exclude or []
+    # Keep track of the (device, inode) pairs of the directories that have
+    # been visited to protect against symbolic link loops
+    visited = set()
+    try:
+        st = os.stat(content_dir)
+        visited.add((st.st_dev, st.st_ino))
+    except OSError:
+        pass
+    # A stack of (absolute path, relative path, depth) tuples. The children
+    # of a directory are pushed in reverse order, such that they are popped
+    # (and thus yielded) in the order of their names
+    stack = [(content_dir, "", 0)]
+    while stack:
+        path, rel_dir, depth = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key = lambda entry: entry.name)
+        except OSError as e:
+            print(f"ERROR: Could not read the directory {path}!")
+            print("ERROR: ", e)
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.name == filename and depth > 0 and \
+                    entry.is_file():
+                    if not include or matches(rel_dir, include):
+                        # The "DirEntry" object caches the result of the
+                        # "stat" call, i.e. the file is only stat'ed once
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            print(
+                                "ERROR: failed to read information " + \
+                                f"about the file {entry.path}!"
+                            )
+                            st = None
+                        yield rel_dir, entry.path, st
+                elif (max_depth == 0 or depth < max_depth) and \
+                    entry.is_dir(follow_symlinks = follow_symlinks):
+                    subdirs.append(entry)
+            except OSError:
+                continue
+        for entry in reversed(subdirs):
+            child = os.path.join(rel_dir, entry.name) if rel_dir \
+                else entry.name
+            if exclude and matches(child, exclude):
+                continue
+            try:
+                st = entry.stat(follow_symlinks = follow_symlinks)
+            except OSError:
+                continue
+            if (st.st_dev, st.st_ino) in visited:
+                continue
+            visited.add((st.st_dev, st.st_ino))
+            stack.append((entry.path, child, depth + 1))
+
+
+def scan_dir(path, filename = "index.html", list_subdirs = True,
+    follow_symlinks = True):
+    """ List a directory and read the status of the "index.html" file and of
+    the subdirectories in it. All blocking calls made for a directory are
+    made here, such that they can be run by a thread (see
+    "find_index_files_async").
+
+    Args:
+        path (str): The absolute path to the directory.
+        filename (str): The name of the files to look for.
+        list_subdirs (bool): Whether the subdirectories should be listed.
+        follow_symlinks (bool): Whether symbolic links to directories should
+            be followed.
+
+    Returns:
+        index (tuple): The absolute path to the "index.html" file and its
+            status (None if the status could not be read), or None if the
+            directory does not contain the file.
+        subdirs (list(tuple)): The (name, absolute path, status) of each
+            subdirectory in the order of their names.
+        None is returned if the directory could not be read.
+    """
+    try:
+        with os.scandir(path) as it:
+            entries = sorted(it, key = lambda entry: entry.name)
+    except OSError as e:
+        print(f"ERROR: Could not read the directory {path}!")
+        print("ERROR: ", e)
+        return None
+    index = None; subdirs = []
+    for entry in entries:
+        try:
+            if entry.name == filename and entry.is_file():
+                try:
+                    st = entry.stat()
+                except OSError:
+                    st = None
+                index = (entry.path, st)
+            elif list_subdirs and \
+                entry.is_dir(follow_symlinks = follow_symlinks):
+                try:
+                    st = entry.stat(follow_symlinks = follow_symlinks)
+                except OSError:
+                    continue
+                subdirs.append((entry.name, entry.path, st))
+        except OSError:
+            continue
+    return index, subdirs
+
+
+async def find_index_files_async(content_dir, max_depth = 1, include = None,
+    exclude = None, follow_symlinks = True, filename = "index.html",
+    concurrency = 16, executor = None):
+    """ Walk the content directory like "find_index_files", but list (and
+    stat) a number of directories at the same time. On a network filesystem
+    each of these calls is a round trip to the server, which would otherwise
+    be made one after the other. Only the next "concurrency" directories the
+    walk is going to visit are listed ahead of the walk (and at most
+    "concurrency" at the same time), i.e. the number of pending listings
+    does not grow with the size of the content directory. The results are
+    still yielded in the same (depth-first) order as by "find_index_files".
+
+    Args:
+        content_dir (str): The absolute path to the content directory.
+        max_depth (int): See "find_index_files".
+        include (list(str)): See "find_index_files".
+        exclude (list(str)): See "find_index_files".
+        follow_symlinks (bool): See "find_index_files".
+        filename (str): The name of the files to look for.
+        concurrency (int): The maximum number of directories that are listed
+            at the same time.
+        executor (concurrent.futures.Executor): The pool of threads that
+            makes the blocking calls. If None, then the default executor of
+            the event loop is used.
+
+    Yields:
+        rel_dir (str): The path to the directory relative to the content
+            directory.
+        index_path (str): The absolute path to the "index.html" file.
+        st (os.stat_result): The status of the "index.html" file or None if
+            the status could not be read.
+    """
+    # The asyncio package is only imported when it is actually used
+    import asyncio
+    include = include or []
+    exclude = exclude or []
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    # The (pending) listings of the directories by their absolute paths
+    scans = {}
+
+    async def scan(path, depth):
+        list_subdirs = max_depth == 0 or depth < max_depth
+        async with semaphore:
+            return await loop.run_in_executor(executor, scan_dir, path,
+                filename, list_subdirs, follow_symlinks,
+            )
+
+    def prefetch():
+        # Start listing the directories at the top of the stack (the ones
+        # the walk visits next) before the walk gets to them
+        for path, _, depth in stack[-concurrency:]:
+            if not path in scans:
+                scans[path] = loop.create_task(scan(path, depth))
+
+    visited = set()
+    try:
+        st = os.stat(content_dir)
+        visited.add((st.st_dev, st.st_ino))
+    except OSError:
+        pass
+    # The walk itself is the same as in "find_index_files", except that the
+    # listings are taken from the tasks started ahead of it
+    stack = [(content_dir, "", 0)]
+    try:
+        while stack:
+            path, rel_dir, depth = stack.pop()
+            task = scans.pop(path, None)
+            if task is None:
+                task = loop.create_task(scan(path, depth))
+            result = await task
+            if result is None:
+                prefetch()
+                continue
+            index, subdirs = result
+            for name, child_path, st in reversed(subdirs):
+                child = os.path.join(rel_dir, name) if rel_dir else name
+                if exclude and matches(child, exclude):
+                    continue
+                if (st.st_dev, st.st_ino) in visited:
+                    continue
+                visited.add((st.st_dev, st.st_ino))
+                stack.append((child_path, child, depth + 1))
+            prefetch()
+            if not index is None and depth > 0 and \
+                (not include or matches(rel_dir, include)):
+                index_path, st = index
+                if st is None:
+                    print("ERROR: failed to read information " + \
+                        f"about the file {index_path}!"
+                    )
+                yield rel_dir, index_path, st
+    finally:
+        for task in scans.values():
+            task.cancel()
@@ -0,0 +1,130 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#               Import packages from the python standard library               #
+#------------------------------------------------------------------------------#
+import heapq
+import json
+import os
+import tempfile
+
+
+#------------------------------------------------------------------------------#
+#                           Global variables & methods                         #
+#------------------------------------------------------------------------------#
+# The maximum number of runs that are merged at a time. If there are more
+# runs, then they are first merged into fewer (larger) runs, such that the
+# number of files open at the same time stays bounded
+MERGE_FAN_IN = 64
+
+
+#------------------------------------------------------------------------------#
+def write_run(run_dir, index, run):
+    """ Write a sorted run to a spill file. Each line of the file holds the
+    .json data of a (key, record) pair.
+
+    Args:
+        run_dir (str): The directory to write the spill file to.
+        index (int): The index of the run (used in the name of the file).
+        run (iterable(list)): The sorted (key, record) pairs.
+
+    Returns:
+        path (str): The path to the spill file.
+    """
+    path = os.path.join(run_dir, f"run_{index:06d}.jsonl")
+    with open(path, "w", encoding = "utf-8") as file:
+        for pair in run:
+            file.write(json.dumps(pair, separators = (",", ":")))
+            file.write("\n")
+    return path
+
+
+def read_run(path):
+    """ Read the (key, record) pairs of a sorted run back from a spill file.
+    The file is removed once all pairs have been read.
+
+    Args:
+        path (str): The path to the spill file.
+
+    Returns:
+        (generator(list)): The (key, record) pairs.
+    """
+    with open(path, encoding = "utf-8") as file:
+        for line in file:
+            yield json.loads(line)
+    os.remove(path)
+
+
+def merge_runs(paths):
+    """ Merge a number of sorted runs. The merge is stable: if two pairs have
+    the same key, then the pair from the run that was written first comes
+    first.
+
+    Args:
+        paths (list(str)): The paths to the spill files, in the order the runs
+            were written.
+
+    Returns:
+        (generator(list)): The (key, record) pairs in sorted order.
+    """
+    return heapq.merge(*[read_run(path) for path in paths],
+        key = lambda pair: pair[0],
+    )
+
+
+def external_sort(records, key, buffer_size, tmp_dir = None):
+    """ Sort a (possibly very large) stream of records while keeping at most
+    "buffer_size" records in memory. The records are collected in a buffer
+    that is sorted and spilled to a temporary file (a "run") whenever it is
+    full. The runs are then merged, i.e. read back one record at a time. If
+    all records fit in the buffer, then nothing is written to disk. Like
+    "list.sort", the sort is stable.
+
+    The records and their keys need to be .json serializable. Keys are
+    compared after a round trip through .json, i.e. tuples become lists.
+
+    Args:
+        records (iterable): The records to sort.
+        key (function): A function that returns the key of a record.
+        buffer_size (int): The maximum number of records kept in memory.
+        tmp_dir (str): The directory to create the temporary files in. If
+            None, then the default temporary directory is used.
+
+    Returns:
+        (generator): The sorted records.
+    """
+    buffer = []; paths = []
+    with tempfile.TemporaryDirectory(prefix = "pysip-sort-",
+        dir = tmp_dir) as run_dir:
+        for record in records:
+            buffer.append([key(record), record])
+            if len(buffer) >= buffer_size:
+                # "list.sort" is stable, and so are the merges below
+                buffer.sort(key = lambda pair: pair[0])
+                paths.append(write_run(run_dir, len(paths), buffer))
+                buffer = []
+        buffer.sort(key = lambda pair: pair[0])
+        if not paths:
+            for _, record in buffer:
+                yield record
+            return
+        if buffer:
+            paths.append(write_run(run_dir, len(paths), buffer))
+        del buffer
+        # Merge the runs in passes until they can be merged at once. Adjacent
+        # runs are merged together, which keeps the merge stable
+        index = len(paths)
+        while len(paths) > MERGE_FAN_IN:
+            merged = []
+            for start in range(0, len(paths), MERGE_FAN_IN):
+                merged.append(write_run(run_dir, index,
+                    merge_runs(paths[start:start + MERGE_FAN_IN]),
+                ))
+                index += 1
+            paths = merged
+        for _, record in merge_runs(paths):
+            yield record
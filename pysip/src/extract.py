@@ -0,0 +1,481 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#                               Import local code                              #
+#------------------------------------------------------------------------------#
+from .content_hash import (
+    HEAD_END,
+    hash_data,
+    hash_file,
+)
+#------------------------------------------------------------------------------#
+#               Import packages from the python standard library               #
+#------------------------------------------------------------------------------#
+import codecs
+import mmap
+import os
+import re
+import time
+from contextlib import contextmanager
+from functools import partial
+
+
+#------------------------------------------------------------------------------#
+#                           Global variables & methods                         #
+#------------------------------------------------------------------------------#
+# The lxml package is only imported when a file is actually parsed, such that
+# a rebuild that takes all data from the metadata cache does not pay for it
+
+# The number of bytes read at a time when only the head of a HTML file is
+# parsed. The character encoding of a file is detected from its first chunk
+CHUNK_SIZE = 16384
+
+# The tags that end the head of a HTML document (see "read_html_file")
+HEAD_END_TAGS = [b"</head", b"<body"]
+
+# A declaration of the character encoding of a HTML document, either
+# <meta charset="..."> or <meta http-equiv="Content-Type"
+# content="text/html; charset=...">
+CHARSET_PATTERN = re.compile(
+    rb"<meta[^>]*?charset\s*=\s*[\"']?\s*([a-z0-9._:+-]+)", re.IGNORECASE,
+)
+
+# Files larger than this (in bytes) are memory-mapped when they are parsed in
+# full. Smaller files are faster to read
+MMAP_THRESHOLD = 1 << 16
+
+# The byte order marks that lxml detects by itself
+BOMS = (codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+
+
+#------------------------------------------------------------------------------#
+# The functions in this module are defined at module level (and not as methods
+# of the "StaticIndexPage" class) such that they can be pickled and sent to the
+# worker processes of a process pool.
+#------------------------------------------------------------------------------#
+def detect_encoding(data):
+    """ Detect the character encoding of a HTML file from its first bytes:
+    a byte order mark, a <meta charset> declaration or, if there is none,
+    UTF-8 if the bytes are valid UTF-8 and otherwise windows-1252 (the
+    fallback used by web browsers).
+
+    Args:
+        data (bytes): The first bytes of an "index.html" file.
+
+    Returns:
+        (str): The name of the character encoding or None if the file starts
+            with a byte order mark.
+    """
+    if data.startswith(BOMS):
+        return None
+    match = CHARSET_PATTERN.search(data)
+    if not match is None:
+        try:
+            return codecs.lookup(match.group(1).decode("ascii")).name
+        except LookupError:
+            pass
+    if data.isascii():
+        return "utf-8"
+    try:
+        data.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # The last character can be cut off at the end of the bytes
+        if e.reason != "unexpected end of data":
+            return "cp1252"
+    return "utf-8"
+
+
+def create_html_parser(encoding, pull = False):
+    """ Create a parser that is fed the bytes of a HTML file.
+
+    Args:
+        encoding (str): The character encoding of the file (see
+            "detect_encoding").
+        pull (bool): Whether an incremental parser that reports the start and
+            end of each element should be created.
+
+    Returns:
+        parser (lxml.etree.HTMLParser): The parser.
+        decoder (codecs.IncrementalDecoder): None if the bytes can be fed to
+            the parser directly. Otherwise the encoding is not known to lxml
+            and the bytes should be decoded by this decoder first.
+    """
+    from lxml import etree  # pip install lxml
+    kwargs = {"events": ("start", "end")} if pull else {}
+    create = etree.HTMLPullParser if pull else etree.HTMLParser
+    try:
+        return create(encoding = encoding, **kwargs), None
+    except LookupError:
+        # Not all encodings known to python are known to lxml (libxml2)
+        decoder = codecs.getincrementaldecoder(encoding)(errors = "replace")
+        return create(**kwargs), decoder
+
+
+@contextmanager
+def open_html_file(index_path):
+    """ Get the whole content of a HTML file. Large files are memory-mapped,
+    i.e. their bytes are handed to lxml without being read into (and decoded
+    by) python. Used as:
+
+        with open_html_file(index_path) as data:
+            ...
+
+    Args:
+        index_path (str): The absolute path to an "index.html" file.
+
+    Returns:
+        data (bytes): The content of the file (or a memory-map of the file,
+            which is only valid within the "with" block).
+    """
+    with open(index_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size <= MMAP_THRESHOLD:
+            yield f.read()
+            return
+        try:
+            data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Files on some filesystems can not be memory-mapped
+            yield f.read()
+            return
+        with data:
+            yield data
+
+
+def parse_html_file(index_path):
+    """ Read and parse a HTML file (see "open_html_file").
+
+    Args:
+        index_path (str): The absolute path to an "index.html" file.
+
+    Returns:
+        tree (lxml.etree._ElementTree): An object representation of the
+            HTML file.
+    """
+    with open_html_file(index_path) as data:
+        return parse_html_bytes(data)
+
+
+def parse_html_bytes(data):
+    """ Parse the content of a HTML file.
+
+    Args:
+        data (bytes): The content of an "index.html" file (or any object that
+            supports the buffer protocol, for example a memory-map).
+
+    Returns:
+        tree (lxml.etree._ElementTree): An object representation of the
+            HTML file.
+    """
+    from lxml import etree  # pip install lxml
+    # Use the lxml python library to parse the title and data contained in
+    # the HTML metadata tags
+    parser, decoder = create_html_parser(detect_encoding(data[:CHUNK_SIZE]))
+    if not decoder is None:
+        data = decoder.decode(data, final = True)
+    return etree.ElementTree(etree.fromstring(data, parser))
+
+
+def parse_html_head(index_path):
+    """ Read and parse only the head of a HTML file. The file is read in
+    chunks and fed to an incremental parser. Reading stops as soon as the
+    end of the head (or the start of the body) of the document is reached,
+    i.e. large documents (for example jupyter notebooks with embedded images)
+    are not read in full.
+
+    Args:
+        index_path (str): The absolute path to an "index.html" file.
+
+    Returns:
+        tree (lxml.etree._ElementTree): An object representation of the
+            head of the HTML file. None is returned if the document does not
+            contain a title before the start of the body. In that case the
+            whole document should be parsed instead.
+    """
+    with open(index_path, "rb") as f:
+        tree, _ = parse_html_head_chunks(iter(lambda: f.read(CHUNK_SIZE), b""))
+    return tree
+
+
+def parse_html_head_chunks(chunks):
+    """ Feed the chunks of a HTML file to an incremental parser until the end
+    of the head (or the start of the body) of the document is reached.
+
+    Args:
+        chunks (iterable(bytes)): The content of an "index.html" file in
+            chunks of "CHUNK_SIZE" bytes.
+
+    Returns:
+        tree (lxml.etree._ElementTree): See "parse_html_head".
+        done (bool): Whether the end of the head was reached. If not, then
+            all chunks were fed to the parser.
+    """
+    from lxml import etree  # pip install lxml
+    parser = None
+    done = False
+    for chunk in chunks:
+        if parser is None:
+            parser, decoder = \
+                create_html_parser(detect_encoding(chunk), pull = True)
+        parser.feed(chunk if decoder is None else decoder.decode(chunk))
+        for event, element in parser.read_events():
+            if (event == "end" and element.tag == "head") or \
+                (event == "start" and element.tag == "body"):
+                done = True
+                break
+        if done:
+            break
+    if parser is None:
+        return None, done
+    if not decoder is None:
+        parser.feed(decoder.decode(b"", final = True))
+    root = parser.close()
+    if root is None or root.find(".//title") is None:
+        return None, done
+    return etree.ElementTree(root), done
+
+
+def read_html_file(index_path, head_only = True, hash_mode = None):
+    """ Read the content of a HTML file, such that it can be parsed elsewhere
+    (see "collect_content_metadata"). If only the head of the document is
+    needed, then reading stops at the end of the chunk (of "CHUNK_SIZE"
+    bytes) that contains the end of the head, i.e. at the point where
+    "parse_html_head" would stop reading. If the file is hashed as well, then
+    enough of the file is read to compute the hash.
+
+    Args:
+        index_path (str): The absolute path to an "index.html" file.
+        head_only (bool): Whether only the head of the file is needed.
+        hash_mode (str): The part of the file that is hashed ("head" or
+            "file", see the "hash_file" function in the "content_hash"
+            module) or None.
+
+    Returns:
+        index_path (str): The absolute path to the "index.html" file.
+        data (bytes): The (start of the) content of the file.
+        complete (bool): Whether the whole file was read.
+    """
+    # The hash of the head section covers everything up to "</head>", even
+    # if the body starts before it
+    end_tags = HEAD_END_TAGS if hash_mode is None else [HEAD_END]
+    with open(index_path, "rb") as f:
+        if not head_only or hash_mode == "file":
+            return index_path, f.read(), True
+        chunks = []; tail = b""
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return index_path, b"".join(chunks), True
+            chunks.append(chunk)
+            # The tags can be split across two chunks
+            window = (tail + chunk).lower()
+            if any(tag in window for tag in end_tags):
+                return index_path, b"".join(chunks), False
+            tail = window[-(max(map(len, end_tags)) - 1):]
+
+
+def read_and_hash_html_file(index_path, head_only = True, hash_mode = "file"):
+    """ Read the content of a HTML file (see "read_html_file") and compute the
+    hash of the content from the same bytes, such that it can be decided
+    whether the file needs to be parsed at all (see the "-content_hash/
+    --content_hash" commandline argument) without reading it twice.
+
+    Args:
+        index_path (str): The absolute path to an "index.html" file.
+        head_only (bool): Whether only the head of the file is needed.
+        hash_mode (str): The part of the file that is hashed.
+
+    Returns:
+        content (tuple): The (index_path, data, complete) of the file. If only
+            the head of the file is needed, then the data is cut off where
+            "read_html_file" would stop reading without hashing.
+        content_hash (str): The hash of the content of the file.
+    """
+    index_path, data, complete = read_html_file(index_path, head_only,
+        hash_mode,
+    )
+    content_hash = hash_data(data, hash_mode, complete)
+    if content_hash is None:
+        content_hash = hash_file(index_path, hash_mode)
+    if head_only:
+        # Only keep the chunks that are fed to the parser
+        lower = data.lower()
+        ends = [
+            lower.find(tag) + len(tag) for tag in HEAD_END_TAGS
+            if tag in lower
+        ]
+        if ends:
+            end = -(-min(ends) // CHUNK_SIZE) * CHUNK_SIZE
+            if end < len(data):
+                data = data[:end]; complete = False
+    return (index_path, data, complete), content_hash
+
+
+def extract_html_file_data(tree):
+    """ Extract metadata from a certain HTML file represented by an
+    object "tree".
+
+    Args:
+        tree (lxml.etree._ElementTree): An object representation of
+            a certain HTML file.
+
+    Returns: A dictionary that contains the relative path and metadata
+        of an "index.html" file which was found within one of the
+        directories in the directory which was specified via the
+        "-d/--content_dir" commandline argument.
+    """
+    file = {}
+    # Get the title of the "index.html" document
+    title = tree.find(".//title")
+    file["name"] = title.text.strip()
+    # Get all elements of the DOM that has the meta tag
+    dom_elements = tree.findall(".//meta")
+    for element in dom_elements:
+        if "name" in element.attrib:
+            # Get all the keywords listed in the "index.html" document
+            if element.attrib["name"] == "keywords":
+                file["keywords"] = [
+                    keyword.strip() for keyword in \
+                    element.attrib["content"].split(",")
+                ]
+            # Get the description of "index.html" document
+            if element.attrib["name"] == "description":
+                file["description"] = element.attrib["content"].strip()
+            # Get the author of "index.html" document
+            if element.attrib["name"] == "author":
+                file["author"] = element.attrib["content"].strip()
+    # In case no data was read, then set a default value (empty string)
+    if not "keywords" in file:
+        file["keywords"] = ""
+    if len(file["keywords"]) == 1:
+        if file["keywords"][0] == "":
+            file["keywords"] = ""
+    if not "description" in file:
+        file["description"] = ""
+    if not "author" in file:
+        file["author"] = ""
+    return file
+
+
+def collect_file_metadata(index_path, head_only = True):
+    """ Read, parse and extract all metadata of a single "index.html" file.
+
+    Args:
+        index_path (str): The absolute path to the "index.html" file.
+        head_only (bool): Whether only the head of the file should be parsed.
+            The whole file is still parsed if no title was found in the head.
+
+    Returns:
+        file_metadata (dict): The metadata of the "index.html" file.
+        elapsed (float): The time (in seconds) it took to process the file.
+    """
+    start = time.perf_counter()
+    tree = None
+    if head_only:
+        tree = parse_html_head(index_path)
+    # Fall back to parsing the whole document
+    if tree is None:
+        tree = parse_html_file(index_path)
+    file_metadata = extract_html_file_data(tree)
+    return file_metadata, time.perf_counter() - start
+
+
+def collect_files_metadata(index_paths, head_only = True):
+    """ Read, parse and extract all metadata of a batch of "index.html" files.
+    Handing out files in batches reduces the overhead of sending work to the
+    workers of a process pool.
+
+    Args:
+        index_paths (list(str)): The absolute paths to "index.html" files.
+        head_only (bool): Whether only the head of the files should be
+            parsed.
+
+    Returns:
+        results (list(tuple)): A list of (metadata, elapsed time) pairs in
+            the same order as the paths.
+    """
+    return [
+        collect_file_metadata(index_path, head_only = head_only)
+        for index_path in index_paths
+    ]
+
+
+def collect_content_metadata(content, head_only = True):
+    """ Parse and extract all metadata of a single "index.html" file that has
+    already been read by "read_html_file". The result is the same as that of
+    "collect_file_metadata". If more of the file is needed than was read,
+    then the file is read again.
+
+    Args:
+        content (tuple): The (index_path, data, complete) returned by
+            "read_html_file".
+        head_only (bool): Whether only the head of the file should be parsed.
+
+    Returns:
+        file_metadata (dict): The metadata of the "index.html" file.
+        elapsed (float): The time (in seconds) it took to parse the file.
+    """
+    index_path, data, complete = content
+    start = time.perf_counter()
+    tree = None
+    if head_only:
+        # Feed the same chunks as "parse_html_head" would read
+        tree, done = parse_html_head_chunks(
+            data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)
+        )
+        if not done and not complete:
+            tree = parse_html_head(index_path)
+    # Fall back to parsing the whole document
+    if tree is None:
+        tree = parse_html_bytes(data) if complete else \
+            parse_html_file(index_path)
+    file_metadata = extract_html_file_data(tree)
+    return file_metadata, time.perf_counter() - start
+
+
+def collect_contents_metadata(contents, head_only = True):
+    """ Parse and extract all metadata of a batch of "index.html" files that
+    have already been read by "read_html_file".
+
+    Args:
+        contents (list(tuple)): The (index_path, data, complete) of each file.
+        head_only (bool): Whether only the head of the files should be
+            parsed.
+
+    Returns:
+        results (list(tuple)): A list of (metadata, elapsed time) pairs in
+            the same order as the contents.
+    """
+    return [
+        collect_content_metadata(content, head_only = head_only)
+        for content in contents
+    ]
+
+
+def get_collect_function(parser, batch = False, contents = False):
+    """ Get a (picklable) function that extracts the metadata of a single
+    "index.html" file using the given parser.
+
+    Args:
+        parser (str): Either "head" (only parse the head of a file) or "full"
+            (parse the whole file).
+        batch (bool): Whether the function should process a batch of files.
+        contents (bool): Whether the function takes the content of the files
+            returned by "read_html_file" instead of their paths.
+
+    Returns:
+        (functools.partial): A function with the signature
+            "f(index_path) -> (file_metadata, elapsed)" or, if "batch" is
+            True, "f(index_paths) -> [(file_metadata, elapsed), ...]".
+    """
+    head_only = parser == "head"
+    if contents:
+        if batch:
+            return partial(collect_contents_metadata, head_only = head_only)
+        return partial(collect_content_metadata, head_only = head_only)
+    if batch:
+        return partial(collect_files_metadata, head_only = head_only)
+    return partial(collect_file_metadata, head_only = head_only)
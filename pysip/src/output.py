@@ -0,0 +1,527 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#               Import packages from the python standard library               #
+#------------------------------------------------------------------------------#
+from contextlib import contextmanager
+import gzip
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import tempfile
+
+
+#------------------------------------------------------------------------------#
+#                           Global variables & methods                         #
+#------------------------------------------------------------------------------#
+# The fields of an entry in the compact format (in the order they are stored
+# in). The "last_modified_formatted" field is left out as it can be derived
+# from the "last_modified_raw" field. The "alternate_urls" field is left out
+# of the entries of files without copies
+COMPACT_FIELDS = [
+    "name", "description", "author", "keywords", "url", "dir",
+    "last_modified_raw", "alternate_urls",
+]
+
+# The file extensions of the supported pre-compressed formats
+PRECOMPRESS_FORMATS = ["gz", "br"]
+
+# The number of bytes read at a time when a file is pre-compressed
+COMPRESS_CHUNK_SIZE = 1 << 20
+
+
+#------------------------------------------------------------------------------#
+def write_atomic(path, content):
+    """ Write a file. The content is first written to a temporary file which
+    then replaces the old file, such that a browser never loads a partially
+    written file.
+
+    Args:
+        path (str): The path to the file.
+        content (str or bytes): The content of the file.
+
+    Returns:
+        None
+    """
+    with open_atomic(path, "wb" if isinstance(content, bytes) else "w") \
+        as file:
+        file.write(content)
+
+
+def create_temp_file(path):
+    """ Create an empty temporary file next to a file, which replaces the file
+    (see "os.replace") once it has been written. Each temporary file gets a
+    new name, such that two runs that write the same file at the same time
+    never write to the same temporary file.
+
+    Args:
+        path (str): The path to the file.
+
+    Returns:
+        tmp_path (str): The path to the temporary file.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir = os.path.dirname(path) or ".",
+        prefix = "." + os.path.basename(path) + ".",
+        suffix = ".tmp",
+    )
+    os.close(fd)
+    # The file is created readable by its owner only. The static index page
+    # needs to be readable by a web server
+    os.chmod(tmp_path, 0o644)
+    return tmp_path
+
+
+@contextmanager
+def open_atomic(path, mode = "w"):
+    """ Open a file for writing, such that the content can be written a piece
+    at a time. Like "write_atomic", the content is written to a temporary file
+    which replaces the old file once the file is closed. If an error occurs,
+    then the old file is left untouched. Used as:
+
+        with open_atomic(path) as file:
+            file.write(...)
+
+    Args:
+        path (str): The path to the file.
+        mode (str): Either "w" (text) or "wb" (bytes).
+
+    Returns:
+        (file): The (temporary) file to write the content to.
+    """
+    tmp_path = create_temp_file(path)
+    try:
+        with open(tmp_path, mode) as file:
+            yield file
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+
+def encode_compact(files):
+    """ Encode a list of files in a compact format. Each file is stored as
+    a list of values (instead of a dictionary), i.e. the keys are not repeated
+    for each file. Authors and keywords are stored once in a table of strings
+    and are referred to by their index in that table.
+
+    Args:
+        files (list(dict)): A list of dictionaries. Each dictionary contains
+            information about a certain "index.html" file.
+
+    Returns:
+        (dict): The "fields", the table of "strings" and the "rows" (one per
+            file).
+    """
+    strings = []; string_ids = {}
+    def string_id(s):
+        if not s in string_ids:
+            string_ids[s] = len(strings)
+            strings.append(s)
+        return string_ids[s]
+    rows = []
+    for file in files:
+        rows.append(encode_compact_row(file, string_id))
+    return {"fields": COMPACT_FIELDS, "strings": strings, "rows": rows}
+
+
+def dump_files(file, files, compact = False):
+    """ Serialize a list of files to .json data and write it to a file one
+    entry at a time, i.e. without building the entire .json data in memory.
+    The output is the same as that of "dumps_files", except that the table of
+    strings of the compact format is written after the rows (as it is only
+    complete once all rows have been written).
+
+    Args:
+        file (file): The file to write the .json data to.
+        files (iterable(dict)): The dictionaries that contain information
+            about each "index.html" file. May be a generator.
+        compact (bool): Whether the compact format should be used (without
+            any indentation).
+
+    Returns:
+        count (int): The number of entries written.
+    """
+    count = 0
+    if compact:
+        strings = []; string_ids = {}
+        def string_id(s):
+            if not s in string_ids:
+                string_ids[s] = len(strings)
+                strings.append(s)
+            return string_ids[s]
+        file.write("{\"fields\":" + \
+            json.dumps(COMPACT_FIELDS, separators = (",", ":")) + \
+            ",\"rows\":[")
+        for f in files:
+            row = encode_compact_row(f, string_id)
+            file.write(("," if count > 0 else "") + \
+                json.dumps(row, separators = (",", ":")))
+            count += 1
+        file.write("],\"strings\":" + \
+            json.dumps(strings, separators = (",", ":")) + "}")
+        return count
+    # Matches the output of "json.dumps(files, indent = 4)". The .json data
+    # of an entry never contains a (raw) newline other than the ones added by
+    # the indentation
+    for f in files:
+        file.write(",\n    " if count > 0 else "[\n    ")
+        file.write(json.dumps(f, indent = 4).replace("\n", "\n    "))
+        count += 1
+    file.write("\n]" if count > 0 else "[]")
+    return count
+
+
+def encode_compact_row(file, string_id):
+    """ Encode a file as a row of the compact format.
+
+    Args:
+        file (dict): Information about a certain "index.html" file.
+        string_id (function): A function that returns the index of a string
+            in the table of strings.
+
+    Returns:
+        row (list): The values of the fields of the file.
+    """
+    row = [
+        file["name"],
+        file["description"],
+        string_id(file["author"]),
+        [string_id(keyword) for keyword in file["keywords"]],
+        file["url"],
+        file["dir"],
+        file.get("last_modified_raw", 0),
+    ]
+    if file.get("alternate_urls"):
+        row.append(file["alternate_urls"])
+    return row
+
+
+def dumps_files(files, compact = False):
+    """ Serialize a list of files to .json data.
+
+    Args:
+        files (list(dict)): A list of dictionaries. Each dictionary contains
+            information about a certain "index.html" file.
+        compact (bool): Whether the compact format should be used (without
+            any indentation).
+
+    Returns:
+        (str): The .json data.
+    """
+    if compact:
+        return json.dumps(encode_compact(files), separators = (",", ":"))
+    return json.dumps(files, indent = 4)
+
+
+def precompress(paths, formats):
+    """ Write pre-compressed copies of a number of files next to the files,
+    such that a static file server can serve the compressed data directly.
+    Pre-compressed copies in formats that were not requested are removed, as
+    they would otherwise be served with outdated content.
+
+    Args:
+        paths (list(str)): The paths to the files to compress.
+        formats (list(str)): The formats to compress the files with. Either
+            "gz" (gzip) and/or "br" (brotli). Brotli requires the optional
+            "brotli" package.
+
+    Returns:
+        None
+    """
+    brotli = None
+    if "br" in formats:
+        try:
+            import brotli # pip install brotli
+        except ImportError:
+            print("ERROR: The \"brotli\" package is not installed! " + \
+                "Skipping brotli compression.")
+    for path in paths:
+        # The files are compressed a chunk at a time, as they can be large
+        for extension in PRECOMPRESS_FORMATS:
+            compressed_path = path + "." + extension
+            if extension == "gz" and "gz" in formats:
+                with open(path, "rb") as file, \
+                    open_atomic(compressed_path, "wb") as out:
+                    # Setting "mtime" (and leaving out the name of the file)
+                    # makes the output reproducible
+                    with gzip.GzipFile(filename = "", mode = "wb",
+                        compresslevel = 9, fileobj = out, mtime = 0) as gz:
+                        shutil.copyfileobj(file, gz, COMPRESS_CHUNK_SIZE)
+            elif extension == "br" and not brotli is None:
+                with open(path, "rb") as file, \
+                    open_atomic(compressed_path, "wb") as out:
+                    compressor = brotli.Compressor()
+                    for chunk in iter(
+                        lambda: file.read(COMPRESS_CHUNK_SIZE), b""):
+                        out.write(compressor.process(chunk))
+                    out.write(compressor.finish())
+            elif os.path.exists(compressed_path):
+                os.remove(compressed_path)
+
+
+def write_file_list(destination_dir, files, compact = False):
+    """ Write all the collected data to a single Javascript file
+    "filelist.js" that defines the variable "FILE_LIST".
+
+    Args:
+        destination_dir (str): The "staticfiles" directory.
+        files (iterable(dict)): The dictionaries that contain information
+            about each "index.html" file. The entries are written one at a
+            time, i.e. this may be a generator.
+        compact (bool): Whether the compact format should be used.
+
+    Returns:
+        written (list(str)): The paths of the files that were written.
+    """
+    path = os.path.join(destination_dir, "filelist.js")
+    with open_atomic(path) as file:
+        file.write("var FILE_LIST = ")
+        dump_files(file, files, compact)
+    # Remove the shards of an earlier sharded build (if any)
+    remove_shards(destination_dir, keep = 0)
+    return [path]
+
+
+def shard_path(destination_dir, index):
+    """ Get the path to a shard of the list of files.
+
+    Args:
+        destination_dir (str): The "staticfiles" directory.
+        index (int): The index of the shard.
+
+    Returns:
+        (str): The path to the shard.
+    """
+    return os.path.join(destination_dir, "filelist", f"shard_{index:05d}.js")
+
+
+def remove_shards(destination_dir, keep):
+    """ Remove the shards that are left over from an earlier build.
+
+    Args:
+        destination_dir (str): The "staticfiles" directory.
+        keep (int): The number of shards written by the current build. All
+            shards with a higher index are removed.
+
+    Returns:
+        None
+    """
+    shard_dir = os.path.join(destination_dir, "filelist")
+    if not os.path.isdir(shard_dir):
+        return
+    for name in os.listdir(shard_dir):
+        # Also remove pre-compressed copies of the shards
+        if not (name.startswith("shard_") and ".js" in name):
+            continue
+        try:
+            index = int(name[len("shard_"):name.index(".js")])
+        except ValueError:
+            continue
+        if index >= keep:
+            os.remove(os.path.join(shard_dir, name))
+
+
+def write_sharded_file_list(destination_dir, files, shard_size,
+    compact = False):
+    """ Split the collected data into shards of a fixed size. Each shard is
+    written to a separate Javascript file that is only loaded by the static
+    index page when the entries it contains are about to be shown. The
+    "filelist.js" file then only contains a small manifest that defines the
+    variable "FILE_LIST_MANIFEST".
+
+    Args:
+        destination_dir (str): The "staticfiles" directory.
+        files (iterable(dict)): The dictionaries that contain information
+            about each "index.html" file. Only one shard is kept in memory at
+            a time, i.e. this may be a generator.
+        shard_size (int): The (maximum) number of entries in each shard.
+        compact (bool): Whether the compact format should be used. Each
+            shard then has its own table of strings.
+
+    Returns:
+        written (list(str)): The paths of the files that were written.
+    """
+    os.makedirs(os.path.join(destination_dir, "filelist"), exist_ok = True)
+    written = []; shards = []; count = 0
+    files = iter(files)
+    # The shards are written before the manifest, such that the manifest
+    # never refers to a shard that does not exist yet
+    for index in itertools.count():
+        shard = list(itertools.islice(files, shard_size))
+        if not shard:
+            break
+        count += len(shard)
+        path = shard_path(destination_dir, index)
+        # Each shard registers itself with the static index page when it has
+        # been loaded. Using a script (instead of plain .json data) means the
+        # static index page also works when it is opened from the filesystem
+        write_atomic(path,
+            f"loadFileListShard({index}, " + \
+            dumps_files(shard, compact) + ");\n"
+        )
+        written.append(path)
+        shards.append(
+            os.path.relpath(path, os.path.dirname(destination_dir)) \
+                .replace(os.sep, "/")
+        )
+    manifest = {
+        "count": count,
+        "shard_size": shard_size,
+        "shards": shards,
+    }
+    path = os.path.join(destination_dir, "filelist.js")
+    write_atomic(path,
+        "var FILE_LIST = null;\n" + \
+        "var FILE_LIST_MANIFEST = " + \
+            json.dumps(manifest, indent = None if compact else 4) + ";\n"
+    )
+    written.append(path)
+    remove_shards(destination_dir, keep = len(shards))
+    return written
+
+
+def write_search_index(destination_dir, search_index):
+    """ Write a search index to the Javascript file "searchindex.js" that
+    defines the variable "SEARCH_INDEX".
+
+    Args:
+        destination_dir (str): The "staticfiles" directory.
+        search_index (dict): A search index (see the "build_search_index"
+            function in the "search" module) or None. If None, then a search
+            index written by an earlier build is removed.
+
+    Returns:
+        written (list(str)): The paths of the files that were written.
+    """
+    path = os.path.join(destination_dir, "searchindex.js")
+    if search_index is None:
+        for extension in [""] + ["." + f for f in PRECOMPRESS_FORMATS]:
+            if os.path.exists(path + extension):
+                os.remove(path + extension)
+        return []
+    write_atomic(path,
+        "var SEARCH_INDEX = " + \
+        json.dumps(search_index, separators = (",", ":")) + ";\n"
+    )
+    return [path]
+
+
+def write_sort_orders(destination_dir, sort_orders):
+    """ Write the precomputed orders of the files to the Javascript file
+    "sortorders.js" that defines the variable "SORT_ORDERS".
+
+    Args:
+        destination_dir (str): The "staticfiles" directory.
+        sort_orders (dict): The orders of the files (see the
+            "build_sort_orders" function in the "sort_orders" module) or None.
+            If None, then the orders written by an earlier build are removed.
+
+    Returns:
+        written (list(str)): The paths of the files that were written.
+    """
+    path = os.path.join(destination_dir, "sortorders.js")
+    if sort_orders is None:
+        for extension in [""] + ["." + f for f in PRECOMPRESS_FORMATS]:
+            if os.path.exists(path + extension):
+                os.remove(path + extension)
+        return []
+    write_atomic(path,
+        "var SORT_ORDERS = " + \
+        json.dumps(sort_orders, separators = (",", ":")) + ";\n"
+    )
+    return [path]
+
+
+def write_facets(destination_dir, facets, shard = False):
+    """ Write a facet index to the Javascript file "facets.js" that defines
+    the variable "FACETS". If "shard" is True, then the ids of the files of
+    each facet value are written to a separate Javascript file, which is only
+    loaded by the static index page when the facet value is selected.
+
+    Args:
+        destination_dir (str): The "staticfiles" directory.
+        facets (dict): A facet index (see the "finalize" method of the
+            "FacetIndex" class) or None. If None, then a facet index written
+            by an earlier build is removed.
+        shard (bool): Whether the ids of the files of each facet value should
+            be written to separate files.
+
+    Returns:
+        written (list(str)): The paths of the files that were written.
+    """
+    path = os.path.join(destination_dir, "facets.js")
+    facet_dir = os.path.join(destination_dir, "facets")
+    # Remove the facet index of an earlier build. "facets.js" is removed
+    # first, such that it never refers to a shard that has been removed
+    if facets is None:
+        for extension in [""] + ["." + f for f in PRECOMPRESS_FORMATS]:
+            if os.path.exists(path + extension):
+                os.remove(path + extension)
+        if os.path.isdir(facet_dir):
+            shutil.rmtree(facet_dir)
+        return []
+    # The shards are written before "facets.js" and the shards of an earlier
+    # build are only removed afterwards, such that "facets.js" never refers
+    # to a shard that does not exist (see "write_sharded_file_list")
+    written = []
+    if shard:
+        os.makedirs(facet_dir, exist_ok = True)
+        for facet, values in facets.items():
+            for value, entry in values.items():
+                content = "loadFacetShard(" + json.dumps(facet) + ", " + \
+                    json.dumps(value) + ", " + \
+                    json.dumps(entry["ids"], separators = (",", ":")) + ");\n"
+                # The name of a shard is derived from its content, such that a
+                # client (or a cache) that still holds the "facets.js" file
+                # of an earlier build never loads a shard with other content
+                # under the same name. A shard that is unchanged is not
+                # written again
+                digest = hashlib.sha1(content.encode("utf-8")).hexdigest()
+                shard_file = os.path.join(facet_dir,
+                    f"{facet}_{digest[:12]}.js",
+                )
+                if not os.path.exists(shard_file):
+                    write_atomic(shard_file, content)
+                written.append(shard_file)
+                values[value] = {
+                    "count": entry["count"],
+                    "shard": os.path.relpath(
+                        shard_file, os.path.dirname(destination_dir),
+                    ).replace(os.sep, "/"),
+                }
+    write_atomic(path,
+        "var FACETS = " + json.dumps(facets, separators = (",", ":")) + ";\n"
+    )
+    remove_facet_shards(facet_dir, keep = written)
+    written.append(path)
+    return written
+
+
+def remove_facet_shards(facet_dir, keep):
+    """ Remove the shards of a facet index that are left over from an earlier
+    build.
+
+    Args:
+        facet_dir (str): The directory the shards are placed in.
+        keep (list(str)): The paths of the shards written by the current
+            build. All other shards are removed.
+
+    Returns:
+        None
+    """
+    if not os.path.isdir(facet_dir):
+        return
+    keep = set(os.path.basename(shard_file) for shard_file in keep)
+    for name in os.listdir(facet_dir):
+        # Also remove pre-compressed copies of the shards
+        if not ".js" in name or name[:name.index(".js") + 3] in keep:
+            continue
+        os.remove(os.path.join(facet_dir, name))
@@ -0,0 +1,105 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#               Import packages from the python standard library               #
+#------------------------------------------------------------------------------#
+import os
+import shutil
+import tempfile
+
+
+#------------------------------------------------------------------------------#
+# A static index page is published to an output directory "site" as follows:
+# the static index page is built in a staging directory ".site.XXXX" next to
+# the output directory. The output directory is a symbolic link that is then
+# switched over to the staging directory in a single atomic step, i.e. readers
+# either see the old or the new static index page, but never a mix of the two.
+#------------------------------------------------------------------------------#
+def get_staging_prefix(output_dir):
+    """ Get the prefix of the names of the staging directories of an output
+    directory.
+
+    Args:
+        output_dir (str): The path to the output directory.
+
+    Returns:
+        (str): The prefix.
+    """
+    return "." + os.path.basename(os.path.abspath(output_dir)) + "."
+
+
+def create_staging_dir(output_dir):
+    """ Create a new (empty) staging directory next to an output directory.
+
+    Args:
+        output_dir (str): The path to the output directory.
+
+    Returns:
+        (str): The absolute path to the staging directory.
+    """
+    parent = os.path.dirname(os.path.abspath(output_dir))
+    os.makedirs(parent, exist_ok = True)
+    staging_dir = tempfile.mkdtemp(
+        prefix = get_staging_prefix(output_dir), dir = parent,
+    )
+    # The directory is created readable by its owner only. The static index
+    # page needs to be readable by a web server
+    os.chmod(staging_dir, 0o755)
+    return staging_dir
+
+
+def can_publish(output_dir):
+    """ Check whether a static index page can be published atomically to an
+    output directory, i.e. whether the output directory does not exist yet or
+    is a symbolic link.
+
+    Args:
+        output_dir (str): The path to the output directory.
+
+    Returns:
+        (bool): True if the output directory can be replaced atomically.
+    """
+    return os.path.islink(output_dir) or not os.path.exists(output_dir)
+
+
+def publish(staging_dir, output_dir):
+    """ Publish a static index page that has been built in a staging
+    directory, by atomically pointing the output directory (a symbolic link)
+    to the staging directory. The staging directory that was published before
+    (if any) is removed afterwards. If the output directory exists but is not
+    a symbolic link, then it is removed first (which is not atomic).
+
+    Args:
+        staging_dir (str): The path to the staging directory.
+        output_dir (str): The path to the output directory.
+
+    Returns:
+        None
+    """
+    output_dir = os.path.abspath(output_dir)
+    previous_dir = None
+    if os.path.islink(output_dir):
+        previous_dir = os.path.realpath(output_dir)
+    elif os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    elif os.path.exists(output_dir):
+        os.remove(output_dir)
+    # The link is relative, such that the output directory and its staging
+    # directories can be moved together
+    tmp_link = output_dir + ".tmp"
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(os.path.basename(staging_dir), tmp_link)
+    os.replace(tmp_link, output_dir)
+    # Only remove staging directories created by pysip
+    if not previous_dir is None and \
+        previous_dir != os.path.realpath(staging_dir) and \
+        os.path.dirname(previous_dir) == os.path.dirname(output_dir) and \
+        os.path.basename(previous_dir).startswith(
+            get_staging_prefix(output_dir)
+        ):
+        shutil.rmtree(previous_dir, ignore_errors = True)
@@ -0,0 +1,108 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#               Import packages from the python standard library               #
+#------------------------------------------------------------------------------#
+import re
+import unicodedata
+
+
+#------------------------------------------------------------------------------#
+#                           Global variables & methods                         #
+#------------------------------------------------------------------------------#
+# The pattern used to split text into tokens. The same pattern is used by the
+# static index page (see "staticfiles/index.js") to split a search query into
+# tokens
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+#------------------------------------------------------------------------------#
+def tokenize(text):
+    """ Split a text into lowercase tokens. The text is normalized (NFC)
+    before it is lowercased, like the static index page does with a search
+    query, such that the same word always gives the same token.
+
+    Args:
+        text (str): A text.
+
+    Returns:
+        (list(str)): The tokens contained in the text.
+    """
+    return TOKEN_PATTERN.findall(unicodedata.normalize("NFC", text).lower())
+
+
+def token_sort_key(token):
+    """ Get the key that a token is sorted by. The static index page compares
+    strings by their UTF-16 code units (and not by their code points like
+    python does), i.e. the tokens need to be sorted in that order for the
+    binary search of the static index page to work.
+
+    Args:
+        token (str): A token.
+
+    Returns:
+        (bytes): The token encoded as UTF-16 (big endian).
+    """
+    return token.encode("utf-16-be", "surrogatepass")
+
+
+def build_search_index(files):
+    """ Build an inverted index of the titles, authors and keywords of a list
+    of files. Each token is mapped to a sorted list of the ids (the positions
+    in the given list) of the files that contain the token. The tokens are
+    sorted, such that the static index page can find all tokens that start
+    with a certain prefix by a binary search.
+
+    Args:
+        files (list(dict)): A list of dictionaries. Each dictionary contains
+            information about a certain "index.html" file.
+
+    Returns:
+        (dict): The sorted "tokens" and the "postings" (a list of file ids for
+            each token).
+    """
+    postings = {}
+    for file_id, file in enumerate(files):
+        add_to_search_index(postings, file_id, file)
+    return finalize_search_index(postings)
+
+
+def add_to_search_index(postings, file_id, file):
+    """ Add the tokens of a file to a search index that is being built. The
+    files need to be added in the order of their ids.
+
+    Args:
+        postings (dict): The ids of the files (so far) that contain each
+            token.
+        file_id (int): The id of the file.
+        file (dict): The metadata of an "index.html" file.
+
+    Returns:
+        None
+    """
+    text = " ".join([file["name"], file["author"]] + list(file["keywords"]))
+    for token in set(tokenize(text)):
+        postings.setdefault(token, []).append(file_id)
+
+
+def finalize_search_index(postings):
+    """ Sort the tokens of a search index that has been built by
+    "add_to_search_index".
+
+    Args:
+        postings (dict): The ids of the files that contain each token.
+
+    Returns:
+        (dict): The sorted "tokens" and the "postings" (a list of file ids for
+            each token).
+    """
+    tokens = sorted(postings, key = token_sort_key)
+    # The files are visited in order, i.e. each list of ids is already sorted
+    return {
+        "tokens": tokens,
+        "postings": [postings[token] for token in tokens],
+    }
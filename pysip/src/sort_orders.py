@@ -0,0 +1,80 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#                           Global variables & methods                         #
+#------------------------------------------------------------------------------#
+# The orders the files can be shown in and the field of a file that each
+# order is based on (see the "-order_by/--order_by" commandline argument)
+ORDER_FIELDS = {
+    "last_modified": "last_modified_raw",
+    "title": "name",
+    "author": "author",
+    "directory_name": "dir",
+}
+
+
+#------------------------------------------------------------------------------#
+def build_sort_orders(files, default):
+    """ Precompute the orders the files can be shown in, such that the static
+    index page can switch between them without sorting the files itself. Each
+    order is a permutation of the ids of the files (their positions in the
+    given list): the ids in the order the files should be shown in. Files
+    with the same value keep their relative order (i.e. the default order).
+
+    Args:
+        files (list(dict)): A list of dictionaries. The list has been
+            ordered, i.e. the position of a file in the list is its id.
+        default (str): The order the files are already in (see the
+            "-order_by/--order_by" commandline argument). This order is left
+            out, as its permutation is simply 0, 1, 2, ...
+
+    Returns:
+        (dict): The "default" order and the permutation of each of the other
+            "orders".
+    """
+    keys = {}
+    for file in files:
+        add_to_sort_orders(keys, file)
+    return finalize_sort_orders(keys, default)
+
+
+def add_to_sort_orders(keys, file):
+    """ Add the values of a file that the files are ordered by to a set of
+    orders that is being built. The files need to be added in the order of
+    their ids.
+
+    Args:
+        keys (dict): The values (so far) of the files for each order.
+        file (dict): The metadata of an "index.html" file.
+
+    Returns:
+        None
+    """
+    for order_by, field in ORDER_FIELDS.items():
+        keys.setdefault(order_by, []).append(file.get(field, 0))
+
+
+def finalize_sort_orders(keys, default):
+    """ Compute the permutations of a set of orders that has been built by
+    "add_to_sort_orders".
+
+    Args:
+        keys (dict): The values of the files for each order.
+        default (str): The order the files are already in.
+
+    Returns:
+        (dict): The "default" order and the permutation of each of the other
+            "orders".
+    """
+    orders = {}
+    for order_by in ORDER_FIELDS:
+        if order_by == default:
+            continue
+        values = keys.get(order_by, [])
+        # "sorted" is stable, i.e. ties are broken by the id of the files
+        orders[order_by] = sorted(range(len(values)), key = values.__getitem__)
+    return {"default": default, "orders": orders}
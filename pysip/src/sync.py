@@ -0,0 +1,104 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#                               Import local code                              #
+#------------------------------------------------------------------------------#
+from .output import create_temp_file
+#------------------------------------------------------------------------------#
+#               Import packages from the python standard library               #
+#------------------------------------------------------------------------------#
+import hashlib
+import os
+import shutil
+
+
+#------------------------------------------------------------------------------#
+#                           Global variables & methods                         #
+#------------------------------------------------------------------------------#
+# The number of bytes read at a time when hashing a file
+HASH_CHUNK_SIZE = 1 << 20
+
+
+#------------------------------------------------------------------------------#
+def file_hash(path):
+    """ Compute the hash of the content of a file.
+
+    Args:
+        path (str): The path to the file.
+
+    Returns:
+        (str): The hash of the content of the file.
+    """
+    h = hashlib.blake2b()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def is_unchanged(source, destination):
+    """ Check whether a file has already been copied. The files are compared
+    by size and time of the last modification first, and only by their
+    content (hash) if the times differ.
+
+    Args:
+        source (str): The path to the source file.
+        destination (str): The path to the copy.
+
+    Returns:
+        (bool): True if the copy has the same content as the source file.
+    """
+    try:
+        dst = os.stat(destination)
+    except FileNotFoundError:
+        return False
+    src = os.stat(source)
+    if src.st_size != dst.st_size:
+        return False
+    if src.st_mtime_ns == dst.st_mtime_ns:
+        return True
+    if file_hash(source) != file_hash(destination):
+        return False
+    # Same content: update the time of the last modification, such that the
+    # file does not need to be hashed again next time
+    shutil.copystat(source, destination)
+    return True
+
+
+def sync_files(source_dir, destination_dir):
+    """ Copy the files in a directory (and its subdirectories) to another
+    directory, skipping the files that have not changed since they were last
+    copied. Each file is copied to a temporary file first, which then
+    atomically replaces the old copy, such that a web server never serves a
+    partially copied file. Files in the destination directory that are not
+    in the source directory are left alone.
+
+    Args:
+        source_dir (str): The directory to copy the files from.
+        destination_dir (str): The directory to copy the files to.
+
+    Returns:
+        copied (int): The number of files that were copied.
+        unchanged (int): The number of files that were skipped.
+    """
+    copied = 0; unchanged = 0
+    for dir_path, _, file_names in os.walk(source_dir):
+        target_dir = os.path.join(
+            destination_dir, os.path.relpath(dir_path, source_dir),
+        )
+        os.makedirs(target_dir, exist_ok = True)
+        for file_name in file_names:
+            source = os.path.join(dir_path, file_name)
+            destination = os.path.join(target_dir, file_name)
+            if is_unchanged(source, destination):
+                unchanged += 1
+                continue
+            tmp_path = create_temp_file(destination)
+            shutil.copy2(source, tmp_path)
+            os.replace(tmp_path, destination)
+            copied += 1
+    return copied, unchanged
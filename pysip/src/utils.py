@@ -7,6 +7,8 @@
 #------------------------------------------------------------------------------#
 #               Import packages from the python standard library               #
 #------------------------------------------------------------------------------#
+import hashlib
+import os
 import re
 
 
@@ -105,3 +107,40 @@ def print_verbose(s, v):
     if v:
         print(s)
 
+
+
+def get_user_cache_dir():
+    """ Get the directory where pysip caches data for the current user. The
+    directory is placed outside of the static index page, such that the
+    cached data is never served along with it.
+
+    Args:
+        None
+
+    Returns:
+        (str): "$XDG_CACHE_HOME/pysip" ("~/.cache/pysip" if not set, or
+            "%LOCALAPPDATA%/pysip" on Windows).
+    """
+    base_dir = os.environ.get("XDG_CACHE_HOME") or \
+        os.environ.get("LOCALAPPDATA") or \
+        os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base_dir, "pysip")
+
+
+def get_site_cache_dir(cache_dir, site_dir):
+    """ Get the cache directory of a site. Each site gets its own directory,
+    as the cached data of the sites would otherwise replace each other.
+
+    Args:
+        cache_dir (str): The directory the cache directories of the sites
+            are placed in.
+        site_dir (str): The directory the static index page of the site is
+            written to.
+
+    Returns:
+        (str): The cache directory of the site.
+    """
+    name = hashlib.blake2b(
+        os.path.abspath(site_dir).encode("utf-8"), digest_size = 8,
+    ).hexdigest()
+    return os.path.join(cache_dir, "sites", name)
@@ -13,24 +13,47 @@ function setIndexPageFooter(footer) {
     document.getElementById("footer").innerHTML = footer;
 }
 
-// Add a single item/page to the grid displayed in the static index page
-function addPage(parentDom, name, description, author, keywords, url) {
-    var pageItem = document.createElement("li");
-    pageItem.className = "content-item";
+// Wrap a keyword or an author in an element that can be clicked to show only
+// the items/pages with that keyword or author
+function facetValue(facet, value, clickable) {
+    if (!clickable) return value;
+    return '<span class="facet" data-facet="' + facet + '">' + value + '</span>';
+}
+
+// List the locations of the copies of an item/page (if any)
+function alternateLinks(alternateUrls) {
+    if (!alternateUrls || alternateUrls.length === 0) return '';
+    var links = [];
+    for (var i = 0; i < alternateUrls.length; i++) {
+        // Show the name of the directory the copy was found in
+        var parts = alternateUrls[i].split("/");
+        var label = parts.length > 1 ? parts[parts.length - 2] : alternateUrls[i];
+        links.push('<a href="' + alternateUrls[i] + '" target="_blank">' + label + '</a>');
+    }
+    return '<div class="alternates"><span>' + '‣ Also in: ' + links.join(', ') + '</span></div>';
+}
+
+// Show a single item/page in an element of the grid displayed in the static
+// index page. The elements of the grid are reused for different items/pages
+function fillPage(pageItem, name, description, author, keywords, url, clickable, alternateUrls) {
     var header = '<a href="' + url + '" target="_blank"></a>' + '<h3>' + name + '</h3>';
     var authorName;
     if (author === '') {
         authorName = '<div class="author"><span>' + ' ' + '</span></div>';
     }
     else {
-        authorName = '<div class="author"><span>' + '‣ ' + author + '</span></div>';
+        authorName = '<div class="author"><span>' + '‣ ' + facetValue("authors", author, clickable) + '</span></div>';
     }
     var keywordsList;
     if (keywords === '') {
         keywordsList = '<div class="keywords"><span>' + ' ' + '</span></div>';
     }
     else {
-        keywordsList = '<div class="keywords"><span>' + '‣ ' + keywords.join(', ') + '</span></div>';
+        var values = [];
+        for (var i = 0; i < keywords.length; i++) {
+            values.push(facetValue("keywords", keywords[i], clickable));
+        }
+        keywordsList = '<div class="keywords"><span>' + '‣ ' + values.join(', ') + '</span></div>';
     }
     var pageDescription;
     if (description === '') {
@@ -39,30 +62,577 @@ function addPage(parentDom, name, description, author, keywords, url) {
     else {
         pageDescription = '<p class="text">' + description + '</p>';
     }
-    pageItem.innerHTML = header + pageDescription + authorName  + keywordsList;
-    parentDom.appendChild(pageItem);
+    pageItem.innerHTML = header + pageDescription + authorName  + keywordsList + alternateLinks(alternateUrls);
+}
+
+// The number of items/pages that are added to the grid to find out how many
+// columns the grid has
+var PAGE_SIZE = 60;
+
+// Items/pages are kept in the grid as long as they are at most this many
+// pixels above or below the visible part of the page
+var RENDER_MARGIN = 800;
+
+// The height (in pixels) assumed for a row of the grid before any row has
+// been measured
+var DEFAULT_ROW_HEIGHT = 150;
+
+// The collection of items/pages shown in the static index page. The items are
+// either all contained in the "FILE_LIST" variable or they are split into
+// shards (described by the "FILE_LIST_MANIFEST" variable) which are loaded on
+// demand
+var FILE_COLLECTION = null;
+
+// Create a collection of items/pages
+function createFileCollection(file_list, manifest) {
+    var collection = {
+        count: 0,
+        // The items/pages that have been loaded (and decoded) so far
+        entries: [],
+        // Items/pages in the compact format that have not been decoded yet
+        rows: [],
+        tables: [],
+        shardSize: 0,
+        shards: [],
+        // Callbacks waiting for a certain shard to be loaded
+        pending: {},
+    };
+    if (manifest) {
+        collection.count = manifest.count;
+        collection.shardSize = manifest.shard_size;
+        collection.shards = manifest.shards;
+        collection.entries = new Array(manifest.count);
+    }
+    else if (Array.isArray(file_list)) {
+        collection.count = file_list.length;
+        collection.entries = file_list;
+    }
+    else {
+        collection.count = file_list.rows.length;
+        addEntries(collection, 0, file_list);
+    }
+    return collection;
+}
+
+// Add a number of items/pages to a collection. The items/pages are given
+// either as a list of objects or in the compact format (a table of strings
+// and a list of rows)
+function addEntries(collection, start, data) {
+    if (Array.isArray(data)) {
+        for (var i = 0; i < data.length; i++) {
+            collection.entries[start + i] = data[i];
+        }
+        return;
+    }
+    for (var j = 0; j < data.rows.length; j++) {
+        collection.rows[start + j] = data.rows[j];
+        collection.tables[start + j] = data.strings;
+    }
+}
+
+// Get a certain item/page of a collection. Items/pages in the compact format
+// are only decoded when they are needed
+function getEntry(collection, index) {
+    var entry = collection.entries[index];
+    if (entry || !collection.rows[index]) return entry;
+    var row = collection.rows[index];
+    var strings = collection.tables[index];
+    var keywords = [];
+    for (var i = 0; i < row[3].length; i++) {
+        keywords.push(strings[row[3][i]]);
+    }
+    entry = {
+        name: row[0],
+        description: row[1],
+        author: strings[row[2]],
+        keywords: keywords.length === 0 ? '' : keywords,
+        url: row[4],
+        dir: row[5],
+        last_modified_raw: row[6],
+        alternate_urls: row[7] || null,
+    };
+    collection.entries[index] = entry;
+    collection.rows[index] = null;
+    collection.tables[index] = null;
+    return entry;
+}
+
+// Called by each shard file once it has been loaded
+function loadFileListShard(index, data) {
+    var collection = FILE_COLLECTION;
+    addEntries(collection, index * collection.shardSize, data);
+    var callbacks = collection.pending[index] || [];
+    collection.pending[index] = true;
+    for (var j = 0; j < callbacks.length; j++) {
+        callbacks[j]();
+    }
+}
+
+// Load a certain shard (if it has not been loaded already) and call the
+// callback function once the shard is available
+function loadShard(collection, index, callback) {
+    var pending = collection.pending[index];
+    if (pending === true) {
+        callback();
+        return;
+    }
+    if (pending) {
+        pending.push(callback);
+        return;
+    }
+    collection.pending[index] = [callback];
+    var script = document.createElement("script");
+    script.src = collection.shards[index];
+    document.body.appendChild(script);
+}
+
+// Make sure the items/pages with the given indices are available and call the
+// callback function once they are
+function ensureEntries(collection, indices, callback) {
+    if (collection.shardSize === 0 || indices.length === 0) {
+        callback();
+        return;
+    }
+    var needed = {}, shards = [];
+    for (var i = 0; i < indices.length; i++) {
+        var shard = Math.floor(indices[i] / collection.shardSize);
+        if (!needed[shard]) {
+            needed[shard] = true;
+            shards.push(shard);
+        }
+    }
+    var remaining = shards.length;
+    for (var j = 0; j < shards.length; j++) {
+        loadShard(collection, shards[j], function () {
+            remaining--;
+            if (remaining === 0) callback();
+        });
+    }
+}
+
+// The number of items/pages in the current view. The view is either all
+// items/pages or a list of indices of items/pages (for example the results
+// of a search)
+function viewLength(state) {
+    return state.view ? state.view.length : FILE_COLLECTION.count;
+}
+
+// The index (in the collection) of the i'th item/page in the current view
+function viewEntryIndex(state, i) {
+    return state.view ? state.view[i] : i;
+}
+
+// The grid is "virtualized": only the rows of the grid that are (about to be)
+// visible are kept in the DOM. The rows above and below are replaced by
+// padding of the same (measured or estimated) height, and the elements of
+// rows that are scrolled out of view are reused for the rows that are
+// scrolled into view. The cost of showing the grid therefore does not grow
+// with the number of items/pages.
+
+// Show the i'th item/page of the current view in an element of the grid. If
+// the item/page has not been loaded yet (see "ensureEntries"), then the
+// element is left empty for now
+function showEntry(state, pageItem, i) {
+    var file = getEntry(FILE_COLLECTION, viewEntryIndex(state, i));
+    if (file) {
+        fillPage(pageItem, file.name, file.description, file.author, file.keywords, file.url, state.facets !== null, file.alternate_urls);
+    }
+    else {
+        pageItem.innerHTML = "";
+    }
+    pageItem.pysipLoaded = !!file;
+    return pageItem;
+}
+
+// Get an element for the grid, reusing an element that has been removed from
+// the grid if possible
+function takePageItem(state) {
+    if (state.pool.length > 0) return state.pool.pop();
+    var pageItem = document.createElement("li");
+    pageItem.className = "content-item";
+    return pageItem;
+}
+
+// Remove an element from the grid and keep it around for later use
+function recyclePageItem(state, pageItem) {
+    state.listDom.removeChild(pageItem);
+    state.pool.push(pageItem);
+}
+
+// Show the items/pages from position "start" up to (but not including)
+// position "end" of the current view in the grid. Elements that already show
+// an item/page in that range are left as they are
+function setRange(state, start, end) {
+    var listDom = state.listDom;
+    while (state.first < state.last && state.first < start) {
+        recyclePageItem(state, listDom.firstChild);
+        state.first++;
+    }
+    while (state.last > state.first && state.last > end) {
+        recyclePageItem(state, listDom.lastChild);
+        state.last--;
+    }
+    if (state.first === state.last) {
+        state.first = start;
+        state.last = start;
+    }
+    while (state.first > start) {
+        state.first--;
+        listDom.insertBefore(showEntry(state, takePageItem(state), state.first), listDom.firstChild);
+    }
+    while (state.last < end) {
+        listDom.appendChild(showEntry(state, takePageItem(state), state.last));
+        state.last++;
+    }
+}
+
+// Count the number of columns of the grid, i.e. the number of elements in
+// the first row
+function countColumns(listDom) {
+    var children = listDom.children;
+    var columns = 0;
+    while (columns < children.length && children[columns].offsetTop === children[0].offsetTop) {
+        columns++;
+    }
+    return columns;
+}
+
+// Measure the height of each row of the grid that is currently in the DOM
+function measureRows(state) {
+    var children = state.listDom.children;
+    var columns = state.columns;
+    var rect = state.listDom.getBoundingClientRect();
+    var bottom = rect.bottom - (parseFloat(state.listDom.style.paddingBottom) || 0);
+    for (var k = 0; k < children.length; k += columns) {
+        // Rows with items/pages that have not been loaded yet are skipped
+        if (!children[k].pysipLoaded) continue;
+        var top = children[k].getBoundingClientRect().top;
+        var next = k + columns < children.length ? children[k + columns].getBoundingClientRect().top : bottom;
+        var row = (state.first + k) / columns;
+        if (state.heights[row] === 0) state.measured++;
+        state.measuredHeight += next - top - state.heights[row];
+        state.heights[row] = next - top;
+    }
+}
+
+// Update the rows of the grid kept in the DOM to match the part of the page
+// that is (about to be) visible
+function updateGrid(state) {
+    var listDom = state.listDom;
+    var count = viewLength(state);
+    if (state.columns === 0) {
+        // Add a first batch of items/pages to find out how the grid is laid out
+        setRange(state, 0, Math.min(PAGE_SIZE, count));
+        state.columns = Math.max(countColumns(listDom), 1);
+        state.heights = new Float64Array(Math.ceil(count / state.columns));
+        state.measured = 0;
+        state.measuredHeight = 0;
+    }
+    var columns = state.columns;
+    var rows = state.heights.length;
+    measureRows(state);
+    var estimate = state.measured > 0 ? state.measuredHeight / state.measured : DEFAULT_ROW_HEIGHT;
+    // The part of the grid that is (about to be) visible, relative to the top
+    // of the grid
+    var gridTop = listDom.getBoundingClientRect().top;
+    var top = -gridTop - RENDER_MARGIN;
+    var bottom = -gridTop + window.innerHeight + RENDER_MARGIN;
+    var offset = 0, row = 0, height;
+    for (; row < rows; row++) {
+        height = state.heights[row] || estimate;
+        if (offset + height > top) break;
+        offset += height;
+    }
+    var firstRow = row, before = offset;
+    for (; row < rows && offset < bottom; row++) {
+        offset += state.heights[row] || estimate;
+    }
+    var total = state.measuredHeight + (rows - state.measured) * estimate;
+    listDom.style.paddingTop = before + "px";
+    listDom.style.paddingBottom = Math.max(total - offset, 0) + "px";
+    setRange(state, firstRow * columns, Math.min(row * columns, count));
+    // Load the items/pages that are not available yet (if the list of files
+    // has been split into shards) and show them once they have been loaded
+    var missing = [];
+    for (var i = state.first, pageItem = listDom.firstChild; i < state.last; i++, pageItem = pageItem.nextSibling) {
+        if (pageItem.pysipLoaded) continue;
+        showEntry(state, pageItem, i);
+        if (!pageItem.pysipLoaded) missing.push(viewEntryIndex(state, i));
+    }
+    if (missing.length > 0 && !state.loading) {
+        var generation = state.generation;
+        state.loading = true;
+        ensureEntries(FILE_COLLECTION, missing, function () {
+            state.loading = false;
+            // Skip the items/pages if the view has changed in the meantime
+            if (generation === state.generation) scheduleUpdate(state);
+        });
+    }
+}
+
+// Update the grid before the next repaint (at most once per frame)
+function scheduleUpdate(state) {
+    if (state.frame) return;
+    var update = function () {
+        state.frame = 0;
+        updateGrid(state);
+    };
+    state.frame = window.requestAnimationFrame ? window.requestAnimationFrame(update) : setTimeout(update, 16);
+}
+
+// Remove all items/pages from the grid and forget the measured layout
+function resetGrid(state) {
+    while (state.listDom.firstChild) {
+        recyclePageItem(state, state.listDom.firstChild);
+    }
+    state.first = 0;
+    state.last = 0;
+    state.columns = 0;
+    state.listDom.style.paddingTop = "0px";
+    state.listDom.style.paddingBottom = "0px";
+}
+
+// Put a list of ids of items/pages (in ascending order) in a precomputed
+// order (a permutation of the ids of all items/pages) without sorting the
+// list: the ids are marked and then picked out of the permutation in order
+function applyOrder(ids, order, count) {
+    if (!order) return ids;
+    if (!ids) return order;
+    var marked = new Uint8Array(count);
+    for (var i = 0; i < ids.length; i++) {
+        marked[ids[i]] = 1;
+    }
+    var view = [];
+    for (var j = 0; j < order.length && view.length < ids.length; j++) {
+        if (marked[order[j]]) view.push(order[j]);
+    }
+    return view;
+}
+
+// Replace the items/pages shown in the grid. The filter is a list of the ids
+// of the items/pages to show (in ascending order, for example the results of
+// a search) or null to show all items/pages. The items/pages are shown in
+// the selected order
+function setView(state, filter) {
+    state.filter = filter;
+    state.view = applyOrder(filter, state.order, FILE_COLLECTION.count);
+    state.generation++;
+    state.loading = false;
+    resetGrid(state);
+    updateGrid(state);
+}
+
+// Split a text into lowercase tokens. Should match the "tokenize" function used
+// when the search index is built (see "search.py"), i.e. the text is normalized
+// (NFC) before it is lowercased and split by the same "TOKEN_PATTERN"
+function tokenize(text) {
+    return text.normalize("NFC").toLowerCase().match(/[\p{L}\p{N}_]+/gu) || [];
+}
+
+// Find the first position in a sorted list of tokens where the token is not
+// smaller than the given value. The tokens are sorted by their UTF-16 code
+// units, which is how strings are compared in Javascript
+function lowerBound(tokens, value) {
+    var low = 0, high = tokens.length;
+    while (low < high) {
+        var middle = (low + high) >>> 1;
+        if (tokens[middle] < value) low = middle + 1;
+        else high = middle;
+    }
+    return low;
+}
+
+// Search the titles, authors and keywords of the items/pages. Each term of
+// the query is matched against the start of the tokens in the search index
+// and only items/pages that match all the terms are returned (in the order
+// they are shown in the grid)
+function search(searchIndex, query, count) {
+    var terms = tokenize(query);
+    if (terms.length === 0) return null;
+    // The number of terms matched by each item/page so far
+    var hits = new Int32Array(count);
+    for (var t = 0; t < terms.length; t++) {
+        var first = lowerBound(searchIndex.tokens, terms[t]);
+        var last = lowerBound(searchIndex.tokens, terms[t] + "\uffff");
+        for (var k = first; k < last; k++) {
+            var postings = searchIndex.postings[k];
+            for (var p = 0; p < postings.length; p++) {
+                if (hits[postings[p]] === t) hits[postings[p]] = t + 1;
+            }
+        }
+    }
+    var results = [];
+    for (var i = 0; i < count; i++) {
+        if (hits[i] === terms.length) results.push(i);
+    }
+    return results;
+}
+
+// Connect the search box (if any) to the grid
+function setupSearch(state, searchIndex) {
+    var searchBox = document.getElementById("search");
+    var status = document.getElementById("search-status");
+    if (!searchBox || !searchIndex) return;
+    searchBox.addEventListener("input", function () {
+        var results = search(searchIndex, searchBox.value, FILE_COLLECTION.count);
+        if (status) {
+            status.textContent = results === null ? "" :
+                results.length + " of " + FILE_COLLECTION.count + " pages";
+        }
+        var facetStatus = document.getElementById("facet-status");
+        if (facetStatus) facetStatus.innerHTML = "";
+        setView(state, results);
+    });
+}
+
+// Connect the sort selector (if any) to the grid. Each order is a
+// precomputed permutation of the ids of the items/pages, so changing the
+// order does not require sorting the items/pages
+function setupSortOrders(state, sortOrders) {
+    var select = document.getElementById("sort");
+    if (!select || !sortOrders) return;
+    select.value = sortOrders["default"];
+    select.addEventListener("change", function () {
+        // The default order is the order of the ids themselves
+        state.order = sortOrders.orders[select.value] || null;
+        setView(state, state.filter);
+    });
+}
+
+// Callbacks waiting for the ids of the items/pages of a certain keyword or
+// author to be loaded
+var FACET_PENDING = {};
+
+// Called by each facet shard file once it has been loaded
+function loadFacetShard(facet, value, ids) {
+    var key = facet + "\u0000" + value;
+    FACETS[facet][value].ids = ids;
+    var callbacks = FACET_PENDING[key] || [];
+    delete FACET_PENDING[key];
+    for (var i = 0; i < callbacks.length; i++) {
+        callbacks[i](ids);
+    }
+}
+
+// Get the ids of the items/pages with a certain keyword or author and call
+// the callback function with the ids once they are available
+function getFacetIds(facets, facet, value, callback) {
+    var entry = facets[facet] && facets[facet][value];
+    if (!entry) {
+        callback([]);
+        return;
+    }
+    if (entry.ids) {
+        callback(entry.ids);
+        return;
+    }
+    var key = facet + "\u0000" + value;
+    if (FACET_PENDING[key]) {
+        FACET_PENDING[key].push(callback);
+        return;
+    }
+    FACET_PENDING[key] = [callback];
+    var script = document.createElement("script");
+    script.src = entry.shard;
+    document.body.appendChild(script);
+}
+
+// Show only the items/pages with a certain keyword or author whenever it is
+// clicked
+function setupFacets(state, facets) {
+    var status = document.getElementById("facet-status");
+    if (!facets) return;
+    var names = {keywords: "keyword", authors: "author"};
+    state.listDom.addEventListener("click", function (event) {
+        var target = event.target;
+        if (!target || target.className !== "facet") return;
+        // Do not follow the link covering the grid item
+        event.preventDefault();
+        event.stopPropagation();
+        var facet = target.getAttribute("data-facet");
+        var value = target.textContent;
+        getFacetIds(facets, facet, value, function (ids) {
+            var searchBox = document.getElementById("search");
+            if (searchBox) searchBox.value = "";
+            var searchStatus = document.getElementById("search-status");
+            if (searchStatus) searchStatus.textContent = "";
+            if (status) {
+                status.innerHTML = ids.length + " pages with the " + names[facet] +
+                    " \u201c" + value + "\u201d \u00b7 <span class=\"clear\">Show all pages</span>";
+            }
+            setView(state, ids);
+            window.scrollTo(0, 0);
+        });
+    });
+    if (status) {
+        status.addEventListener("click", function (event) {
+            if (!event.target || event.target.className !== "clear") return;
+            status.innerHTML = "";
+            setView(state, null);
+        });
+    }
 }
 
 // Add all items/pages to the grid displayed in the static index page
-function loadData(index_page_data, file_list) {
-    if (!index_page_data || !file_list) return;
+function loadData(index_page_data, file_list, manifest, search_index, sort_orders, facets) {
+    if (!index_page_data || (!file_list && !manifest)) return;
     setIndexPageHeader(index_page_data.title);
     setIndexPageDescription(index_page_data.description);
     setIndexPageFooter(index_page_data.footer);
+    FILE_COLLECTION = createFileCollection(file_list, manifest);
     var content = document.getElementById("content");
-    var file, counter = 0, listDom;
-    for (var i = 0; i < file_list.length; i++) {
-        file = file_list[i];
-        if (counter == 0) {
-            listDom = document.createElement("ol");
-            listDom.className = "content-list";
-            content.appendChild(listDom);
-        }
-        addPage(listDom, file.name, file.description, file.author, file.keywords, file.url);
-        counter++;
-    }
+    var listDom = document.createElement("ol");
+    listDom.className = "content-list";
+    content.appendChild(listDom);
+    var state = {
+        listDom: listDom,
+        facets: facets,
+        // The ids of the items/pages to show (null for all), the selected
+        // order (null for the default order) and the resulting positions of
+        // the items/pages in the grid (null for all in the default order)
+        filter: null,
+        order: null,
+        view: null,
+        generation: 0,
+        // The positions (in the current view) of the items/pages in the grid
+        first: 0,
+        last: 0,
+        // The layout of the grid: the number of columns and the measured
+        // height of each row (0 if the row has not been measured yet)
+        columns: 0,
+        heights: null,
+        measured: 0,
+        measuredHeight: 0,
+        // Elements removed from the grid that can be reused
+        pool: [],
+        loading: false,
+        frame: 0,
+    };
+    window.addEventListener("scroll", function () {
+        scheduleUpdate(state);
+    });
+    // The number of columns (and the height of the rows) may change
+    window.addEventListener("resize", function () {
+        resetGrid(state);
+        scheduleUpdate(state);
+    });
+    setupSearch(state, search_index);
+    setupSortOrders(state, sort_orders);
+    setupFacets(state, facets);
+    updateGrid(state);
 }
 
 // Load metadata contained in the "INDEX_PAGE_DATA" variable 
-// Load all other collected static page data contained in the "FILE_LIST" variable
-loadData(INDEX_PAGE_DATA, FILE_LIST);
+// Load all other collected static page data contained in the "FILE_LIST"
+// variable (or the shards described by the "FILE_LIST_MANIFEST" variable),
+// the search index contained in the "SEARCH_INDEX" variable (if any), the
+// precomputed orders contained in the "SORT_ORDERS" variable (if any) and the
+// index of keywords and authors contained in the "FACETS" variable (if any)
+loadData(
+    INDEX_PAGE_DATA,
+    FILE_LIST,
+    typeof FILE_LIST_MANIFEST === "undefined" ? null : FILE_LIST_MANIFEST,
+    typeof SEARCH_INDEX === "undefined" ? null : SEARCH_INDEX,
+    typeof SORT_ORDERS === "undefined" ? null : SORT_ORDERS,
+    typeof FACETS === "undefined" ? null : FACETS
+);
@@ -13,6 +13,7 @@ setup(
     entry_points = {
         "console_scripts": [
             "pysip = pysip.src.collect:main",
+            "pysip-bench = pysip.src.benchmark:main",
         ],
     },
     long_description = open("README.md").read(),
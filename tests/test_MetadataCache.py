@@ -0,0 +1,120 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#                               Import local code                              #
+#------------------------------------------------------------------------------#
+from pysip.src.MetadataCache import MetadataCache
+#------------------------------------------------------------------------------#
+#               Import packages from the python standard library               #
+#------------------------------------------------------------------------------#
+import json
+import os
+
+
+#------------------------------------------------------------------------------#
+def write_file(path, content):
+    """ Write a file and return the result of calling "os.stat" on it.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    with open(path, "w") as file:
+        file.write(content)
+    return os.stat(path)
+
+
+def test_hit_and_miss(tmp_path):
+    cache_file = str(tmp_path / "cache" / "metadata.json")
+    path = str(tmp_path / "a" / "index.html")
+    st = write_file(path, "<html></html>")
+    cache = MetadataCache(cache_file)
+    assert cache.get(path, st) is None
+    cache.put(path, st, {"name": "a"})
+    cache.save()
+    # A new run (or a new process) reads the cache back from disk
+    cache = MetadataCache(cache_file)
+    assert cache.get(path, st) == {"name": "a"}
+    assert (cache.hits, cache.misses) == (1, 0)
+    # A changed file is a miss
+    st = write_file(path, "<html><head></head></html>")
+    assert cache.get(path, st) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_rebuild_ignores_existing_cache(tmp_path):
+    cache_file = str(tmp_path / "metadata.json")
+    path = str(tmp_path / "a" / "index.html")
+    st = write_file(path, "<html></html>")
+    cache = MetadataCache(cache_file)
+    cache.put(path, st, {"name": "a"})
+    cache.save()
+    assert MetadataCache(cache_file, rebuild = True).get(path, st) is None
+
+
+def test_touched_file_hits_by_hash(tmp_path):
+    cache_file = str(tmp_path / "metadata.json")
+    path = str(tmp_path / "a" / "index.html")
+    st = write_file(path, "<html></html>")
+    cache = MetadataCache(cache_file)
+    cache.put(path, st, {"name": "a"}, content_hash = "h1")
+    cache.save()
+    os.utime(path, ns = (st.st_atime_ns, st.st_mtime_ns + 10**9))
+    st = os.stat(path)
+    cache = MetadataCache(cache_file)
+    assert cache.get_hash(path, st) is None
+    assert cache.get(path, st) is None
+    assert cache.get(path, st, content_hash = "h1") == {"name": "a"}
+    assert cache.get(path, st, content_hash = "h2") is None
+
+
+def test_renamed_file_hits_by_hash(tmp_path):
+    cache_file = str(tmp_path / "metadata.json")
+    old_path = str(tmp_path / "a" / "index.html")
+    st = write_file(old_path, "<html></html>")
+    cache = MetadataCache(cache_file)
+    cache.put(old_path, st, {"name": "a"}, content_hash = "h1")
+    cache.save()
+    new_path = str(tmp_path / "b" / "index.html")
+    os.makedirs(os.path.dirname(new_path))
+    os.rename(old_path, new_path)
+    st = os.stat(new_path)
+    cache = MetadataCache(cache_file)
+    assert cache.get(new_path, st) is None
+    assert cache.get(new_path, st, content_hash = "h1") == {"name": "a"}
+    cache.put(new_path, st, {"name": "a"}, content_hash = "h1")
+    cache.save()
+    # The entry of the old path was not seen and is dropped
+    with open(cache_file) as file:
+        assert list(json.load(file)["entries"]) == [new_path]
+
+
+def test_save_drops_unseen_entries(tmp_path, capsys):
+    cache_file = str(tmp_path / "metadata.json")
+    cache = MetadataCache(cache_file, verbose = True)
+    stats = {}
+    for name in ["a", "b", "c"]:
+        path = str(tmp_path / name / "index.html")
+        stats[path] = write_file(path, name)
+        cache.put(path, stats[path], {"name": name})
+    cache.save()
+    cache = MetadataCache(cache_file, verbose = True)
+    path = str(tmp_path / "a" / "index.html")
+    assert cache.get(path, stats[path]) == {"name": "a"}
+    cache.save()
+    assert "2 stale entry(ies) dropped" in capsys.readouterr().out
+    assert list(MetadataCache(cache_file).entries) == [path]
+    # No temporary files are left behind
+    assert os.listdir(tmp_path / "a") == ["index.html"]
+    assert sorted(os.listdir(tmp_path)) == ["a", "b", "c", "metadata.json"]
+
+
+def test_outdated_cache_is_ignored(tmp_path):
+    cache_file = tmp_path / "metadata.json"
+    cache_file.write_text(json.dumps({
+        "version": MetadataCache.VERSION + 1, "entries": {"x": {}},
+    }))
+    assert MetadataCache(str(cache_file)).entries == {}
+    cache_file.write_text("{not json")
+    assert MetadataCache(str(cache_file)).entries == {}
@@ -0,0 +1,68 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#                               Import local code                              #
+#------------------------------------------------------------------------------#
+from pysip.src import external_sort as es
+#------------------------------------------------------------------------------#
+#               Import packages from the python standard library               #
+#------------------------------------------------------------------------------#
+import os
+import random
+
+
+#------------------------------------------------------------------------------#
+def make_records(n, n_keys, seed = 0):
+    """ Generate records with many equal keys. The "id" of a record is its
+    position in the input, such that the stability of a sort can be checked.
+    """
+    rng = random.Random(seed)
+    return [{"id": i, "key": rng.randrange(n_keys)} for i in range(n)]
+
+
+def test_in_memory_sort_does_not_spill(tmp_path):
+    records = make_records(100, 10)
+    result = list(es.external_sort(records, lambda r: r["key"], 1000,
+        tmp_dir = str(tmp_path),
+    ))
+    assert result == sorted(records, key = lambda r: r["key"])
+
+
+def test_spill_and_merge_is_stable(tmp_path):
+    records = make_records(1000, 7)
+    sorted_records = es.external_sort(records, lambda r: r["key"], 64,
+        tmp_dir = str(tmp_path),
+    )
+    first = next(sorted_records)
+    # The runs are spilled to disk while the records are being merged
+    (run_dir,) = os.listdir(tmp_path)
+    assert len(os.listdir(tmp_path / run_dir)) > 1
+    result = [first] + list(sorted_records)
+    assert result == sorted(records, key = lambda r: r["key"])
+    # The spill files are removed once all records have been read
+    assert os.listdir(tmp_path) == []
+
+
+def test_multi_pass_merge_is_stable(tmp_path, monkeypatch):
+    # Merge at most 3 runs at a time, such that the runs are merged in
+    # several passes
+    monkeypatch.setattr(es, "MERGE_FAN_IN", 3)
+    records = make_records(500, 5, seed = 1)
+    key = lambda r: [r["key"], r["id"] % 2]
+    result = list(es.external_sort(records, key, 16, tmp_dir = str(tmp_path)))
+    assert result == sorted(records, key = key)
+    assert os.listdir(tmp_path) == []
+
+
+def test_abandoned_sort_removes_spill_files(tmp_path):
+    records = make_records(200, 3)
+    sorted_records = es.external_sort(records, lambda r: r["key"], 10,
+        tmp_dir = str(tmp_path),
+    )
+    next(sorted_records)
+    sorted_records.close()
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,80 @@
+#------------------------------------------------------------------------------#
+#                     Author     : Nicklas Sindlev Andersen                    #
+#                     Website    : Nicklas.xyz                                 #
+#                     Github     : github.com/NicklasXYZ                       #
+#------------------------------------------------------------------------------#
+#                                                                              #
+#------------------------------------------------------------------------------#
+#                               Import local code                              #
+#------------------------------------------------------------------------------#
+from pysip.src.publish import (
+    can_publish,
+    create_staging_dir,
+    publish,
+)
+#------------------------------------------------------------------------------#
+#               Import packages from the python standard library               #
+#------------------------------------------------------------------------------#
+import os
+
+
+#------------------------------------------------------------------------------#
+def build(output_dir, content):
+    """ "Build" a static index page in a new staging directory.
+    """
+    staging_dir = create_staging_dir(output_dir)
+    with open(os.path.join(staging_dir, "index.html"), "w") as file:
+        file.write(content)
+    return staging_dir
+
+
+def read_index(output_dir):
+    """ Read the "index.html" file of a published static index page.
+    """
+    with open(os.path.join(output_dir, "index.html")) as file:
+        return file.read()
+
+
+def test_publish_flips_symlink(tmp_path):
+    output_dir = str(tmp_path / "site")
+    assert can_publish(output_dir)
+    first = build(output_dir, "first")
+    assert os.path.basename(first).startswith(".site.")
+    publish(first, output_dir)
+    assert os.path.islink(output_dir)
+    # The link is relative to the parent of the output directory
+    assert os.readlink(output_dir) == os.path.basename(first)
+    assert read_index(output_dir) == "first"
+    assert can_publish(output_dir)
+    second = build(output_dir, "second")
+    publish(second, output_dir)
+    assert os.readlink(output_dir) == os.path.basename(second)
+    assert read_index(output_dir) == "second"
+    # The staging directory that was published before is removed and no
+    # temporary link is left behind
+    assert not os.path.exists(first)
+    assert sorted(os.listdir(tmp_path)) == \
+        sorted([os.path.basename(second), "site"])
+
+
+def test_publish_replaces_directory(tmp_path):
+    output_dir = tmp_path / "site"
+    output_dir.mkdir()
+    (output_dir / "old.html").write_text("old")
+    assert not can_publish(str(output_dir))
+    staging_dir = build(str(output_dir), "new")
+    publish(staging_dir, str(output_dir))
+    assert os.path.islink(output_dir)
+    assert os.listdir(output_dir) == ["index.html"]
+
+
+def test_publish_keeps_foreign_link_target(tmp_path):
+    output_dir = str(tmp_path / "site")
+    foreign_dir = tmp_path / "foreign"
+    foreign_dir.mkdir()
+    os.symlink("foreign", output_dir)
+    staging_dir = build(output_dir, "new")
+    publish(staging_dir, output_dir)
+    assert read_index(output_dir) == "new"
+    # Only staging directories created by pysip are removed
+    assert foreign_dir.is_dir()